@@ -158,11 +158,13 @@ export const DBUpdater = ({ setCurrentView, setLanguage }: { setCurrentView: (vi
     const formData = new FormData(e.currentTarget);
     const country = formData.get("country") as string;
     const os = formData.get("os") as string;
+    // 체크하면 서버의 쿼리 캐시를 무시하고 새로 생성
+    const forceRefresh = formData.get("force_refresh") === "on";
 
     // WebSocket을 통해 명령 전송
     ws.current?.send(JSON.stringify({
       command: 'update_db',
-      args: [country, os]
+      args: [country, os, forceRefresh]
     }));
   };
 
@@ -243,6 +245,11 @@ export const DBUpdater = ({ setCurrentView, setLanguage }: { setCurrentView: (vi
             <option value="Android" disabled>Android (Coming soon)</option>
         </select>
       </div>
+      <div className="form-group">
+        <label htmlFor="force_refresh">
+          <input type="checkbox" name="force_refresh" id="force_refresh" /> Regenerate queries (ignore cached queries)
+        </label>
+      </div>
       <div className="row">
         <button type="submit" disabled={isLoading}>Generate Queries</button>
         <button type="button" onClick={() => handleBackToDashboard()}>Back to Dashboard</button>
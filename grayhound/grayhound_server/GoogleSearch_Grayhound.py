@@ -1,33 +1,290 @@
 # GoogleSearch_Grayhound.py
 # Grayhound's Lightweight Web Search & Content Extraction Module
 
+import asyncio
 import requests
+import httpx
 import configparser
 import logging
-import urllib.parse
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
 import re
+import threading
+import time
+import urllib.parse
+import weakref
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from typing import AsyncIterator, AsyncIterable, Iterable
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+import html_extractor
+from page_parse_worker import ParsePool, parse_page
+from cache_store import DiskCache, make_cache_key
+from singleflight import SingleFlight
+from text_dedup import PageDeduplicator
 
 # --- 로깅 설정 ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def Google_Search_api(query: str, num_results: int) -> list[str]:
-    """Google Search API를 호출하여 검색 결과 URL 리스트를 반환"""
+# --- 설정 로드 (모듈 로드 시 한 번, 실행 위치와 무관하게 이 파일 기준 경로 사용) ---
+config = configparser.ConfigParser()
+config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini'))
+
+GOOGLE_SEARCH_API_KEY = config.get('DEFAULT', 'google_api_key', fallback=None)
+GOOGLE_SEARCH_CX = config.get('DEFAULT', 'cx', fallback=None)
+SEARCH_API_URL = "https://www.googleapis.com/customsearch/v1"
+
+# --- 공유 HTTP 세션 (keep-alive 커넥션 풀) ---
+# 같은 호스트(googleapis.com, reddit.com 등)에 대한 반복 요청은 DNS/TCP/TLS 연결을 재사용
+SEARCH_POOL_MAXSIZE = config.getint('SEARCH', 'search_pool_maxsize', fallback=5)   # 호스트당 최대 연결 수 (검색 스레드 수와 동일)
+FETCH_POOL_HOSTS = config.getint('SEARCH', 'fetch_pool_hosts', fallback=32)        # 커넥션 풀을 유지할 최대 호스트 수
+FETCH_POOL_MAXSIZE = config.getint('SEARCH', 'fetch_pool_maxsize', fallback=10)    # 호스트당 최대 연결 수 (페이지 추출 스레드 수와 동일)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+# gzip/deflate는 항상, br(brotli)/zstd는 해당 디코더 패키지가 설치된 경우에만 요청
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+def _create_session(pool_hosts: int, pool_maxsize: int, headers: dict | None = None) -> requests.Session:
+    """호스트별 연결 수가 제한된 keep-alive 커넥션 풀 세션 생성"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept-Encoding': ACCEPT_ENCODING, **(headers or {})})
+    return session
+
+# 검색 API는 단일 호스트이므로 풀 하나만 유지, 페이지 추출은 여러 호스트의 풀을 유지
+# (requests.Session의 커넥션 풀은 스레드 간에 공유해도 안전함)
+_search_session = _create_session(1, SEARCH_POOL_MAXSIZE)
+_fetch_session = _create_session(FETCH_POOL_HOSTS, FETCH_POOL_MAXSIZE, {'User-Agent': USER_AGENT})
+
+# --- 비동기 크롤러 동시 실행 제한 ---
+FETCH_CONCURRENCY = config.getint('SEARCH', 'fetch_concurrency', fallback=10)            # 전체 동시 페이지 요청 수
+PER_DOMAIN_CONCURRENCY = config.getint('SEARCH', 'per_domain_concurrency', fallback=2)   # 도메인별 동시 페이지 요청 수
+
+# --- 페이지 본문 다운로드 제한 ---
+MAX_PAGE_BYTES = config.getint('SEARCH', 'max_page_bytes', fallback=2097152) or None   # 페이지당 최대 다운로드 크기 (0 = 제한 없음), 초과분은 잘라냄
+READ_CHUNK_BYTES = 65536
+
+# --- 중복 텍스트 제거 ---
+# search_and_extract_text에서 앞서 받은 페이지/문단과 추정 유사도가 이 값 이상인 페이지/문단을 버림 (0 = 사용 안 함)
+DEDUP_THRESHOLD = config.getfloat('SEARCH', 'dedup_threshold', fallback=0.8)
+
+# --- 페이지 파싱 실행 방식 ---
+# thread: 스레드에서 파싱 (파싱은 GIL을 잡으므로 스레드를 늘려도 처리량이 늘지 않음)
+# process: 받은 본문(bytes)을 프로세스 풀로 넘겨 파싱 (코어 수만큼 병렬로 파싱, 대규모 수집용)
+PARSE_MODE = config.get('SEARCH', 'parse_mode', fallback='thread').strip().lower()
+PARSE_WORKERS = config.getint('SEARCH', 'parse_workers', fallback=0) or os.cpu_count() or 1   # 0 = CPU 코어 수
+if PARSE_MODE not in ('thread', 'process'):
+    logging.warning(f"Unknown [SEARCH] parse_mode '{PARSE_MODE}'. Falling back to 'thread'.")
+    PARSE_MODE = 'thread'
+
+# 작업 프로세스는 page_parse_worker만 import하므로 이 모듈의 설정/세션 초기화가 반복되지 않음
+_parse_pool = ParsePool(PARSE_WORKERS)
+
+def shutdown_parse_pool():
+    """파싱용 프로세스 풀 종료 (서버 종료 시 호출)"""
+    _parse_pool.shutdown()
+
+def _parse_page(content: bytes, content_type: str | None) -> str:
+    """받은 본문을 PARSE_MODE에 따라 현재 스레드 또는 프로세스 풀에서 텍스트로 변환 (동기 경로용)"""
+    if PARSE_MODE == 'process':
+        pool = _parse_pool.acquire()
+        try:
+            return pool.submit(parse_page, content, content_type).result()
+        except BrokenProcessPool as e:
+            _parse_pool.discard(pool)
+            logging.error(f"HTML parse process pool is broken ({e}). Parsing in the current thread instead.")
+    return parse_page(content, content_type)
+
+async def _aparse_page(content: bytes, content_type: str | None) -> str:
+    """_parse_page의 비동기 버전. 파싱은 CPU 작업이므로 이벤트 루프 밖(스레드 또는 프로세스 풀)에서 실행"""
+    if PARSE_MODE == 'process':
+        pool = _parse_pool.acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, parse_page, content, content_type)
+        except BrokenProcessPool as e:
+            _parse_pool.discard(pool)
+            logging.error(f"HTML parse process pool is broken ({e}). Parsing in a thread instead.")
+    return await asyncio.to_thread(parse_page, content, content_type)
+
+# --- 페이지 텍스트 디스크 캐시 ---
+# URL별로 추출된 텍스트(원본 HTML 아님)와 ETag/Last-Modified를 저장.
+# ttl_hours 안에는 요청 없이 재사용하고, 그 이후에는 조건부 요청으로 재검증하여 304이면 다운로드와 파싱을 모두 생략.
+# max_age_days 동안 재검증되지 않은 항목은 삭제
+PAGE_CACHE_ENABLED = config.getboolean('PAGE_CACHE', 'enabled', fallback=True)
+PAGE_CACHE_TTL = config.getfloat('PAGE_CACHE', 'ttl_hours', fallback=24) * 3600
+PAGE_CACHE_MAX_AGE = config.getfloat('PAGE_CACHE', 'max_age_days', fallback=30) * 24 * 3600
+page_cache = None
+if PAGE_CACHE_ENABLED:
     try:
-        config = configparser.ConfigParser()
-        config.read('config.ini')
-        google_api_key = config['DEFAULT']['google_api_key']
-        cx = config['DEFAULT']['cx']
+        page_cache = DiskCache(
+            'page_text',
+            max_bytes=config.getint('PAGE_CACHE', 'max_size_mb', fallback=200) * 1024 * 1024,
+            default_ttl=PAGE_CACHE_MAX_AGE,
+        )
+        logging.info(f"Page text cache enabled: {page_cache.path}")
     except Exception as e:
-        logging.error(f"Error reading config.ini: {e}")
+        logging.error(f"Failed to initialize the page text cache. Caching is disabled: {e}")
+
+# 페이지 캐시 조회 결과 (get_page_cache_stats()로 조회)
+# 스레드(to_thread, 동기 크롤링)에서도 갱신되므로 잠금을 잡고 변경
+_page_cache_stats = {"fresh_hits": 0, "revalidated": 0, "refetched": 0, "misses": 0}
+_page_cache_stats_lock = threading.Lock()
+
+def _count_page_stat(name: str):
+    with _page_cache_stats_lock:
+        _page_cache_stats[name] += 1
+
+def get_page_cache_stats() -> dict:
+    """페이지 캐시의 적중률 통계를 반환 (재검증 결과 포함, 캐시 비활성화 시 enabled=False)"""
+    if not page_cache:
+        return {"enabled": False}
+    with _page_cache_stats_lock:
+        counters = dict(_page_cache_stats)
+    lookups = sum(counters.values())
+    hits = counters["fresh_hits"] + counters["revalidated"]
+    return {
+        "enabled": True,
+        **page_cache.stats(),
+        **counters,
+        "page_hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+    }
+
+def _lookup_page(url: str) -> tuple[str | None, dict | None]:
+    """(캐시 키, 캐시 항목)을 반환. 추출기 버전이 바뀌면 키가 달라지므로 이전 형식의 텍스트는 재사용하지 않음"""
+    if not page_cache:
+        return None, None
+    cache_key = make_cache_key('page', html_extractor.EXTRACTOR_VERSION, url)
+    return cache_key, page_cache.get(cache_key)
+
+def _is_fresh(entry: dict | None) -> bool:
+    return entry is not None and time.time() - entry["checked_at"] < PAGE_CACHE_TTL
+
+def _conditional_headers(entry: dict | None) -> dict:
+    """캐시 항목의 검증자로 조건부 요청 헤더를 생성"""
+    headers = {}
+    if entry and entry.get("etag"):
+        headers['If-None-Match'] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers['If-Modified-Since'] = entry["last_modified"]
+    return headers
+
+def _revalidated(cache_key: str, entry: dict) -> str:
+    """304 응답: 저장된 텍스트를 그대로 사용하고 재검증 시각만 갱신"""
+    _count_page_stat("revalidated")
+    page_cache.set(cache_key, {**entry, "checked_at": time.time()})
+    return entry["text"]
+
+def _store_page(cache_key: str | None, entry: dict | None, headers, text: str):
+    """새로 받은 페이지의 텍스트와 검증자를 저장 (추출에 실패한 빈 텍스트는 저장하지 않음)"""
+    if cache_key is None:
+        return
+    _count_page_stat("refetched" if entry else "misses")
+    if text:
+        page_cache.set(cache_key, {
+            "text": text,
+            "etag": headers.get('ETag'),
+            "last_modified": headers.get('Last-Modified'),
+            "checked_at": time.time(),
+        })
+
+class _CrawlerState:
+    """이벤트 루프별 비동기 크롤러 자원 (커넥션 풀 클라이언트 + 전체/검색/도메인별 세마포어)"""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=FETCH_CONCURRENCY + SEARCH_POOL_MAXSIZE, keepalive_expiry=30),
+            timeout=httpx.Timeout(10),
+        )  # Accept-Encoding은 httpx 기본값 사용 (디코딩할 수 있는 방식만 요청)
+        self.search_semaphore = asyncio.Semaphore(SEARCH_POOL_MAXSIZE)
+        self.fetch_semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        self.domain_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def domain_semaphore(self, url: str) -> asyncio.Semaphore:
+        domain = (urllib.parse.urlsplit(url).hostname or "").lower()
+        if domain not in self.domain_semaphores:
+            self.domain_semaphores[domain] = asyncio.Semaphore(PER_DOMAIN_CONCURRENCY)
+        return self.domain_semaphores[domain]
+
+_crawler_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _CrawlerState]" = weakref.WeakKeyDictionary()
+
+def _get_crawler_state() -> _CrawlerState:
+    """현재 이벤트 루프의 크롤러 자원을 반환 (없거나 닫혔으면 생성)"""
+    loop = asyncio.get_running_loop()
+    state = _crawler_states.get(loop)
+    if state is None or state.client.is_closed:
+        state = _CrawlerState()
+        _crawler_states[loop] = state
+    return state
+
+async def aclose_crawler():
+    """현재 이벤트 루프의 크롤러 커넥션 풀을 정리 (서버 종료 시 호출)"""
+    state = _crawler_states.pop(asyncio.get_running_loop(), None)
+    if state is not None and not state.client.is_closed:
+        await state.client.aclose()
+
+# 동일한 검색 쿼리 / URL에 대한 동시 요청은 하나의 upstream 호출로 합침
+search_flights = SingleFlight('search_requests')
+fetch_flights = SingleFlight('page_fetches')
+
+# --- 검색 결과 디스크 캐시 ---
+# 정규화된 쿼리별 URL 목록을 저장하여, TTL 안의 반복 업데이트에서는 Custom Search 할당량을 쓰지 않음
+SEARCH_CACHE_ENABLED = config.getboolean('SEARCH_CACHE', 'enabled', fallback=True)
+search_cache = None
+if SEARCH_CACHE_ENABLED:
+    try:
+        search_cache = DiskCache(
+            'search_results',
+            max_bytes=config.getint('SEARCH_CACHE', 'max_size_mb', fallback=10) * 1024 * 1024,
+            default_ttl=config.getfloat('SEARCH_CACHE', 'ttl_hours', fallback=72) * 3600,
+        )
+        logging.info(f"Search result cache enabled: {search_cache.path}")
+    except Exception as e:
+        logging.error(f"Failed to initialize the search result cache. Caching is disabled: {e}")
+
+def normalize_search_query(query: str) -> str:
+    """검색 쿼리를 정규화 (소문자, 공백 정리). "x64", "64bit" 같은 토큰은 검색 결과를 바꾸므로 그대로 유지"""
+    return re.sub(r'\s+', ' ', query or '').strip().lower()
+
+def get_search_cache_stats() -> dict:
+    """검색 결과 캐시의 적중/미스 통계를 반환 (캐시 비활성화 시 enabled=False)"""
+    if not search_cache:
+        return {"enabled": False}
+    return {"enabled": True, **search_cache.stats()}
+
+def _lookup_search(query: str, num_results: int) -> tuple[str | None, list[str] | None]:
+    """(캐시 키, 캐시된 URL 목록)을 반환. query는 정규화된 쿼리"""
+    if not search_cache:
+        return None, None
+    cache_key = make_cache_key('search', query, num_results)
+    return cache_key, search_cache.get(cache_key)
+
+def _store_search(cache_key: str | None, urls: list[str]) -> list[str]:
+    """검색 결과를 저장하고 그대로 반환 (API 오류와 구분할 수 없는 빈 결과는 저장하지 않음)"""
+    if cache_key and urls:
+        search_cache.set(cache_key, urls)
+    return urls
+
+def Google_Search_api(query: str, num_results: int) -> list[str]:
+    """Google Search API를 호출하여 검색 결과 URL 리스트를 반환 (정규화된 쿼리 기준으로 캐시를 조회하고, 동시 중복 요청은 합침)"""
+    query = normalize_search_query(query)
+    cache_key, urls = _lookup_search(query, num_results)
+    if urls is not None:
+        return urls
+    return search_flights.do_sync(f"{query}\x00{num_results}", lambda: _store_search(cache_key, _google_search_api(query, num_results)))
+
+def _google_search_api(query: str, num_results: int) -> list[str]:
+    """Google_Search_api의 실제 구현"""
+    if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX:
+        logging.error("Error reading config.ini: google_api_key and cx must be set in the [DEFAULT] section.")
         return []
-    
-    encoded_query = urllib.parse.quote(query)
-    url = f"https://www.googleapis.com/customsearch/v1?q={encoded_query}&key={google_api_key}&cx={cx}&num={num_results}"
 
+    params = {'q': query, 'key': GOOGLE_SEARCH_API_KEY, 'cx': GOOGLE_SEARCH_CX, 'num': num_results}
     try:
-        response = requests.get(url, timeout=10)
+        response = _search_session.get(SEARCH_API_URL, params=params, timeout=10)
         response.raise_for_status()
         search_results = response.json()
         
@@ -42,62 +299,220 @@ def Google_Search_api(query: str, num_results: int) -> list[str]:
         return []
     
 def extract_text_from_url(url: str) -> str:
-    """주어진 url에서 주요 텍스트 내용을 추출"""
+    """주어진 url에서 주요 텍스트 내용을 추출 (동시 중복 요청은 합침)"""
     if not url:
         return ""
+    return fetch_flights.do_sync(url, lambda: _extract_text_from_url(url))
+
+def _extract_text_from_url(url: str) -> str:
+    """extract_text_from_url의 실제 구현. 캐시가 신선하면 요청하지 않고, 오래되었으면 조건부 요청으로 재검증. 본문은 스트리밍으로 MAX_PAGE_BYTES까지만 받음"""
+    cache_key, entry = _lookup_page(url)
+    if _is_fresh(entry):
+        _count_page_stat("fresh_hits")
+        return entry["text"]
+    try:
+        with _fetch_session.get(url, timeout=10, stream=True, headers=_conditional_headers(entry)) as response:
+            if response.status_code == 304 and entry:
+                return _revalidated(cache_key, entry)
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type')
+            if not _accept_content_type(url, content_type):
+                return ""
+            content = _read_capped(response.iter_content(READ_CHUNK_BYTES), url)
+        text = _parse_page(content, content_type)
+        _store_page(cache_key, entry, response.headers, text)
+        return text
+    except Exception as e:
+        logging.error(f"Error extracting text from {url}: {e}")
+        return ""
+
+def _accept_content_type(url: str, content_type: str | None) -> bool:
+    """HTML/텍스트가 아닌 응답(PDF, 이미지, 압축 파일 등)은 본문을 받기 전에 거절"""
+    if html_extractor.is_extractable(content_type):
+        return True
+    logging.info(f"Skipping non-HTML content ({content_type}) at {url}")
+    return False
+
+def _read_capped(chunks: Iterable[bytes], url: str) -> bytes:
+    """본문 조각을 MAX_PAGE_BYTES까지만 모음 (초과하면 나머지는 받지 않고 연결을 닫음)"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if MAX_PAGE_BYTES and len(buffer) >= MAX_PAGE_BYTES:
+            logging.info(f"Page body truncated at {MAX_PAGE_BYTES} bytes: {url}")
+            del buffer[MAX_PAGE_BYTES:]
+            break
+    return bytes(buffer)
+
+async def _aread_capped(chunks: AsyncIterable[bytes], url: str) -> bytes:
+    """_read_capped의 비동기 버전"""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if MAX_PAGE_BYTES and len(buffer) >= MAX_PAGE_BYTES:
+            logging.info(f"Page body truncated at {MAX_PAGE_BYTES} bytes: {url}")
+            del buffer[MAX_PAGE_BYTES:]
+            break
+    return bytes(buffer)
+
+# --- 비동기 크롤러 ---
+async def aGoogle_Search_api(query: str, num_results: int) -> list[str]:
+    """Google_Search_api의 비동기 버전 (정규화된 쿼리 기준으로 캐시를 조회하고, 동시 중복 요청은 합침)"""
+    query = normalize_search_query(query)
+    # 검색 캐시(SQLite) 조회/저장은 이벤트 루프를 막지 않도록 스레드에서 실행
+    cache_key, urls = await asyncio.to_thread(_lookup_search, query, num_results)
+    if urls is not None:
+        return urls
+
+    async def search() -> list[str]:
+        return await asyncio.to_thread(_store_search, cache_key, await _agoogle_search_api(query, num_results))
+    return await search_flights.do(f"{query}\x00{num_results}", search)
+
+async def _agoogle_search_api(query: str, num_results: int) -> list[str]:
+    """aGoogle_Search_api의 실제 구현"""
+    if not GOOGLE_SEARCH_API_KEY or not GOOGLE_SEARCH_CX:
+        logging.error("Error reading config.ini: google_api_key and cx must be set in the [DEFAULT] section.")
+        return []
+
+    state = _get_crawler_state()
+    params = {'q': query, 'key': GOOGLE_SEARCH_API_KEY, 'cx': GOOGLE_SEARCH_CX, 'num': num_results}
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        async with state.search_semaphore:
+            response = await state.client.get(SEARCH_API_URL, params=params)
         response.raise_for_status()
-        
-        # 인코딩 자동 감지
-        response.encoding = response.apparent_encoding
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # 불필요한 태그 제거
-        for tag in soup(['script', 'style', 'header', 'footer', 'aside', 'nav']):
-            tag.decompose()
-            
-        # 본문 영역으로 추정되는 태그를 우선 탐색
-        main_content = soup.find('main') or soup.find('article') or soup.find('body')
-        if main_content:
-            text = main_content.get_text(separator=' ', strip=True)
-        else:
-            text = soup.get_text(separator=' ', strip=True)
-            
-        # 과도한 공백 및 줄바꿈 정리
-        text = re.sub(r'\s{2,}', ' ', text)
+        search_results = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logging.error(f"Error calling Google Search API: {e}")
+        return []
+
+    if 'items' in search_results:
+        return [item.get('link') for item in search_results['items']]
+    logging.error(f"No search results found for query: {query}")
+    return []
+
+async def aextract_text_from_url(url: str) -> str:
+    """extract_text_from_url의 비동기 버전 (동시 중복 요청은 합침)"""
+    if not url:
+        return ""
+    return await fetch_flights.do(url, lambda: _aextract_text_from_url(url))
+
+async def _aextract_text_from_url(url: str) -> str:
+    """aextract_text_from_url의 실제 구현. 도메인 슬롯을 먼저 얻은 뒤 전체 슬롯을 얻어, 한 도메인의 대기가 전체 슬롯을 점유하지 않도록 함"""
+    # 페이지 캐시(SQLite) 조회/저장은 동시에 진행 중인 다른 요청을 막지 않도록 스레드에서 실행
+    cache_key, entry = await asyncio.to_thread(_lookup_page, url)
+    if _is_fresh(entry):
+        _count_page_stat("fresh_hits")
+        return entry["text"]
+    state = _get_crawler_state()
+    try:
+        async with state.domain_semaphore(url), state.fetch_semaphore:
+            headers = {'User-Agent': USER_AGENT, **_conditional_headers(entry)}
+            async with state.client.stream('GET', url, headers=headers) as response:
+                if response.status_code == 304 and entry:
+                    return await asyncio.to_thread(_revalidated, cache_key, entry)
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type')
+                if not _accept_content_type(url, content_type):
+                    return ""
+                content = await _aread_capped(response.aiter_bytes(READ_CHUNK_BYTES), url)
+        # 인코딩 감지와 HTML 파싱은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드/프로세스 풀에서 실행
+        text = await _aparse_page(content, content_type)
+        await asyncio.to_thread(_store_page, cache_key, entry, response.headers, text)
         return text
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         logging.error(f"Error extracting text from {url}: {e}")
         return ""
+
+async def aiter_extracted_pages(queries: list[str], num_results_per_query: int = 3, char_budget: int | None = None, dedup: bool = False) -> AsyncIterator[str]:
+    """
+    여러 쿼리로 검색하고, 검색 결과가 도착하는 즉시 해당 URL의 텍스트 추출을 시작해 추출이 끝난 페이지부터 하나씩 반환 (완료 순).
+    - 전체 소요 시간은 모든 검색이 끝나기를 기다리지 않으므로 가장 느린 (검색 → 추출) 경로에 가까움
+    - char_budget: 반환한 텍스트의 누적 길이가 이 값에 도달하면 새 요청을 만들지 않고 진행 중인 검색/추출을 취소한 뒤 종료
+    - dedup: 앞서 반환한 내용과 거의 같은 페이지/문단을 제거한 뒤 반환 (char_budget은 제거 후 길이로 계산)
+    - 호출자가 중간에 반복을 멈추는 경우 contextlib.aclosing으로 감싸면 남은 작업이 즉시 취소됨
+    """
+    # 아키텍처 표기만 다른 쿼리(Delfino-x64 / Delfino-x86 / Delfino)는 한 번만 검색
+    unique_queries = list(dict.fromkeys(normalize_search_query(query) for query in queries))
+    if len(unique_queries) < len(queries):
+        logging.info(f"{len(queries)} queries collapsed to {len(unique_queries)} after normalization.")
+    logging.info(f"Starting search for {len(unique_queries)} queries with {num_results_per_query} results per query.")
+    seen_urls: set[str] = set()
+    tasks: list[asyncio.Task] = []
+    # 검색 Task는 완료 시 None, 추출 Task는 추출한 텍스트(실패 시 빈 문자열)를 넣음
+    completed: asyncio.Queue = asyncio.Queue()
+
+    async def fetch(url: str):
+        text = ""
+        try:
+            text = await aextract_text_from_url(url)
+        finally:
+            completed.put_nowait(text)
+
+    async def search(query: str):
+        try:
+            for url in await aGoogle_Search_api(query, num_results_per_query):
+                # 같은 실행 안에서 중복된 URL은 한 번만 추출
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    tasks.append(asyncio.create_task(fetch(url)))
+        finally:
+            completed.put_nowait(None)
+
+    tasks.extend(asyncio.create_task(search(query)) for query in unique_queries)
+    deduplicator = PageDeduplicator(DEDUP_THRESHOLD) if dedup and DEDUP_THRESHOLD > 0 else None
+    yielded_pages, yielded_chars = 0, 0
+    try:
+        # 검색 Task는 자신의 완료 표시를 넣기 전에 추출 Task를 등록하므로, 완료 수가 Task 수에 도달하면 모든 작업이 끝난 것
+        finished = 0
+        while finished < len(tasks):
+            text = await completed.get()
+            finished += 1
+            if text and deduplicator:
+                # 서명 계산은 CPU 작업이므로 스레드에서 실행 (상태를 공유하므로 한 번에 한 페이지씩)
+                text = await asyncio.to_thread(deduplicator.filter, text)
+            if not text:
+                continue
+            yielded_pages += 1
+            yielded_chars += len(text)
+            yield text
+            if char_budget is not None and yielded_chars >= char_budget:
+                logging.info(f"Character budget ({char_budget}) reached. Cancelling {len(tasks) - finished} remaining search/fetch tasks.")
+                break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if not seen_urls:
+            logging.warning("No URLs found in the search results.")
+        else:
+            logging.info(f"Successfully extracted text from {yielded_pages} pages ({yielded_chars} chars) of {len(seen_urls)} unique URLs.")
+        if deduplicator and deduplicator.stats["pages"]:
+            logging.info(deduplicator.summary())
+
+async def asearch_and_extract_pages(queries: list[str], num_results_per_query: int = 3, char_budget: int | None = None, dedup: bool = False) -> list[str]:
+    """aiter_extracted_pages의 결과를 페이지별 텍스트 목록으로 반환 (완료 순). 호출이 취소되면 진행 중인 검색/추출도 모두 취소"""
+    pages = []
+    async with aclosing(aiter_extracted_pages(queries, num_results_per_query, char_budget, dedup)) as stream:
+        async for text in stream:
+            pages.append(text)
+    return pages
+
+async def asearch_and_extract_text(queries: list[str], num_results_per_query: int = 3, char_budget: int | None = None) -> str:
+    """asearch_and_extract_pages의 결과에서 중복 페이지/문단을 제거하고 하나의 텍스트 덩어리로 합침 (char_budget이 있으면 그 길이까지만)"""
+    text = "\n\n".join(await asearch_and_extract_pages(queries, num_results_per_query, char_budget, dedup=True))
+    return text[:char_budget] if char_budget is not None else text
     
+def search_and_extract_pages(queries: list[str], num_results_per_query: int = 3, dedup: bool = False) -> list[str]:
+    """asearch_and_extract_pages의 동기 버전 (CLI, 작업 스레드용). 실행 중인 이벤트 루프 안에서는 비동기 버전을 사용해야 함"""
+    async def run():
+        try:
+            return await asearch_and_extract_pages(queries, num_results_per_query, dedup=dedup)
+        finally:
+            await aclose_crawler()
+    return asyncio.run(run())
+
 def search_and_extract_text(queries: list[str], num_results_per_query: int = 3) -> str:
-    """여러 쿼리로 검색하고, 각 결과 페이지의 텍스트를 병렬로 추출해 하나의 텍스트 덩어리로 합침."""
-    all_urls = set()
-    logging.info(f"Starting search for {len(queries)} queries with {num_results_per_query} results per query.")
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_query = {executor.submit(Google_Search_api, q, num_results_per_query): q for q in queries}            
-        for future in as_completed(future_to_query):
-            urls = future.result()
-            all_urls.update(urls)
-            
-    if not all_urls:
-        logging.warning("No URLs found in the search results.")
-        return ""
-                
-    logging.info(f"Found {len(all_urls)} unique URLs from {len(queries)} queries. text extraction will start now.")
-    all_texts = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_url = {executor.submit(extract_text_from_url, url): url for url in all_urls}
-        for future in as_completed(future_to_url):
-            text = future.result()
-            if text:
-                all_texts.append(text)
-                
-    logging.info(f"Successfully extracted text from {len(all_texts)} URLs.")
-    return " ".join(all_texts)
\ No newline at end of file
+    """여러 쿼리로 검색하고, 각 결과 페이지의 텍스트를 추출해 중복 페이지/문단을 제거한 뒤 하나의 텍스트 덩어리로 합침 (동기 버전)."""
+    return "\n\n".join(search_and_extract_pages(queries, num_results_per_query, dedup=True))
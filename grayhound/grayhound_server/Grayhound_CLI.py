@@ -3,6 +3,7 @@
 
 import asyncio
 import logging
+import multiprocessing
 from SecurityAgentManager import SecurityAgentManager
 from secure_agent.ThreatIntelligenceCollector import ThreatIntelligenceCollector
 import pandas as pd
@@ -210,6 +211,7 @@ async def manage_ignore_list(user_name: str):
             
 if __name__ == "__main__":
     # 로컬 에이전트(Optimizer.py)가 실행 중이어야 함.
+    multiprocessing.freeze_support()  # parse_mode = process를 실행 파일로 패키징한 경우에 필요
     try:
         asyncio.run(main_cli())
     except KeyboardInterrupt:
@@ -8,6 +8,7 @@ import re
 import websockets
 import signal
 import atexit
+import multiprocessing
 import time
 
 from typing import Any, List, Dict
@@ -15,12 +16,20 @@ from typing import Any, List, Dict
 # 스크립트가 실행되는 위치를 기준으로 상위 폴더의 경로를 추가
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import database
-from SecurityAgentManager import SecurityAgentManager
-from secure_agent.ThreatIntelligenceCollector import ThreatIntelligenceCollector
-from secure_agent.Optimizer import SystemProfiler
 from utils import mask_name, mask_name_for_guide
 
+# parse_mode = process의 작업 프로세스는 spawn 방식(Windows 기본)에서 이 파일을 '__mp_main__'으로 다시 import함.
+# 작업 프로세스마다 DB 연결과 설정 초기화가 반복되지 않도록 서버 모듈은 직접 실행될 때만 import
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 실행 파일로 패키징한 경우 작업 프로세스는 여기서 작업을 처리하고 종료
+    import database
+    import google_ai_client
+    import GoogleSearch_Grayhound
+    import llm_metrics
+    from SecurityAgentManager import SecurityAgentManager
+    from secure_agent.ThreatIntelligenceCollector import ThreatIntelligenceCollector, LAZY_ENRICHMENT, ENRICHMENT_INTERVAL_SECONDS
+    from secure_agent.Optimizer import SystemProfiler
+
 # --- 로깅 설정 ---
 logging.basicConfig(
     level=logging.INFO,
@@ -53,8 +62,9 @@ def cleanup_on_exit():
         finally:
             server = None
 
-# 프로그램 종료 시 자동으로 정리 함수 등록
-atexit.register(cleanup_on_exit)
+# 프로그램 종료 시 자동으로 정리 함수 등록 (작업 프로세스 제외)
+if __name__ == "__main__":
+    atexit.register(cleanup_on_exit)
 
 # --- Websocket 통신 헬퍼 함수 ---
 async def emit(websocket, data_type: str, content: Any):
@@ -76,12 +86,12 @@ async def emit_error(websocket, message: str):
     await emit(websocket, "error", message)
 
 # --- 워크플로우 함수 ---
-async def generate_queries_workflow(websocket, country: str, os_type: str):
-    """1단계: DB 업데이트를 위한 검색 쿼리만 생성하여 클라이언트로 전송"""
+async def generate_queries_workflow(websocket, country: str, os_type: str, force_refresh: bool = False):
+    """1단계: DB 업데이트를 위한 검색 쿼리만 생성하여 클라이언트로 전송 (force_refresh가 아니면 캐시된 쿼리 재사용)"""
     try:
         collector = ThreatIntelligenceCollector()
         await emit_progress(websocket, f"Generating optimized search queries for {country} ({os_type})...")
-        dynamic_queries = await collector.generate_dynamic_queries(country, os_type)
+        dynamic_queries = await collector.generate_dynamic_queries(country, os_type, force_refresh=force_refresh)
 
         if not dynamic_queries:
             await emit_error(websocket, "Failed to generate search queries. Please check the inputs.")
@@ -161,6 +171,10 @@ def _mask_reason_in_db_list(threat_list: List[Dict]) -> List[Dict]:
         threat['reason'] = reason
     return threat_list
 
+async def get_llm_metrics_workflow(websocket):
+    """LLM 호출의 토큰/지연 시간 집계(프로세스 누적, 진행 중 실행, 최근 실행)를 전송"""
+    await emit(websocket, "llm_metrics", {**llm_metrics.get_llm_metrics(), "client": google_ai_client.get_client_stats()})
+
 async def view_db_workflow(websocket):
     """DB 목록 조회 워크플로우"""
     try:
@@ -630,11 +644,12 @@ async def add_item_to_db_workflow(websocket, program_name: str):
         evaluation_result = await collector.evaluate_single_program(program_name, progress_emitter=progress_emitter_callback)
         
         if evaluation_result: # AI가 블로트웨어로 '판단한 경우'에만 실행
-            await database.async_add_threat(evaluation_result)
-            await emit_progress(websocket, f"✅ '{mask_name(program_name)}' was successfully added to the database. Refreshing the list...")
-            await view_db_workflow(websocket) # 성공 후 최신 목록 전송
-        elif evaluation_result == "DUPLICATE":
-            await emit_progress(websocket, f"❌ '{mask_name(program_name)}' is already in the database.")
+            add_status = await database.async_add_threat(evaluation_result)
+            if add_status == "DUPLICATE":
+                await emit_progress(websocket, f"❌ '{mask_name(program_name)}' is already in the database.")
+            else:
+                await emit_progress(websocket, f"✅ '{mask_name(program_name)}' was successfully added to the database. Refreshing the list...")
+                await view_db_workflow(websocket) # 성공 후 최신 목록 전송
         else: # 블로트웨어가 아니거나 평가 실패 시 실행
             await emit_progress(websocket, f"❌ '{mask_name(program_name)}' is not a bloatware and cannot be added to the database.")
 
@@ -643,6 +658,55 @@ async def add_item_to_db_workflow(websocket, program_name: str):
         await emit_error(websocket, f"An unexpected error occurred during program evaluation: {e}")        
 
 # --- WebSocket 메시지 핸들러 ---
+async def dispatch_command(websocket, command: str, args: List[Any]):
+    """클라이언트에서 받은 명령에 따라 워크플로우 실행"""
+    if command == "update_db":
+        # 세 번째 인자로 true를 보내면 캐시를 무시하고 쿼리를 새로 생성
+        force_refresh = len(args) > 2 and str(args[2]).lower() in ("true", "1")
+        await generate_queries_workflow(websocket, args[0], args[1], force_refresh)
+    elif command == "confirm_db_update":
+        await confirm_db_update_workflow(websocket, args[0])
+    elif command == "view_db":
+        await view_db_workflow(websocket)
+    elif command == "scan":
+        ignored_list = args[0] if args else "[]"
+        risk_thresh = int(args[1]) if len(args) > 1 else 6
+        await scan_pc_workflow(websocket, ignored_list, risk_thresh)
+
+    # === Phase 시스템 명령들 ===
+    elif command == "phase_a_clean":
+        language_arg = args[1] if len(args) > 1 else "en"
+        await phase_a_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
+    elif command == "phase_b_clean":
+        language_arg = args[1] if len(args) > 1 else "en"
+        await phase_b_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
+    elif command == "phase_c_clean":
+        language_arg = args[1] if len(args) > 1 else "en"
+        await phase_c_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
+        
+    # === 통합된 제거 확인 명령 ===
+    elif command == "check_removal_status":
+        await check_removal_status_workflow(websocket, args[0] if args else "[]")
+    
+    elif command == "force_clean":
+        language_arg = args[1] if len(args) > 1 else "en"
+        await force_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
+    elif command == "open_uninstall_ui":
+        await open_uninstall_ui_workflow(websocket, args[0] if args else "")
+    elif command == "generate_final_report":
+        language_arg = args[1] if len(args) > 1 else "en"
+        await generate_final_report_workflow(websocket, args[0] if args else "[]", language=language_arg)
+    
+    elif command == "save_ignore_list":
+        await save_ignore_list_workflow(websocket, args[0] if args else "[]")
+    elif command == "add_item_to_db":
+        await add_item_to_db_workflow(websocket, args[0] if args else "")
+    elif command == "get_llm_metrics":
+        await get_llm_metrics_workflow(websocket)
+    else:
+        logging.error(f"알 수 없는 명령 '{command}' 수신됨.")
+        await emit_error(websocket, f"알 수 없는 명령: {command}")
+
 async def handler(websocket):
     """클라이언트와의 WebSocket 통신을 담당하는 메인 핸들러"""
     connection_id = id(websocket)
@@ -655,49 +719,9 @@ async def handler(websocket):
                 command = data.get("command")
                 args = data.get("args", [])
                
-                # 클라이언트에서 받은 명령에 따라 워크플로우 실행
-                if command == "update_db":
-                    await generate_queries_workflow(websocket, args[0], args[1])
-                elif command == "confirm_db_update":
-                    await confirm_db_update_workflow(websocket, args[0])
-                elif command == "view_db":
-                    await view_db_workflow(websocket)
-                elif command == "scan":
-                    ignored_list = args[0] if args else "[]"
-                    risk_thresh = int(args[1]) if len(args) > 1 else 6
-                    await scan_pc_workflow(websocket, ignored_list, risk_thresh)
- 
-                # === Phase 시스템 명령들 ===
-                elif command == "phase_a_clean":
-                    language_arg = args[1] if len(args) > 1 else "en"
-                    await phase_a_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
-                elif command == "phase_b_clean":
-                    language_arg = args[1] if len(args) > 1 else "en"
-                    await phase_b_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
-                elif command == "phase_c_clean":
-                    language_arg = args[1] if len(args) > 1 else "en"
-                    await phase_c_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
-                    
-                # === 통합된 제거 확인 명령 ===
-                elif command == "check_removal_status":
-                    await check_removal_status_workflow(websocket, args[0] if args else "[]")
-                
-                elif command == "force_clean":
-                    language_arg = args[1] if len(args) > 1 else "en"
-                    await force_clean_workflow(websocket, args[0] if args else "[]", language=language_arg)
-                elif command == "open_uninstall_ui":
-                    await open_uninstall_ui_workflow(websocket, args[0] if args else "")
-                elif command == "generate_final_report":
-                    language_arg = args[1] if len(args) > 1 else "en"
-                    await generate_final_report_workflow(websocket, args[0] if args else "[]", language=language_arg)
-                
-                elif command == "save_ignore_list":
-                    await save_ignore_list_workflow(websocket, args[0] if args else "[]")
-                elif command == "add_item_to_db":
-                    await add_item_to_db_workflow(websocket, args[0] if args else "")
-                else:
-                    logging.error(f"알 수 없는 명령 '{command}' 수신됨.")
-                    await emit_error(websocket, f"알 수 없는 명령: {command}")
+                # 클라이언트에서 받은 명령에 따라 워크플로우 실행 (명령 단위로 LLM 사용량 집계)
+                with llm_metrics.track_run(command or "unknown"):
+                    await dispatch_command(websocket, command, args)
 
             except json.JSONDecodeError:
                 logging.error(f"잘못된 JSON 형식 수신: {message}")
@@ -717,6 +741,19 @@ async def handler(websocket):
             logging.info(f"[CACHE] Cleared cache for connection {connection_id}")
 
 
+async def enrichment_worker():
+    """지연 보강 모드: 스캔에서 자주 탐지된 항목부터 Phase 2 메타데이터 보강을 백그라운드에서 수행"""
+    collector = ThreatIntelligenceCollector()
+    while True:
+        await asyncio.sleep(ENRICHMENT_INTERVAL_SECONDS)
+        try:
+            with llm_metrics.track_run("background_enrichment"):
+                enriched = await collector.enrich_pending_threats()
+            if enriched:
+                logging.info(f"Background enrichment: {enriched} entries enriched.")
+        except Exception as e:
+            logging.error(f"Background enrichment failed: {e}")
+
 async def main():
     """Grayhound WebSocket 서버를 시작합니다."""
     # Optimizer.py가 별도로 실행되고 있다고 가정
@@ -724,9 +761,12 @@ async def main():
     host = "localhost"
     port = 8765  # 클라이언트가 접속할 포트
     global server # 전역 변수로 서버 인스턴스 저장
+    enrichment_task = None
     try:
         server = await websockets.serve(handler, host, port)
         logging.info(f"🛡️ Grayhound 메인 서버가 ws://{host}:{port} 에서 대기 중...")
+        if LAZY_ENRICHMENT:
+            enrichment_task = asyncio.create_task(enrichment_worker())
         await asyncio.Future()  # 서버를 계속 실행
     except Exception as e:
         logging.error(f"서버 시작 중 오류 발생: {e}")
@@ -734,6 +774,13 @@ async def main():
             await server.close()
             await server.wait_closed()
         sys.exit(1)
+    finally:
+        if enrichment_task:
+            enrichment_task.cancel()
+        # LLM 클라이언트와 크롤러의 커넥션 풀 정리
+        await google_ai_client.aclose_client()
+        await GoogleSearch_Grayhound.aclose_crawler()
+        GoogleSearch_Grayhound.shutdown_parse_pool()
 
 if __name__ == "__main__":
     if sys.platform == "win32" and sys.version_info >= (3, 8):
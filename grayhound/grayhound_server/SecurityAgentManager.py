@@ -9,8 +9,10 @@ from typing import List, Dict, Any, Optional
 # 다른 모듈에서 필요한 클래스 및 함수 임포트
 import database
 from agent_client import OptimizerAgentClient
-from google_ai_client import generate_text
-from utils import mask_name, mask_name_for_guide, enhanced_mask_name
+from google_ai_client import agenerate_text, LLMError
+from llm_scheduler import PRIORITY_REPORT
+from llm_metrics import TAG_FEEDBACK
+from utils import mask_name, mask_name_for_guide, enhanced_mask_name, is_protected_program
 
 # ✅ 로깅 설정: 모든 레벨의 로그가 출력
 logger = logging.getLogger(__name__)
@@ -80,42 +82,7 @@ class SecurityAgentManager:
 
     def _is_protected_program(self, program_name: str, publisher: str = "") -> bool:
         """필수/보호 프로그램인지 확인"""
-        program_lower = program_name.lower()
-        publisher_lower = publisher.lower() if publisher else ""
-        
-        # 보호된 게시자 목록 (확장)
-        protected_publishers = {
-            "microsoft corporation", "microsoft", "nvidia corporation", "nvidia", 
-            "intel corporation", "intel", "amd", "advanced micro devices, inc.", 
-            "google llc", "google inc.", "apple inc.", "apple",
-            "realtek semiconductor corp.", "realtek"
-        }
-        
-        # 보호된 프로그램 패턴
-        protected_patterns = [
-            r'microsoft visual c\+\+',
-            r'nvidia geforce',
-            r'nvidia control panel',
-            r'intel\s+(graphics|hd|uhd)',
-            r'amd radeon',
-            r'windows\s+(defender|security)',
-            r'directx',
-            r'\.net framework',
-            r'visual studio',
-            r'runtime',
-            r'redistributable'
-        ]
-        
-        # 게시자로 보호 여부 확인
-        if publisher_lower and any(pub in publisher_lower for pub in protected_publishers):
-            return True
-        
-        # 프로그램명 패턴으로 보호 여부 확인
-        for pattern in protected_patterns:
-            if re.search(pattern, program_lower):
-                return True
-        
-        return False
+        return is_protected_program(program_name, publisher)
 
     def _enhanced_threat_matching(self, program_name: str, threat_data: Dict[str, Any]) -> tuple[bool, str]:
         """Enhanced 위협 매칭 로직 - 브랜드 키워드 기반 매칭 포함"""
@@ -368,6 +335,14 @@ class SecurityAgentManager:
             logging.info(f"[{self.session_id}] Enhanced threat analysis started (Risk Threshold: {risk_threshold}, Brand Matching: Enabled)...")
             found_threats = self._analyze_threats(system_profile, threat_db, final_ignore_list, risk_threshold)
             logging.info(f"[{self.session_id}] Enhanced threat analysis completed. Found {len(found_threats)} potential threats.")
+
+            # Phase 2 보강이 보류된 항목이 탐지되면 보강 우선순위를 높임
+            pending_names = {
+                t["detection_context"]["matched_threat"].get("program_name")
+                for t in found_threats if t["detection_context"]["matched_threat"].get("pending_enrichment")
+            }
+            if pending_names:
+                await database.async_increment_enrichment_hits(list(pending_names))
            
             return {"threats": found_threats}
         
@@ -468,9 +443,13 @@ class SecurityAgentManager:
         prompt = prompts.get(language, prompts['en'])
         
         # Google AI 클라이언트 호출
-        feedback = generate_text(prompt, temperature=0.5)
+        try:
+            feedback = await agenerate_text(prompt, temperature=0.5, use_cache=False, priority=PRIORITY_REPORT, tag=TAG_FEEDBACK)
+        except LLMError as e:
+            logging.error(f"LLM feedback generation failed: {type(e).__name__}: {e}")
+            feedback = None
         
-        if "An error occurred" in feedback:
+        if feedback is None:
             default_messages = {
                 'ko': f"Phase A 완료! {len(successful_items)}개 프로그램이 제거되었습니다." + (f" {len(failed_items)}개 항목은 추가 단계가 필요합니다." if failed_items else ""),
                 'en': f"Phase A complete! {len(successful_items)} programs removed." + (f" {len(failed_items)} items need additional steps." if failed_items else ""),
@@ -586,9 +565,13 @@ class SecurityAgentManager:
         prompt = prompts.get(language, prompts['en'])
         
         # Google AI 클라이언트 호출
-        feedback = generate_text(prompt, temperature=0.5)
+        try:
+            feedback = await agenerate_text(prompt, temperature=0.5, use_cache=False, priority=PRIORITY_REPORT, tag=TAG_FEEDBACK)
+        except LLMError as e:
+            logging.error(f"LLM feedback generation failed: {type(e).__name__}: {e}")
+            feedback = None
         
-        if "An error occurred" in feedback:
+        if feedback is None:
             total_success = len(phase_a_success) + len(phase_b_success) + len(phase_c_success)
             default_messages = {
                 'ko': f"최적화 완료! 총 {total_success}개 프로그램이 제거되었습니다. PC가 더욱 깨끗해졌습니다!",
@@ -663,9 +646,13 @@ class SecurityAgentManager:
         prompt = prompts.get(language, prompts['en']) # 기본값은 영어
         
         # Google AI 클라이언트 호출
-        feedback = generate_text(prompt, temperature=0.5)
+        try:
+            feedback = await agenerate_text(prompt, temperature=0.5, use_cache=False, priority=PRIORITY_REPORT, tag=TAG_FEEDBACK)
+        except LLMError as e:
+            logging.error(f"LLM feedback generation failed: {type(e).__name__}: {e}")
+            feedback = None
         
-        if "An error occurred" in feedback:
+        if feedback is None:
             # 기본 대체 메시지도 언어에 맞게 수정
             default_messages = {
                 'ko': "최적화를 완료했습니다! 이제 PC를 더 쾌적하게 사용할 수 있습니다.",
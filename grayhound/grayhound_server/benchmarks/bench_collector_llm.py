@@ -0,0 +1,134 @@
+# benchmarks/bench_collector_llm.py
+# Grayhound collector LLM pipeline benchmark using the local stand-in backend (no API key, search or MongoDB writes)
+#
+# 사용 예:
+#   python benchmarks/bench_collector_llm.py --candidates 200 --latency-ms 800 --jitter-ms 400 --error-rate 0.05
+#   python benchmarks/bench_collector_llm.py --concurrency 8 --rpm 0 --parallel-batches 4
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+# google_ai_client가 import될 때 백엔드가 결정되므로 가장 먼저 설정
+os.environ.setdefault('GRAYHOUND_LLM_BACKEND', 'standin')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google_ai_client
+import llm_metrics
+from llm_backends import LocalStandInBackend
+from llm_scheduler import LLMScheduler
+from google_ai_client import LLMCircuitOpenError
+from secure_agent.ThreatIntelligenceCollector import ThreatIntelligenceCollector
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure collector LLM throughput against the local stand-in backend.")
+    parser.add_argument('--candidates', type=int, default=64, help="number of synthetic candidates to evaluate")
+    parser.add_argument('--pages', type=int, default=20, help="number of synthetic pages for the extraction stage")
+    parser.add_argument('--batch-size', type=int, default=8, help="Phase 1 batch size")
+    parser.add_argument('--parallel-batches', type=int, default=1, help="Phase 1 batches evaluated at the same time")
+    parser.add_argument('--phase2-ratio', type=float, default=1.0, help="share of bloatware results that are enhanced (0~1)")
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--jitter-ms', type=float, default=400)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=4, help="scheduler max concurrency")
+    parser.add_argument('--rpm', type=float, default=0, help="scheduler requests per minute (0 = unlimited)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="print the full result as JSON")
+    return parser.parse_args()
+
+def synthetic_pages(count: int) -> list:
+    """후보 추출 단계용 가짜 커뮤니티 글"""
+    return [
+        f"Thread {i}: I removed Sample Toolbar {i % 7} and Demo Updater {i % 5} from my laptop. "
+        f"Also Trial Cleaner {i % 3} kept popping up after every boot, so I uninstalled it." * 3
+        for i in range(count)
+    ]
+
+async def run(args: argparse.Namespace) -> dict:
+    google_ai_client.set_backend(LocalStandInBackend(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+    ))
+    google_ai_client.scheduler = LLMScheduler(max_concurrency=args.concurrency, requests_per_minute=args.rpm)
+    google_ai_client.response_cache = None
+    collector = ThreatIntelligenceCollector()
+
+    with llm_metrics.track_run("benchmark") as usage:
+        started = time.monotonic()
+
+        # 1. 후보 추출 (청크 map-reduce)
+        extracted = await collector._extract_program_candidates(synthetic_pages(args.pages))
+        extraction_seconds = time.monotonic() - started
+
+        # 2. Phase 1 배치 평가 + Phase 2 보강
+        names = [f"Benchmark Program {i}" for i in range(args.candidates)]
+        batches = [names[i:i + args.batch_size] for i in range(0, len(names), args.batch_size)]
+        semaphore = asyncio.Semaphore(max(1, args.parallel_batches))
+        evaluated, enhanced, unevaluated = 0, 0, 0
+
+        async def evaluate(batch):
+            nonlocal evaluated, enhanced, unevaluated
+            async with semaphore:
+                try:
+                    results, llm_failed = await collector._evaluate_phase1_batch(batch)
+                except LLMCircuitOpenError:
+                    unevaluated += len(batch)
+                    return
+                unevaluated += len(llm_failed)
+                positives = [data for data in results.values() if data and data.get("risk_score", 0) >= 4]
+                evaluated += sum(1 for data in results.values() if data)
+                targets = positives[:int(len(positives) * args.phase2_ratio)]
+                await asyncio.gather(*(collector._enhance_threat_metadata(data) for data in targets))
+                enhanced += len(targets)
+
+        phase_started = time.monotonic()
+        await asyncio.gather(*(evaluate(batch) for batch in batches))
+        evaluation_seconds = time.monotonic() - phase_started
+        total_seconds = time.monotonic() - started
+
+    return {
+        "settings": vars(args),
+        "extraction": {"candidates": len(extracted), "seconds": round(extraction_seconds, 2)},
+        "evaluation": {
+            "candidates": args.candidates,
+            "evaluated": evaluated,
+            "enhanced": enhanced,
+            "unevaluated": unevaluated,
+            "seconds": round(evaluation_seconds, 2),
+            "candidates_per_second": round(args.candidates / evaluation_seconds, 2) if evaluation_seconds else None,
+        },
+        "total_seconds": round(total_seconds, 2),
+        "llm_usage": usage.summary(),
+        "llm_usage_line": usage.format_summary(),
+        "client": google_ai_client.get_client_stats(),
+    }
+
+def main():
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+
+    evaluation = result["evaluation"]
+    client = result["client"]
+    print(f"Extraction : {result['extraction']['candidates']} candidates from {args.pages} pages in {result['extraction']['seconds']}s")
+    print(f"Evaluation : {evaluation['evaluated']}/{evaluation['candidates']} evaluated, {evaluation['enhanced']} enhanced, "
+          f"{evaluation['unevaluated']} left in {evaluation['seconds']}s ({evaluation['candidates_per_second']} candidates/s)")
+    print(f"LLM calls  : {client['calls']} (retries {client['retries']}, failures {client['failures']}, circuit {client['circuit_state']})")
+    for name, stats in client["scheduler"]["classes"].items():
+        if stats["granted"]:
+            print(f"Scheduler  : {name}: {stats['granted']} granted, avg wait {stats['avg_wait_seconds']}s")
+    print(f"Usage      : {result['llm_usage_line']}")
+    for tag, stats in result["llm_usage"]["by_tag"].items():
+        print(f"  {tag:<12} calls {stats['calls']:>4}  tokens {stats['prompt_tokens'] + stats['response_tokens']:>8,}  latency {stats['latency_seconds']:>7.1f}s  retries {stats['retries']}")
+    print(f"Total      : {result['total_seconds']}s")
+
+if __name__ == "__main__":
+    main()
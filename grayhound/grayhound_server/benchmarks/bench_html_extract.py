@@ -0,0 +1,184 @@
+# benchmarks/bench_html_extract.py
+# Grayhound page extraction benchmark on a saved corpus of HTML pages (no network access while measuring)
+#
+# 사용 예:
+#   python benchmarks/bench_html_extract.py --save-from urls.txt --corpus corpus/   # URL 목록의 페이지를 코퍼스로 저장
+#   python benchmarks/bench_html_extract.py --corpus corpus/ --repeat 5
+#   python benchmarks/bench_html_extract.py --corpus corpus/ --synthetic 200        # 네트워크 없이 가짜 페이지로 코퍼스 생성
+#   python benchmarks/bench_html_extract.py --corpus corpus/ --workers 8            # 스레드 풀과 프로세스 풀(parse_mode)의 처리량 비교
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_extractor
+from charset_normalizer import from_bytes
+
+INDEX_FILE = "index.json"  # 저장된 파일 → {url, content_type}
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure HTML-to-text extraction throughput on a saved corpus of pages.")
+    parser.add_argument('--corpus', required=True, help="directory of saved pages (*.html)")
+    parser.add_argument('--save-from', metavar='URLS_FILE', help="fetch the URLs listed in this file (one per line) into the corpus first")
+    parser.add_argument('--synthetic', type=int, default=0, help="write this many synthetic pages into the corpus first")
+    parser.add_argument('--repeat', type=int, default=3, help="passes over the corpus per engine")
+    parser.add_argument('--workers', type=int, default=0, help="also compare thread and process pools with this many workers")
+    parser.add_argument('--json', action='store_true', help="print the full result as JSON")
+    return parser.parse_args()
+
+def save_corpus(urls_file: str, corpus: str):
+    """URL 목록의 페이지 본문을 그대로(크기 제한 없이) 코퍼스 디렉터리에 저장"""
+    import GoogleSearch_Grayhound
+
+    with open(urls_file, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    index = _load_index(corpus)
+    for url in urls:
+        try:
+            response = GoogleSearch_Grayhound._fetch_session.get(url, timeout=10)
+            response.raise_for_status()
+        except Exception as e:
+            logging.warning(f"Skipping {url}: {e}")
+            continue
+        name = f"page_{len(index):04d}.html"
+        with open(os.path.join(corpus, name), 'wb') as f:
+            f.write(response.content)
+        index[name] = {"url": url, "content_type": response.headers.get('Content-Type')}
+    _write_index(corpus, index)
+    print(f"Saved {len(index)} pages to {corpus}")
+
+def write_synthetic_corpus(count: int, corpus: str):
+    """네트워크 없이 실행할 수 있도록 커뮤니티 글 형태의 가짜 페이지를 생성 (일부는 헤더 없이 meta로만 인코딩 선언)"""
+    index = _load_index(corpus)
+    for i in range(count):
+        comments = "".join(
+            f"<div class='comment'><p>Reply {j}: uninstall Sample Toolbar {j % 7} and Demo Updater {i % 5}, "
+            f"they slow down boot. 업데이트 도구 {j}는 삭제해도 됩니다.</p><span>{j} points</span></div>"
+            for j in range(60)
+        )
+        html = (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Thread {i}</title>"
+                f"<style>.comment {{ margin: 0 }}</style><script>var page = {i};</script></head>"
+                f"<body><nav><a href='/'>Home</a></nav><header>Forum</header>"
+                f"<main><h1>Thread {i}</h1>{comments}</main><footer>footer</footer></body></html>")
+        name = f"synthetic_{i:04d}.html"
+        with open(os.path.join(corpus, name), 'wb') as f:
+            f.write(html.encode('utf-8'))
+        index[name] = {"url": None, "content_type": "text/html" if i % 2 else None}
+    _write_index(corpus, index)
+
+def _load_index(corpus: str) -> dict:
+    path = os.path.join(corpus, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_index(corpus: str, index: dict):
+    with open(os.path.join(corpus, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+
+def load_corpus(corpus: str) -> list:
+    """(파일 이름, 본문 bytes, Content-Type) 목록"""
+    index = _load_index(corpus)
+    pages = []
+    for name in sorted(os.listdir(corpus)):
+        if name == INDEX_FILE or not os.path.isfile(os.path.join(corpus, name)):
+            continue
+        with open(os.path.join(corpus, name), 'rb') as f:
+            pages.append((name, f.read(), index.get(name, {}).get("content_type")))
+    return pages
+
+def legacy_extract(content: bytes, content_type) -> str:
+    """이전 방식: 본문 전체에 대한 인코딩 추정(apparent_encoding) + html.parser"""
+    best = from_bytes(content).best()
+    html = str(best) if best is not None else content.decode('utf-8', errors='replace')
+    return html_extractor._soup_to_text(html)
+
+def engines() -> dict:
+    result = {
+        "legacy (full-body detection + html.parser)": legacy_extract,
+        "html.parser": lambda content, content_type: html_extractor.extract_text(content, content_type, html_extractor.PARSER_HTML),
+    }
+    if html_extractor.LXML_AVAILABLE:
+        result["lxml"] = lambda content, content_type: html_extractor.extract_text(content, content_type, html_extractor.PARSER_LXML)
+    return result
+
+def run(pages: list, repeat: int) -> dict:
+    total_bytes = sum(len(content) for _, content, _ in pages)
+    results = {}
+    for name, extract in engines().items():
+        chars = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            chars = sum(len(extract(content, content_type)) for _, content, content_type in pages)
+        seconds = time.perf_counter() - started
+        results[name] = {
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(len(pages) * repeat / seconds, 1) if seconds else None,
+            "mb_per_second": round(total_bytes * repeat / seconds / 1e6, 2) if seconds else None,
+            "text_chars": chars,
+        }
+    return {"pages": len(pages), "bytes": total_bytes, "repeat": repeat, "engines": results}
+
+def run_pools(pages: list, repeat: int, workers: int) -> dict:
+    """같은 작업자 수의 스레드 풀과 프로세스 풀에서 기본 파서로 코퍼스를 처리 (parse_mode = thread / process)"""
+    contents = [content for _, content, _ in pages]
+    content_types = [content_type for _, _, content_type in pages]
+    total_bytes = sum(len(content) for content in contents)
+    results = {}
+    for name, executor_class in (("thread pool", ThreadPoolExecutor), ("process pool", ProcessPoolExecutor)):
+        with executor_class(max_workers=workers) as pool:
+            # 작업 프로세스 기동 시간은 측정에서 제외
+            list(pool.map(html_extractor.extract_text, contents[:workers], content_types[:workers]))
+            started = time.perf_counter()
+            for _ in range(repeat):
+                chars = sum(len(text) for text in pool.map(html_extractor.extract_text, contents, content_types))
+            seconds = time.perf_counter() - started
+        results[name] = {
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(len(pages) * repeat / seconds, 1) if seconds else None,
+            "mb_per_second": round(total_bytes * repeat / seconds / 1e6, 2) if seconds else None,
+            "text_chars": chars,
+        }
+    return {"workers": workers, "cpu_count": os.cpu_count(), "parser": html_extractor.DEFAULT_PARSER, "pools": results}
+
+def main():
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    os.makedirs(args.corpus, exist_ok=True)
+    if args.save_from:
+        save_corpus(args.save_from, args.corpus)
+    if args.synthetic:
+        write_synthetic_corpus(args.synthetic, args.corpus)
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        sys.exit(f"No pages found in {args.corpus}. Use --save-from or --synthetic to build a corpus.")
+    result = run(pages, max(1, args.repeat))
+    if args.workers:
+        result["pools"] = run_pools(pages, max(1, args.repeat), args.workers)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Corpus     : {result['pages']} pages, {result['bytes'] / 1e6:.1f} MB, {result['repeat']} passes per engine")
+    if not html_extractor.LXML_AVAILABLE:
+        print("Note       : lxml is not installed, only the html.parser engines are measured")
+    for name, stats in result["engines"].items():
+        print(f"  {name:<44} {stats['pages_per_second']:>8} pages/s  {stats['mb_per_second']:>6} MB/s  "
+              f"{stats['text_chars']:>10,} chars  ({stats['seconds']}s)")
+    if "pools" in result:
+        pools = result["pools"]
+        print(f"Pools      : {pools['workers']} workers, {pools['parser']} parser, {pools['cpu_count']} CPUs")
+        for name, stats in pools["pools"].items():
+            print(f"  {name:<44} {stats['pages_per_second']:>8} pages/s  {stats['mb_per_second']:>6} MB/s  "
+                  f"{stats['text_chars']:>10,} chars  ({stats['seconds']}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# cache_store.py
+# Grayhound's SQLite-backed on-disk cache (TTL + size-bounded LRU eviction + hit/miss stats)
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# 캐시 파일의 기본 저장 위치
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+def make_cache_key(*parts: Any) -> str:
+    """임의의 JSON 직렬화 가능한 값들로부터 내용 기반(content-addressed) 캐시 키를 생성"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class DiskCache:
+    """
+    SQLite 파일 하나에 값을 저장하는 디스크 캐시.
+    - 항목마다 TTL을 가지며, 만료된 항목은 조회 시점에 삭제
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은(LRU) 항목부터 제거
+    - 적중/미스/제거 횟수를 집계하여 stats()로 제공
+    """
+
+    def __init__(self, name: str, max_bytes: int = 50 * 1024 * 1024, default_ttl: float = 7 * 24 * 3600, cache_dir: str = CACHE_DIR):
+        """
+        Args:
+            name (str): 캐시 이름 (파일명으로 사용)
+            max_bytes (int): 저장된 값의 총 크기 상한 (바이트)
+            default_ttl (float): set() 호출 시 ttl을 생략했을 때 사용할 기본 TTL (초)
+            cache_dir (str): 캐시 파일을 저장할 디렉터리
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{name}.sqlite3")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """키에 해당하는 값을 반환. 없거나 만료되었으면 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """값을 저장하고, 용량 상한을 넘으면 LRU 순서로 오래된 항목을 제거"""
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode('utf-8'))
+        if size > self.max_bytes:
+            logging.warning(f"[{self.name}] Value of {size} bytes exceeds the cache size limit. Not cached.")
+            return
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, serialized, size, now, expires_at, now)
+            )
+            self._evict_if_needed()
+
+    def delete(self, key: str):
+        """키에 해당하는 항목을 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        """모든 항목을 삭제하고 통계를 초기화"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self.hits = self.misses = self.evictions = 0
+
+    def _evict_if_needed(self):
+        """(lock 보유 상태에서 호출) 만료 항목을 먼저 지우고, 그래도 상한을 넘으면 LRU 순서로 제거"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중률 및 용량 통계를 반환"""
+        with self._lock:
+            entries, size_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -6,8 +6,10 @@ import logging
 import configparser
 import os
 import re
+import uuid
+from datetime import datetime, timedelta, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import UpdateOne
+from pymongo import ReturnDocument, UpdateOne
 
 # --- 로깅 설정 ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -27,6 +29,10 @@ try:
     async_db = async_client[dbname]
     threat_collection = async_db.threat_intelligence
     user_pref_collection = async_db.user_preferences
+    verdict_collection = async_db.verdict_cache
+    job_collection = async_db.collector_jobs
+    job_item_collection = async_db.collector_job_items
+    query_cache_collection = async_db.query_cache
     logging.info("Successfully connected to MongoDB Atlas.")
 except Exception as e:
     logging.error(f"Failed to read MongoDB configuration file or connect to MongoDB: {e}")
@@ -132,6 +138,280 @@ async def async_update_threats(threat_data_list: list):
     except Exception as e:
         logging.error(f"DB 업데이트 중 오류 발생: {e}")
     
+async def async_add_alternative_names(names_by_program: dict[str, list[str]]):
+    """
+    기존 위협 항목의 alternative_names에 새 변형 이름을 추가 (이미 있는 이름은 무시).
+    """
+    if not async_client or not names_by_program:
+        return
+
+    operations = [
+        UpdateOne({'program_name': program_name}, {'$addToSet': {'alternative_names': {'$each': names}}})
+        for program_name, names in names_by_program.items() if names
+    ]
+    if not operations:
+        return
+
+    try:
+        result = await threat_collection.bulk_write(operations)
+        logging.info(f"Alternative names added. Modified entries: {result.modified_count}")
+    except Exception as e:
+        logging.error(f"Failed to add alternative names: {e}")
+
+async def async_increment_enrichment_hits(program_names: list[str]):
+    """
+    스캔에서 탐지된 항목 중 Phase 2 보강이 보류된 항목의 탐지 횟수(enrichment_hits)를 1 증가.
+    """
+    if not async_client or not program_names:
+        return
+    try:
+        await threat_collection.update_many(
+            {'program_name': {'$in': list(program_names)}, 'pending_enrichment': True},
+            {'$inc': {'enrichment_hits': 1}}
+        )
+    except Exception as e:
+        logging.error(f"Failed to update enrichment hits: {e}")
+
+async def async_get_pending_enrichment(limit: int) -> list:
+    """
+    Phase 2 보강이 보류된 항목을 탐지 횟수가 많은 순으로 최대 limit개 반환.
+    """
+    if not async_client: return []
+    try:
+        cursor = threat_collection.find({'pending_enrichment': True}, {'_id': 0}).sort('enrichment_hits', -1).limit(limit)
+        return [threat async for threat in cursor]
+    except Exception as e:
+        logging.error(f"Failed to fetch entries pending enrichment: {e}")
+        return []
+
+# --- LLM 평가 결과(verdict) 캐시 관리 함수 ---
+
+_verdict_indexes_ready = False
+
+async def _ensure_verdict_indexes():
+    """verdict_cache 컬렉션의 고유 키 인덱스와 TTL 인덱스를 한 번만 생성"""
+    global _verdict_indexes_ready
+    if _verdict_indexes_ready:
+        return
+    try:
+        await verdict_collection.create_index("key", unique=True)
+        # expires_at 시각이 지나면 MongoDB가 문서를 자동으로 삭제
+        await verdict_collection.create_index("expires_at", expireAfterSeconds=0)
+        _verdict_indexes_ready = True
+    except Exception as e:
+        logging.error(f"Failed to create verdict cache indexes: {e}")
+
+async def async_get_verdicts(keys: list[str], model: str, prompt_versions: list[str]) -> dict:
+    """
+    정규화된 후보명 목록에 대해 만료되지 않은 verdict를 조회.
+    현재 모델과 허용된 프롬프트 버전으로 생성된 verdict만 반환 (key -> verdict 문서).
+    """
+    if not async_client or not keys: return {}
+    try:
+        cursor = verdict_collection.find(
+            {
+                'key': {'$in': list(set(keys))},
+                'model': model,
+                'prompt_version': {'$in': prompt_versions},
+                'expires_at': {'$gt': datetime.now(timezone.utc)},
+            },
+            {'_id': 0}
+        )
+        return {verdict['key']: verdict async for verdict in cursor}
+    except Exception as e:
+        logging.error(f"Failed to fetch verdicts from MongoDB: {e}")
+        return {}
+
+async def async_save_verdicts(verdicts: list[dict]):
+    """
+    후보별 verdict(positive/negative)를 저장.
+    각 항목은 key, program_name, verdict, risk_score, model, prompt_version, ttl_seconds를 포함.
+    """
+    if not async_client or not verdicts: return
+    await _ensure_verdict_indexes()
+
+    now = datetime.now(timezone.utc)
+    operations = []
+    for item in verdicts:
+        document = {k: v for k, v in item.items() if k != 'ttl_seconds'}
+        document['evaluated_at'] = now
+        document['expires_at'] = now + timedelta(seconds=item.get('ttl_seconds', 0))
+        operations.append(UpdateOne({'key': item['key']}, {'$set': document}, upsert=True))
+
+    try:
+        await verdict_collection.bulk_write(operations)
+        logging.info(f"Saved {len(operations)} verdicts to the verdict cache.")
+    except Exception as e:
+        logging.error(f"Failed to save verdicts to MongoDB: {e}")
+
+# --- 검색 쿼리 생성 결과 캐시 관리 함수 ---
+
+_query_cache_indexes_ready = False
+
+async def _ensure_query_cache_indexes():
+    """query_cache 컬렉션의 고유 키 인덱스와 TTL 인덱스를 한 번만 생성"""
+    global _query_cache_indexes_ready
+    if _query_cache_indexes_ready:
+        return
+    try:
+        await query_cache_collection.create_index("key", unique=True)
+        await query_cache_collection.create_index("expires_at", expireAfterSeconds=0)
+        _query_cache_indexes_ready = True
+    except Exception as e:
+        logging.error(f"Failed to create query cache indexes: {e}")
+
+async def async_get_cached_queries(key: str) -> dict | None:
+    """
+    (국가, OS, 프롬프트 버전) 키에 해당하는 만료되지 않은 쿼리 세트를 반환.
+    """
+    if not async_client: return None
+    try:
+        cached = await query_cache_collection.find_one(
+            {'key': key, 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+            {'_id': 0, 'queries': 1}
+        )
+        return cached['queries'] if cached else None
+    except Exception as e:
+        logging.error(f"Failed to fetch cached queries: {e}")
+        return None
+
+async def async_save_cached_queries(key: str, country: str, os_type: str, prompt_version: str, queries: dict, ttl_seconds: float):
+    """
+    생성된 쿼리 세트를 TTL과 함께 저장 (같은 키가 있으면 덮어씀).
+    """
+    if not async_client: return
+    await _ensure_query_cache_indexes()
+
+    now = datetime.now(timezone.utc)
+    document = {
+        'key': key, 'country': country, 'os_type': os_type, 'prompt_version': prompt_version,
+        'queries': queries, 'generated_at': now, 'expires_at': now + timedelta(seconds=ttl_seconds),
+    }
+    try:
+        await query_cache_collection.update_one({'key': key}, {'$set': document}, upsert=True)
+    except Exception as e:
+        logging.error(f"Failed to save generated queries to the cache: {e}")
+
+# --- 수집 작업(job) 체크포인트 관리 함수 ---
+
+JOB_RETENTION_DAYS = 30  # 작업 기록 보관 기간 (TTL 인덱스로 자동 삭제)
+_job_indexes_ready = False
+
+async def _ensure_job_indexes():
+    """collector_jobs / collector_job_items 컬렉션의 인덱스를 한 번만 생성"""
+    global _job_indexes_ready
+    if _job_indexes_ready:
+        return
+    try:
+        await job_collection.create_index("job_id", unique=True)
+        await job_collection.create_index([("fingerprint", 1), ("status", 1)])
+        await job_collection.create_index("updated_at", expireAfterSeconds=JOB_RETENTION_DAYS * 24 * 3600)
+        await job_item_collection.create_index([("job_id", 1), ("program_name", 1)], unique=True)
+        await job_item_collection.create_index("updated_at", expireAfterSeconds=JOB_RETENTION_DAYS * 24 * 3600)
+        _job_indexes_ready = True
+    except Exception as e:
+        logging.error(f"Failed to create collector job indexes: {e}")
+
+async def async_claim_resumable_job(fingerprint: str, max_age_seconds: float, lease_seconds: float, max_resumes: int) -> dict | None:
+    """
+    같은 fingerprint로 시작되었지만 끝나지 않은 최근 작업을 찾아 running으로 표시(재개 횟수 +1)하고 반환.
+    - 작업의 나이는 created_at 기준 (재개할 때마다 갱신되는 updated_at 기준이면 끝나지 않는 작업이 만료되지 않음)
+    - interrupted 작업과, lease_seconds 동안 체크포인트가 없는 running 작업(비정상 종료된 프로세스)만 대상.
+      다른 프로세스가 진행 중인 작업은 가져가지 않으며, 찾기와 표시를 한 번에 수행하므로 두 프로세스가 같은 작업을 가져가지 않음
+    - 재개 횟수가 max_resumes에 도달한 작업은 abandoned로 표시하고 새로 수집하도록 함
+    """
+    if not async_client: return None
+    now = datetime.now(timezone.utc)
+    unfinished = {
+        'fingerprint': fingerprint,
+        'created_at': {'$gte': now - timedelta(seconds=max_age_seconds)},
+        '$or': [
+            {'status': 'interrupted'},
+            {'status': 'running', 'updated_at': {'$lt': now - timedelta(seconds=lease_seconds)}},
+        ],
+    }
+    try:
+        abandoned = await job_collection.update_many(
+            {**unfinished, 'resume_count': {'$gte': max_resumes}},
+            {'$set': {'status': 'abandoned', 'updated_at': now}}
+        )
+        if abandoned.modified_count:
+            logging.warning(f"Abandoned {abandoned.modified_count} collector jobs that were resumed {max_resumes} times without finishing.")
+        return await job_collection.find_one_and_update(
+            {**unfinished, 'resume_count': {'$not': {'$gte': max_resumes}}},
+            {'$set': {'status': 'running', 'updated_at': now}, '$inc': {'resume_count': 1}},
+            projection={'_id': 0},
+            sort=[('created_at', -1)],
+            return_document=ReturnDocument.AFTER,
+        )
+    except Exception as e:
+        logging.error(f"Failed to claim a resumable collector job: {e}")
+        return None
+
+async def async_create_job(fingerprint: str, program_names: list[str]) -> str | None:
+    """
+    새 수집 작업과 후보 큐(모든 항목 pending)를 생성하고 job_id를 반환.
+    """
+    if not async_client: return None
+    await _ensure_job_indexes()
+
+    job_id = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    try:
+        await job_collection.insert_one({
+            'job_id': job_id, 'fingerprint': fingerprint, 'status': 'running',
+            'total': len(program_names), 'resume_count': 0, 'created_at': now, 'updated_at': now,
+        })
+        if program_names:
+            await job_item_collection.insert_many([
+                {'job_id': job_id, 'program_name': name, 'status': 'pending', 'updated_at': now}
+                for name in program_names
+            ])
+        logging.info(f"Created collector job {job_id} with {len(program_names)} candidates.")
+        return job_id
+    except Exception as e:
+        logging.error(f"Failed to create collector job: {e}")
+        return None
+
+async def async_get_job_items(job_id: str, statuses: list[str]) -> list[str]:
+    """
+    작업의 후보 중 지정된 상태인 항목의 프로그램명을 큐에 넣은 순서대로 반환.
+    """
+    if not async_client or not job_id: return []
+    try:
+        cursor = job_item_collection.find({'job_id': job_id, 'status': {'$in': statuses}}, {'_id': 0, 'program_name': 1}).sort('_id', 1)
+        return [item['program_name'] async for item in cursor]
+    except Exception as e:
+        logging.error(f"Failed to fetch collector job items: {e}")
+        return []
+
+async def async_update_job_items(job_id: str, statuses: dict[str, str]):
+    """
+    후보별 처리 상태(done/skipped 등)를 기록하고 작업의 갱신 시각을 체크포인트로 남김.
+    """
+    if not async_client or not job_id or not statuses: return
+
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne({'job_id': job_id, 'program_name': name}, {'$set': {'status': status, 'updated_at': now}}, upsert=True)
+        for name, status in statuses.items()
+    ]
+    try:
+        await job_item_collection.bulk_write(operations)
+        await job_collection.update_one({'job_id': job_id}, {'$set': {'updated_at': now}})
+    except Exception as e:
+        logging.error(f"Failed to update collector job items: {e}")
+
+async def async_set_job_status(job_id: str, status: str):
+    """
+    작업 상태(running/interrupted/completed/abandoned)를 갱신.
+    """
+    if not async_client or not job_id: return
+    try:
+        await job_collection.update_one({'job_id': job_id}, {'$set': {'status': status, 'updated_at': datetime.now(timezone.utc)}})
+    except Exception as e:
+        logging.error(f"Failed to update collector job status: {e}")
+
 # --- 사용자별 무시 목록 관리 함수 ---
 
 async def async_add_to_ignore_list(user_name: str, item_name: str):
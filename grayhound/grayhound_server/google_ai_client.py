@@ -1,47 +1,213 @@
 # google_ai_client.py
-import requests
+import asyncio
 import configparser
 import logging
 import os
+import random
+import threading
+import time
+
+from cache_store import DiskCache, make_cache_key
+from llm_backends import LLMBackend, create_backend
+from llm_errors import (
+    LLMError, LLMConfigError, LLMRequestError, LLMResponseError, LLMRateLimitError,
+    LLMServerError, LLMTimeoutError, LLMConnectionError, LLMCircuitOpenError,
+)
+from llm_scheduler import LLMScheduler, PRIORITY_BACKGROUND
+from llm_metrics import record_call, estimate_tokens, TAG_UNTAGGED
+from singleflight import SingleFlight
 
 # --- 설정 로드 ---
 config = configparser.ConfigParser()
 config_path = os.path.join(os.path.dirname(__file__), 'config.ini')
 config.read(config_path)
 
-GOOGLE_AI_API_KEY = config.get('GOOGLE_AI', 'API_KEY', fallback=None)
-if not GOOGLE_AI_API_KEY:
-    logging.error("Google AI API key is not set in the config.ini file.")
-    # raise ValueError("Google AI Studio API 키가 필요합니다.") # 또는 프로그램 종료
+# --- LLM 백엔드 ---
+# config.ini의 [LLM_BACKEND] backend = google | standin (또는 환경 변수 GRAYHOUND_LLM_BACKEND)로 선택
+# 재시도/서킷 브레이커/스케줄러/캐시/사용량 집계는 백엔드와 무관하게 이 모듈에서 처리
+backend: LLMBackend = create_backend(config)
+# 캐시 키와 verdict 캐시에 사용되는 모델 이름 (로컬 대체 백엔드의 응답이 실제 모델의 캐시와 섞이지 않음)
+MODEL_NAME = backend.model_name
 
-# Gemma 3 27B 모델의 API 엔드포인트 URL
-API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemma-3-27b-it:generateContent"
+# --- LLM 응답 디스크 캐시 (opt-in) ---
+# config.ini의 [LLM_CACHE] 섹션에서 enabled = true 로 설정해야 활성화
+LLM_CACHE_ENABLED = config.getboolean('LLM_CACHE', 'enabled', fallback=False)
+response_cache = None
+if LLM_CACHE_ENABLED:
+    try:
+        response_cache = DiskCache(
+            'llm_responses',
+            max_bytes=config.getint('LLM_CACHE', 'max_size_mb', fallback=50) * 1024 * 1024,
+            default_ttl=config.getfloat('LLM_CACHE', 'ttl_hours', fallback=72) * 3600,
+        )
+        logging.info(f"LLM response cache enabled: {response_cache.path}")
+    except Exception as e:
+        logging.error(f"Failed to initialize the LLM response cache. Caching is disabled: {e}")
 
-def generate_text(prompt: str, temperature: float = 0.6, top_p: float = 0.9, max_tokens: int = 2048) -> str:
-    """
-    Use the Gemma 3 model of Google AI Studio to generate text.
+DEFAULT_TIMEOUT = 120  # 호출 1회당 기본 제한 시간 (초)
 
-    Args:
-        prompt (str): The prompt to pass to the model.
-        temperature (float): The sampling temperature, the higher the more creative the answer.
-        top_p (float): The Nucleus sampling value.
-        max_tokens (int): The maximum number of tokens to generate.
+def set_backend(new_backend: LLMBackend):
+    """LLM 백엔드를 교체 (벤치마크/부하 테스트용). MODEL_NAME을 가져간 모듈보다 먼저 호출해야 캐시 키가 일치함"""
+    global backend, MODEL_NAME
+    backend = new_backend
+    MODEL_NAME = new_backend.model_name
+    logging.info(f"LLM backend set to '{new_backend.name}' (model: {MODEL_NAME}).")
 
-    Returns:
-        str: The text generated by the model. Return an empty string if an error occurs.
+async def aclose_client():
+    """LLM 백엔드의 커넥션 풀을 정리 (서버 종료 시 호출)"""
+    await backend.aclose()
+
+# --- 프로세스 전역 LLM 요청 스케줄러 (우선순위 + 공유 속도 제한) ---
+scheduler = LLMScheduler(
+    max_concurrency=config.getint('LLM_SCHEDULER', 'max_concurrency', fallback=4),
+    requests_per_minute=config.getfloat('LLM_SCHEDULER', 'requests_per_minute', fallback=30),
+    aging_seconds=config.getfloat('LLM_SCHEDULER', 'aging_seconds', fallback=30),
+)
+
+# 동일한 프롬프트의 동시 요청은 하나의 upstream 호출로 합침
+llm_flights = SingleFlight('llm_requests')
+
+# --- 재시도 / 서킷 브레이커 설정 ---
+MAX_RETRIES = config.getint('GOOGLE_AI', 'max_retries', fallback=3)
+BACKOFF_BASE = config.getfloat('GOOGLE_AI', 'backoff_base_seconds', fallback=1.0)
+BACKOFF_MAX = config.getfloat('GOOGLE_AI', 'backoff_max_seconds', fallback=30.0)
+BREAKER_FAILURE_THRESHOLD = config.getint('GOOGLE_AI', 'breaker_failure_threshold', fallback=5)
+BREAKER_COOLDOWN = config.getfloat('GOOGLE_AI', 'breaker_cooldown_seconds', fallback=60.0)
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold에 도달하면 cooldown 동안 호출을 즉시 실패시키는 서킷 브레이커.
+    cooldown이 지나면 한 번의 시험 호출(half-open)을 허용하고, 성공하면 다시 닫힘.
     """
-    if not GOOGLE_AI_API_KEY:
-        error_msg = "Google AI API key is not set, so LLM cannot be called."
-        logging.error(error_msg)
-        return error_msg
 
-    headers = {
-        'Content-Type': 'application/json',
-    }
-    params = {
-        'key': GOOGLE_AI_API_KEY,
-    }
-    json_data = {
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """호출 전 상태 확인. 열려 있으면 LLMCircuitOpenError 발생"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if self.state == "open" and remaining > 0:
+                raise LLMCircuitOpenError(f"LLM endpoint is unhealthy. Failing fast for another {remaining:.0f}s.")
+            # cooldown 경과: 시험 호출 한 건만 허용
+            if self._probe_in_flight:
+                raise LLMCircuitOpenError("LLM endpoint is being probed after a failure. Failing fast.")
+            self.state = "half_open"
+            self._probe_in_flight = True
+
+    def release_probe(self):
+        """시험 호출이 결과 없이 끝났을 때(취소, LLMError가 아닌 예외) 다음 호출이 다시 시험 호출을 할 수 있도록 해제"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logging.info("LLM circuit breaker closed. Endpoint recovered.")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    _count_stat("circuit_opened")
+                    logging.error(f"LLM circuit breaker opened after {self.consecutive_failures} consecutive failures. Cooling down for {self.cooldown:.0f}s.")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+circuit_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN)
+
+# 호출/재시도 통계 (get_client_stats()로 조회)
+_stats = {
+    "calls": 0,
+    "successes": 0,
+    "failures": 0,
+    "retries": 0,
+    "rate_limited": 0,
+    "circuit_opened": 0,
+    "circuit_rejections": 0,
+}
+# 동기 호출(generate_text)은 여러 작업 스레드에서 실행되므로 통계는 잠금 안에서 갱신
+_stats_lock = threading.Lock()
+
+def _count_stat(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+def get_client_stats() -> dict:
+    """LLM 호출 성공/실패/재시도 횟수와 서킷 브레이커 상태를 반환"""
+    with _stats_lock:
+        counters = dict(_stats)
+    return {**counters, "circuit_state": circuit_breaker.state, "scheduler": scheduler.stats(), "coalescing": llm_flights.stats()}
+
+def _backoff_delay(attempt: int, error: LLMError) -> float:
+    """지수 백오프 + full jitter. Retry-After가 있으면 그 이상 대기"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX))
+    return delay
+
+def _check_circuit(tag: str, started: float, attempt: int):
+    """서킷 브레이커를 확인하고 호출 횟수를 집계 (열려 있으면 거절된 호출도 실패로 사용량에 기록하고 LLMCircuitOpenError)"""
+    try:
+        circuit_breaker.before_call()
+    except LLMCircuitOpenError:
+        _count_stat("circuit_rejections")
+        record_call(tag, latency=time.monotonic() - started, retries=attempt, failed=True)
+        raise
+    _count_stat("calls")
+
+def _record_attempt_failure(error: LLMError, attempt: int) -> bool:
+    """실패를 기록하고, 재시도할지 여부를 반환"""
+    if isinstance(error, LLMRateLimitError):
+        _count_stat("rate_limited")
+    # 요청 자체의 오류(4xx, 응답 형식 오류)는 엔드포인트가 응답한 것이므로 정상으로 간주
+    if error.retryable:
+        circuit_breaker.record_failure()
+    else:
+        circuit_breaker.record_success()
+    if error.retryable and attempt < MAX_RETRIES and circuit_breaker.state == "closed":
+        _count_stat("retries")
+        return True
+    _count_stat("failures")
+    return False
+
+def get_cache_stats() -> dict:
+    """LLM 응답 캐시의 적중/미스 통계를 반환 (캐시 비활성화 시 enabled=False)"""
+    if not response_cache:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+def _to_response_schema(schema: dict) -> dict:
+    """json_utils 형식의 스키마를 generateContent의 responseSchema(OpenAPI 부분집합) 형식으로 변환"""
+    converted = {}
+    for key, value in schema.items():
+        if key == 'type':
+            converted['type'] = value.upper()
+        elif key == 'properties':
+            converted['properties'] = {name: _to_response_schema(sub) for name, sub in value.items()}
+        elif key == 'items':
+            converted['items'] = _to_response_schema(value)
+        elif key in ('required', 'enum', 'description', 'minimum', 'maximum', 'nullable'):
+            converted[key] = value
+    return converted
+
+def _build_request_body(prompt: str, temperature: float, top_p: float, max_tokens: int, response_schema: dict | None = None) -> dict:
+    """generateContent API 요청 본문 생성 (JSON mode를 지원하는 모델이면 response_schema로 출력 형식을 제한)"""
+    body = {
         'contents': [
             {
                 'parts': [
@@ -57,24 +223,170 @@ def generate_text(prompt: str, temperature: float = 0.6, top_p: float = 0.9, max
             'maxOutputTokens': max_tokens,
         },
     }
+    if response_schema and backend.supports_json_mode:
+        body['generationConfig']['responseMimeType'] = 'application/json'
+        body['generationConfig']['responseSchema'] = _to_response_schema(response_schema)
+    return body
+
+def _get_cached_response(prompt: str, json_data: dict, use_cache: bool) -> tuple[str | None, str | None]:
+    """캐시 키와 캐시된 응답을 반환 (캐시를 사용하지 않으면 둘 다 None)"""
+    if not (response_cache and use_cache):
+        return None, None
+    # 동일한 (모델, 프롬프트, 생성 설정) 조합은 캐시된 응답을 재사용
+    cache_key = make_cache_key(MODEL_NAME, prompt, json_data['generationConfig'])
+    cached_text = response_cache.get(cache_key)
+    if cached_text is not None:
+        logging.info(f"LLM response cache hit. prompt (partial): {prompt[:150]}...")
+    return cache_key, cached_text
 
+def _record_success(tag: str, prompt: str, result: dict, generated_text: str, started: float, retries: int):
+    """성공한 호출의 토큰 수(usageMetadata, 없으면 추정값), 지연 시간, 재시도 횟수를 기록"""
+    usage = result.get('usageMetadata') or {}
+    prompt_tokens, response_tokens = usage.get('promptTokenCount'), usage.get('candidatesTokenCount')
+    estimated = not (isinstance(prompt_tokens, int) and isinstance(response_tokens, int))
+    if estimated:
+        prompt_tokens, response_tokens = estimate_tokens(prompt), estimate_tokens(generated_text)
+    record_call(tag, prompt_tokens=prompt_tokens, response_tokens=response_tokens,
+                latency=time.monotonic() - started, retries=retries, estimated=estimated)
+
+def _extract_generated_text(result: dict, cache_key: str | None) -> str:
+    """API 응답에서 생성된 텍스트를 추출하고, 캐시 키가 있으면 캐시에 저장"""
+    # API 응답 구조에 따라 생성된 텍스트 추출
     try:
-        logging.info(f"Google AI Studio API call... prompt (partial): {prompt[:150]}...")
-        response = requests.post(API_URL, params=params, headers=headers, json=json_data, timeout=120)
-        response.raise_for_status()
-
-        result = response.json()
-        # API 응답 구조에 따라 생성된 텍스트 추출
-        generated_text = result['candidates'][0]['content']['parts'][0]['text']
-        logging.info("Google AI Studio API response received.")
-        return generated_text.strip()
-
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Google AI API call failed: {e}")
-        # API 응답 본문 로깅 (에러 디버깅에 유용)
-        if e.response is not None:
-            logging.error(f"API response content: {e.response.text}")
-        return f"An error occurred while calling the API: {e}"
-    except (KeyError, IndexError) as e:
+        generated_text = result['candidates'][0]['content']['parts'][0]['text'].strip()
+    except (KeyError, IndexError, TypeError) as e:
         logging.error(f"API response parsing failed: {e}. Response content: {result}")
-        return f"An error occurred while processing the API response: {e}"
\ No newline at end of file
+        raise LLMResponseError(f"Unexpected API response structure: {e}") from e
+    logging.info(f"LLM API response received ({backend.name}).")
+    if cache_key:
+        response_cache.set(cache_key, generated_text)
+    return generated_text
+
+def generate_text(prompt: str, temperature: float = 0.6, top_p: float = 0.9, max_tokens: int = 2048, use_cache: bool = True, timeout: float = DEFAULT_TIMEOUT, response_schema: dict | None = None, tag: str = TAG_UNTAGGED) -> str:
+    """
+    Use the configured LLM backend (Gemma 3 on Google AI Studio by default) to generate text. (Blocking version for the CLI and worker threads.)
+    Retryable failures (429, 5xx, timeouts, connection errors) are retried with jittered exponential backoff.
+    Token counts, latency and retries of every call are recorded in llm_metrics under the given tag.
+
+    Args:
+        prompt (str): The prompt to pass to the model.
+        temperature (float): The sampling temperature, the higher the more creative the answer.
+        top_p (float): The Nucleus sampling value.
+        max_tokens (int): The maximum number of tokens to generate.
+        use_cache (bool): Whether to use the on-disk response cache (if enabled). Pass False for non-deterministic calls such as feedback reports.
+        timeout (float): The deadline for each attempt in seconds.
+        response_schema (dict | None): Expected JSON shape (json_utils schema). Sent as a JSON-mode response schema when the model supports it.
+        tag (str): Prompt stage used for usage accounting (llm_metrics.TAG_*).
+
+    Returns:
+        str: The text generated by the model.
+
+    Raises:
+        LLMError: A typed subclass describing why the call failed after all retries.
+    """
+    backend.ensure_configured()
+
+    started = time.monotonic()
+    json_data = _build_request_body(prompt, temperature, top_p, max_tokens, response_schema)
+    cache_key, cached_text = _get_cached_response(prompt, json_data, use_cache)
+    if cached_text is not None:
+        record_call(tag, latency=time.monotonic() - started, cached=True)
+        return cached_text
+
+    attempt = 0
+    while True:
+        _check_circuit(tag, started, attempt)
+        try:
+            logging.info(f"LLM API call ({backend.name})... prompt (partial): {prompt[:150]}...")
+            result = backend.generate(json_data, timeout)
+            generated_text = _extract_generated_text(result, cache_key)
+            circuit_breaker.record_success()
+            _count_stat("successes")
+            _record_success(tag, prompt, result, generated_text, started, attempt)
+            return generated_text
+        except LLMError as e:
+            error = e
+        except BaseException:
+            # 시험 호출이 LLMError 없이 끝나도(예상치 못한 예외, 인터럽트) 브레이커가 계속 시험 중 상태로 남지 않도록 해제
+            circuit_breaker.release_probe()
+            raise
+
+        if not _record_attempt_failure(error, attempt):
+            record_call(tag, latency=time.monotonic() - started, retries=attempt, failed=True)
+            raise error
+        delay = _backoff_delay(attempt, error)
+        logging.warning(f"LLM call failed ({type(error).__name__}: {error}). Retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})...")
+        time.sleep(delay)
+        attempt += 1
+
+async def agenerate_text(prompt: str, temperature: float = 0.6, top_p: float = 0.9, max_tokens: int = 2048, use_cache: bool = True, timeout: float = DEFAULT_TIMEOUT, priority: int = PRIORITY_BACKGROUND, response_schema: dict | None = None, tag: str = TAG_UNTAGGED) -> str:
+    """
+    Async version of generate_text. The Google backend uses a pooled keep-alive HTTP client (HTTP/2 where available)
+    so the calling event loop is never blocked. Retries and the circuit breaker behave the same as generate_text.
+    Every attempt goes through the process-wide scheduler, so interactive calls overtake queued background calls.
+    Concurrent calls with an identical (model, prompt, generation config, priority) share a single upstream request.
+
+    Args:
+        prompt (str): The prompt to pass to the model.
+        temperature (float): The sampling temperature, the higher the more creative the answer.
+        top_p (float): The Nucleus sampling value.
+        max_tokens (int): The maximum number of tokens to generate.
+        use_cache (bool): Whether to use the on-disk response cache (if enabled).
+        timeout (float): The deadline for each attempt in seconds.
+        priority (int): Scheduler priority class (llm_scheduler.PRIORITY_INTERACTIVE / PRIORITY_REPORT / PRIORITY_BACKGROUND).
+        response_schema (dict | None): Expected JSON shape (json_utils schema). Sent as a JSON-mode response schema when the model supports it.
+        tag (str): Prompt stage used for usage accounting (llm_metrics.TAG_*). Callers that join an in-flight request are not charged again.
+
+    Returns:
+        str: The text generated by the model.
+
+    Raises:
+        LLMError: A typed subclass describing why the call failed after all retries.
+    """
+    generation_config = _build_request_body(prompt, temperature, top_p, max_tokens, response_schema)['generationConfig']
+    # 우선순위가 다른 호출은 합치지 않음 (interactive 호출이 background 요청에 합류하면 background 우선순위로 스케줄러에서 기다리게 됨)
+    flight_key = make_cache_key(MODEL_NAME, prompt, generation_config, priority)
+    return await llm_flights.do(
+        flight_key,
+        lambda: _agenerate_text(prompt, temperature, top_p, max_tokens, use_cache, timeout, priority, response_schema, tag)
+    )
+
+async def _agenerate_text(prompt: str, temperature: float, top_p: float, max_tokens: int, use_cache: bool, timeout: float, priority: int, response_schema: dict | None = None, tag: str = TAG_UNTAGGED) -> str:
+    """agenerate_text의 실제 구현 (캐시 조회 → 스케줄러 → 재시도 루프). 지연 시간에는 스케줄러 대기 시간도 포함"""
+    backend.ensure_configured()
+
+    started = time.monotonic()
+    json_data = _build_request_body(prompt, temperature, top_p, max_tokens, response_schema)
+    cache_key, cached_text = _get_cached_response(prompt, json_data, use_cache)
+    if cached_text is not None:
+        record_call(tag, latency=time.monotonic() - started, cached=True)
+        return cached_text
+
+    attempt = 0
+    while True:
+        async with scheduler.slot(priority):
+            # 대기하는 동안 브레이커가 열렸을 수 있으므로 슬롯을 얻은 뒤 확인
+            _check_circuit(tag, started, attempt)
+            try:
+                logging.info(f"LLM async API call ({backend.name})... prompt (partial): {prompt[:150]}...")
+                result = await backend.agenerate(json_data, timeout)
+                generated_text = _extract_generated_text(result, cache_key)
+                circuit_breaker.record_success()
+                _count_stat("successes")
+                _record_success(tag, prompt, result, generated_text, started, attempt)
+                return generated_text
+            except LLMError as e:
+                error = e
+            except BaseException:
+                # 시험 호출이 취소되거나 LLMError가 아닌 예외로 끝나도 브레이커가 계속 시험 중 상태로 남지 않도록 해제
+                circuit_breaker.release_probe()
+                raise
+
+        # 백오프 대기 중에는 슬롯을 반납하여 다른 요청이 진행되도록 함
+        if not _record_attempt_failure(error, attempt):
+            record_call(tag, latency=time.monotonic() - started, retries=attempt, failed=True)
+            raise error
+        delay = _backoff_delay(attempt, error)
+        logging.warning(f"LLM call failed ({type(error).__name__}: {error}). Retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})...")
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,175 @@
+# html_extractor.py
+# Grayhound's HTML-to-text extraction engine (content-type gating, header/meta encoding detection, lxml or BeautifulSoup parsing)
+
+import codecs
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup
+from charset_normalizer import from_bytes
+
+# lxml(C 확장 파서)이 설치되어 있으면 사용하고, 없으면 BeautifulSoup의 html.parser(순수 Python)로 대체
+try:
+    import lxml.etree
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# 추출 규칙이 바뀌면 올려서 이전 규칙으로 추출해 캐시에 저장된 텍스트를 무효화
+EXTRACTOR_VERSION = 2
+
+PARSER_LXML = "lxml"
+PARSER_HTML = "html.parser"
+DEFAULT_PARSER = PARSER_LXML if LXML_AVAILABLE else PARSER_HTML
+
+# 텍스트를 추출할 응답 타입 (그 외의 타입은 본문을 내려받기 전에 거절)
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+TEXT_CONTENT_TYPES = ("text/plain",)
+# 서버가 타입을 모를 때 보내는 값. 본문 앞부분으로 다시 판별
+UNKNOWN_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream")
+
+# Content-Type을 믿을 수 없을 때 본문 앞부분으로 판별하는 바이너리 시그니처 (PDF, ZIP/Office, PNG, GIF, JPEG, gzip, EXE)
+_BINARY_SIGNATURES = (b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"\x1f\x8b", b"MZ")
+SNIFF_BYTES = 1024                # 바이너리 판별에 사용하는 앞부분 크기
+META_PRESCAN_BYTES = 4096         # <meta charset> / XML 선언을 찾는 앞부분 크기
+DETECTION_SAMPLE_BYTES = 65536    # 헤더/meta에 인코딩이 없을 때 charset_normalizer로 분석할 앞부분 크기
+
+REMOVED_TAGS = ('script', 'style', 'header', 'footer', 'aside', 'nav')
+# 이 요소들의 경계에서 줄을 나눔 (문단 단위 중복 제거와 발췌에 사용). 그 외 요소 사이는 공백으로 이어 붙임
+BLOCK_TAGS = ('p', 'div', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'tr', 'table', 'br', 'hr', 'pre', 'blockquote',
+              'section', 'article', 'main', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+# 파싱 중 블록 경계를 표시하는 문자 (사용자 정의 영역 문자라 본문에 나오지 않고, 공백으로 취급되지 않아 strip에 지워지지 않음)
+_BLOCK_MARK = '\ue000'
+
+_CHARSET_PARAM_RE = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+_XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*\?>')
+_XML_ENCODING_RE = re.compile(rb'^\s*<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)', re.I)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+# 웹 페이지가 선언하는 레거시 인코딩 이름을 실제로 브라우저가 사용하는 상위 호환 인코딩으로 대체 (WHATWG Encoding 표준)
+_ENCODING_SUPERSETS = {
+    'ascii': 'cp1252',
+    'iso8859-1': 'cp1252',
+    'euc_kr': 'cp949',
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'shift_jis': 'cp932',
+}
+
+def parse_content_type(header: Optional[str]) -> tuple[str, Optional[str]]:
+    """Content-Type 헤더를 (소문자 MIME 타입, charset)으로 분리"""
+    if not header:
+        return "", None
+    mime, _, params = header.partition(';')
+    match = _CHARSET_PARAM_RE.search(params)
+    return mime.strip().lower(), (match.group(1) if match else None)
+
+def is_extractable(content_type: Optional[str]) -> bool:
+    """응답 헤더만 보고 텍스트를 추출할 대상인지 판별 (PDF, 이미지, 압축 파일 등은 본문을 받기 전에 거절)"""
+    mime, _ = parse_content_type(content_type)
+    return mime in HTML_CONTENT_TYPES or mime in TEXT_CONTENT_TYPES or mime in UNKNOWN_CONTENT_TYPES
+
+def looks_binary(content: bytes) -> bool:
+    """본문 앞부분의 파일 시그니처나 NUL 바이트로 바이너리 여부를 판별 (UTF-16 BOM이 있는 문서는 제외)"""
+    head = content[:SNIFF_BYTES]
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return False
+    return head.lstrip().startswith(_BINARY_SIGNATURES) or b"\x00" in head
+
+def _normalize_encoding(label: Optional[str]) -> Optional[str]:
+    """인코딩 이름을 Python 코덱 이름으로 정규화. 알 수 없는 이름이면 None"""
+    if not label:
+        return None
+    try:
+        name = codecs.lookup(label.strip().strip('"\'')).name
+    except LookupError:
+        return None
+    return _ENCODING_SUPERSETS.get(name, name)
+
+def detect_encoding(content: bytes, content_type: Optional[str] = None) -> str:
+    """
+    본문 전체를 분석하지 않고 인코딩을 결정.
+    BOM → Content-Type 헤더의 charset → 앞부분의 XML 선언/<meta charset> → 앞부분 샘플에 대한 charset_normalizer 추정 → UTF-8 순서
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+
+    encoding = _normalize_encoding(parse_content_type(content_type)[1])
+    if encoding:
+        return encoding
+
+    head = content[:META_PRESCAN_BYTES]
+    match = _XML_ENCODING_RE.match(head) or _META_CHARSET_RE.search(head)
+    encoding = _normalize_encoding(match.group(1).decode('ascii', errors='ignore')) if match else None
+    if encoding:
+        return encoding
+
+    best = from_bytes(content[:DETECTION_SAMPLE_BYTES]).best()
+    return _normalize_encoding(best.encoding if best is not None else None) or 'utf-8'
+
+def extract_text(content: bytes, content_type: Optional[str] = None, parser: Optional[str] = None) -> str:
+    """응답 본문(bytes)에서 본문으로 추정되는 영역의 텍스트를 추출. 바이너리로 판별되면 빈 문자열"""
+    if not content or looks_binary(content):
+        return ""
+    text = content.decode(detect_encoding(content, content_type), errors='replace')
+    if parse_content_type(content_type)[0] in TEXT_CONTENT_TYPES:
+        return _join_blocks(text.replace('\n', _BLOCK_MARK))
+    if (parser or DEFAULT_PARSER) == PARSER_LXML:
+        return _lxml_to_text(text)
+    return _soup_to_text(text)
+
+def _lxml_to_text(html: str) -> str:
+    """lxml로 파싱하여 텍스트 추출 (_soup_to_text와 같은 규칙)"""
+    # lxml은 인코딩 선언이 있는 유니코드 문자열을 거부하므로 XML 선언을 제거 (이미 디코딩된 상태)
+    html = _XML_DECLARATION_RE.sub('', html, count=1)
+    if not html.strip():
+        return ""
+    try:
+        root = lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(remove_comments=True, remove_pis=True))
+    except (lxml.etree.ParserError, ValueError):
+        return ""
+
+    # 불필요한 태그 제거 (태그 뒤에 이어지는 텍스트는 앞 텍스트와 붙지 않도록 공백을 두고 유지)
+    for element in root.iter(*REMOVED_TAGS):
+        if element.tail:
+            element.tail = ' ' + element.tail
+    lxml.etree.strip_elements(root, *REMOVED_TAGS, with_tail=False)
+    for element in root.iter(*BLOCK_TAGS):
+        element.text = _BLOCK_MARK + (element.text or '')
+        element.tail = _BLOCK_MARK + (element.tail or '')
+
+    # 본문 영역으로 추정되는 태그를 우선 탐색
+    main_content = next(root.iter('main'), None)
+    if main_content is None:
+        main_content = next(root.iter('article'), None)
+    if main_content is None:
+        main_content = next(root.iter('body'), root)
+    return _join_blocks(' '.join(piece.strip() for piece in main_content.itertext() if piece.strip()))
+
+def _soup_to_text(html: str) -> str:
+    """BeautifulSoup(html.parser)로 파싱하여 텍스트 추출"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # 불필요한 태그 제거
+    for tag in soup(list(REMOVED_TAGS)):
+        tag.decompose()
+    for tag in soup(list(BLOCK_TAGS)):
+        tag.insert(0, _BLOCK_MARK)
+        tag.append(_BLOCK_MARK)
+        tag.insert_after(_BLOCK_MARK)
+
+    # 본문 영역으로 추정되는 태그를 우선 탐색
+    main_content = soup.find('main') or soup.find('article') or soup.find('body')
+    if main_content:
+        text = main_content.get_text(separator=' ', strip=True)
+    else:
+        text = soup.get_text(separator=' ', strip=True)
+    return _join_blocks(text)
+
+def _join_blocks(text: str) -> str:
+    """블록마다 과도한 공백을 정리하고, 빈 블록을 버린 뒤 줄바꿈으로 연결"""
+    blocks = (re.sub(r'\s+', ' ', block).strip() for block in text.split(_BLOCK_MARK))
+    return '\n'.join(block for block in blocks if block)
@@ -0,0 +1,194 @@
+# json_utils.py
+# Grayhound's shared JSON extraction & validation helpers for LLM replies
+
+import json
+import logging
+import re
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+_CLOSERS = {'{': '}', '[': ']'}
+_DECODER = json.JSONDecoder()
+# JSON 배열의 시작으로 보이는 '[' (다음 문자가 JSON 값의 시작이거나 빈 배열). 문장 속 "[This program]" 등은 제외
+_ARRAY_START_RE = re.compile(r'\[\s*(?=[\]\[{"\d\-tfn])')
+
+class JSONStreamExtractor:
+    """
+    텍스트를 조각 단위로 받아 최상위 JSON 값(객체/배열)이 닫히는 즉시 파싱해서 반환하는 추출기.
+    - 문자열 내부의 괄호와 이스케이프를 인식하여 괄호 깊이를 계산 (정규식의 greedy 매칭 문제 없음)
+    - 앞뒤의 설명 문장, 마크다운 코드 블록은 무시
+    - 파싱에 실패한 후보(예: 문장 속 "[This program]")는 버리고, 그 내부부터 다시 탐색
+    """
+
+    def __init__(self):
+        self._pending = deque()
+        self._reset()
+
+    def _reset(self):
+        self._buffer: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """텍스트 조각을 추가하고, 이번 조각에서 완성된 JSON 값 목록을 반환"""
+        values = []
+        self._pending.extend(chunk)
+        self._drain(values)
+        return values
+
+    def finish(self) -> List[Any]:
+        """입력이 끝났을 때 호출. 닫히지 않은 후보(출력이 잘린 경우) 내부의 완성된 값을 반환"""
+        values = []
+        while self._stack:
+            self._retry_inside()
+            self._drain(values)
+        return values
+
+    def _drain(self, values: List[Any]):
+        while self._pending:
+            self._feed_char(self._pending.popleft(), values)
+
+    def _feed_char(self, char: str, values: List[Any]):
+        if not self._stack:
+            if char in _CLOSERS:
+                self._buffer = [char]
+                self._stack = [_CLOSERS[char]]
+            return
+
+        self._buffer.append(char)
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return
+
+        if char == '"':
+            self._in_string = True
+        elif char in _CLOSERS:
+            self._stack.append(_CLOSERS[char])
+        elif char in '}]':
+            if char != self._stack[-1]:
+                self._retry_inside()
+                return
+            self._stack.pop()
+            if not self._stack:
+                try:
+                    values.append(json.loads(''.join(self._buffer)))
+                    self._reset()
+                except json.JSONDecodeError:
+                    self._retry_inside()
+
+    def _retry_inside(self):
+        """현재 후보가 JSON이 아니면 시작 괄호 다음 문자부터 다시 탐색하도록 입력 앞쪽에 되돌림"""
+        self._pending.extendleft(reversed(self._buffer[1:]))
+        self._reset()
+
+def iter_json_values(text: str) -> Iterator[Any]:
+    """텍스트에 포함된 최상위 JSON 값(객체/배열)을 등장 순서대로 반환"""
+    extractor = JSONStreamExtractor()
+    yield from extractor.feed(text or "")
+    yield from extractor.finish()
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    JSON Schema의 최소 부분집합(type, properties, required, items, enum, minimum, maximum)으로 값을 검증.
+    오류 메시지 목록을 반환 (비어 있으면 통과)
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected and not _matches_type(value, expected):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path}: {value} < minimum {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path}: {value} > maximum {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for field in schema.get("required", []):
+            if field not in value:
+                errors.append(f"{path}.{field}: required field is missing")
+        for field, field_schema in schema.get("properties", {}).items():
+            if field in value and value[field] is not None:
+                errors.extend(validate_schema(value[field], field_schema, f"{path}.{field}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate_schema(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+def _matches_type(value: Any, expected: str) -> bool:
+    if expected == "object":
+        return isinstance(value, dict)
+    if expected == "array":
+        return isinstance(value, list)
+    if expected == "string":
+        return isinstance(value, str)
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected == "boolean":
+        return isinstance(value, bool)
+    return True
+
+def extract_json(text: str, schema: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """LLM 응답에서 schema를 만족하는 첫 번째 JSON 값을 반환. 없으면 None"""
+    last_errors = []
+    for value in iter_json_values(text):
+        if schema is None:
+            return value
+        errors = validate_schema(value, schema)
+        if not errors:
+            return value
+        last_errors = errors
+
+    snippet = (text or "")[:200].replace("\n", " ")
+    if last_errors:
+        logging.warning(f"JSON in the LLM reply did not match the expected schema: {last_errors[:3]} - Reply: {snippet}")
+    else:
+        logging.warning(f"No JSON value found in the LLM reply: {snippet}")
+    return None
+
+def _complete_array_items(text: str, pos: int) -> List[Any]:
+    """pos부터 시작하는 배열 요소를 하나씩 파싱하여, 처음으로 파싱에 실패하기 전까지 완성된 요소 목록을 반환"""
+    items = []
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        try:
+            value, pos = _DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return items
+        items.append(value)
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text) or text[pos] != ',':
+            return items
+        pos += 1
+
+def extract_json_array(text: str) -> List[Any]:
+    """
+    LLM 응답에서 첫 번째 JSON 배열을 반환.
+    출력이 잘려 배열이 닫히지 않았으면 끝까지 완성된 요소(객체, 문자열 등)만 반환하고, 배열이 없으면 빈 목록
+    """
+    text = text or ""
+    for match in _ARRAY_START_RE.finditer(text):
+        try:
+            return _DECODER.raw_decode(text, match.start())[0]
+        except json.JSONDecodeError:
+            pass
+        items = _complete_array_items(text, match.end())
+        if items:
+            logging.warning(f"JSON array in the LLM reply is incomplete (truncated output?). Recovered {len(items)} complete elements.")
+            return items
+
+    snippet = text[:200].replace("\n", " ")
+    logging.warning(f"No JSON array found in the LLM reply: {snippet}")
+    return []
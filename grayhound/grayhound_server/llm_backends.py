@@ -0,0 +1,345 @@
+# llm_backends.py
+# Grayhound's pluggable LLM backends (Google AI Studio REST endpoint, deterministic local stand-in)
+
+import abc
+import asyncio
+import configparser
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+import requests
+
+from llm_errors import (
+    LLMError, LLMConfigError, LLMRequestError, LLMResponseError, LLMRateLimitError,
+    LLMServerError, LLMTimeoutError, LLMConnectionError,
+)
+from llm_metrics import estimate_tokens
+
+# Gemma 3 27B 모델 (Google AI Studio)
+GOOGLE_MODEL_NAME = "gemma-3-27b-it"
+STANDIN_MODEL_NAME = "local-standin"
+
+# HTTP/2는 h2 패키지가 설치되어 있을 때만 사용
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 시간(초)으로 변환"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _error_for_status(status_code: int, retry_after_header: str | None, body: str) -> LLMError:
+    """HTTP 상태 코드를 타입이 지정된 LLM 예외로 변환"""
+    logging.error(f"LLM API call failed with status {status_code}. API response content: {body[:500]}")
+    retry_after = _parse_retry_after(retry_after_header)
+    if status_code == 429:
+        return LLMRateLimitError("Rate limited by the LLM endpoint (429).", retry_after)
+    if status_code >= 500:
+        return LLMServerError(f"LLM endpoint server error ({status_code}).", retry_after)
+    return LLMRequestError(f"LLM request rejected ({status_code}): {body[:200]}")
+
+class LLMBackend(abc.ABC):
+    """
+    generateContent 형식의 요청 본문을 받아 generateContent 형식의 응답(dict)을 반환하는 LLM 백엔드 인터페이스.
+    재시도, 서킷 브레이커, 스케줄러, 캐시, 사용량 집계는 google_ai_client가 백엔드와 무관하게 처리하고,
+    백엔드는 한 번의 호출과 실패를 LLMError 하위 예외로 변환하는 것만 담당.
+    """
+    name = "base"
+    model_name = "unknown"
+    supports_json_mode = False  # generationConfig의 responseSchema를 처리할 수 있는지
+
+    def ensure_configured(self):
+        """호출 전 설정 확인 (API 키 누락 등). 문제가 있으면 LLMConfigError"""
+
+    @abc.abstractmethod
+    def generate(self, json_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """동기 호출 1회"""
+
+    @abc.abstractmethod
+    async def agenerate(self, json_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """비동기 호출 1회"""
+
+    async def aclose(self):
+        """커넥션 풀 등 백엔드 자원 정리"""
+
+class GoogleAIBackend(LLMBackend):
+    """Google AI Studio generateContent REST 엔드포인트 (keep-alive 세션 + 이벤트 루프별 커넥션 풀)"""
+    name = "google"
+
+    def __init__(self, api_key: Optional[str], model_name: str = GOOGLE_MODEL_NAME, max_connections: int = 10,
+                 json_mode: str = "auto", default_timeout: float = 120):
+        """
+        Args:
+            api_key (Optional[str]): Google AI Studio API 키
+            model_name (str): 모델 이름
+            max_connections (int): 비동기 커넥션 풀의 최대 연결 수
+            json_mode (str): auto | on | off. Gemma 모델은 JSON mode를 지원하지 않으므로 auto일 때는 Gemini 모델에서만 사용
+            default_timeout (float): 비동기 클라이언트의 기본 제한 시간 (초)
+        """
+        self.api_key = api_key
+        self.model_name = model_name
+        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent"
+        self.supports_json_mode = json_mode == "on" or (json_mode == "auto" and not model_name.startswith("gemma"))
+        self.max_connections = max_connections
+        self.default_timeout = default_timeout
+        # 동기 호출(CLI 등)용 keep-alive 세션
+        self._sync_session = requests.Session()
+        # 비동기 호출용 커넥션 풀 클라이언트 (이벤트 루프별로 하나씩 생성)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop = None
+
+    def ensure_configured(self):
+        if not self.api_key:
+            raise LLMConfigError("Google AI API key is not set, so LLM cannot be called.")
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """현재 이벤트 루프에 바인딩된 커넥션 풀 클라이언트를 반환 (없으면 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client.is_closed or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60,
+                ),
+                timeout=httpx.Timeout(self.default_timeout, connect=10),
+            )
+            self._async_client_loop = loop
+            logging.info(f"Created pooled async LLM client (HTTP/2: {HTTP2_AVAILABLE}, max connections: {self.max_connections}).")
+        return self._async_client
+
+    def _parse_response(self, status_code: int, headers, text: str, parse_json) -> Dict[str, Any]:
+        if status_code >= 400:
+            raise _error_for_status(status_code, headers.get('Retry-After'), text)
+        try:
+            return parse_json()
+        except ValueError as e:
+            raise LLMResponseError(f"API response is not valid JSON: {e}") from e
+
+    def generate(self, json_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        try:
+            response = self._sync_session.post(self.api_url, params={'key': self.api_key}, json=json_data, timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            raise LLMTimeoutError(f"Google AI API call timed out after {timeout}s: {e}") from e
+        except requests.exceptions.RequestException as e:
+            raise LLMConnectionError(f"Google AI API call failed: {e}") from e
+        return self._parse_response(response.status_code, response.headers, response.text, response.json)
+
+    async def agenerate(self, json_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        client = self._get_async_client()
+        try:
+            response = await asyncio.wait_for(
+                client.post(self.api_url, params={'key': self.api_key}, json=json_data, timeout=timeout),
+                timeout=timeout
+            )
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            raise LLMTimeoutError(f"Google AI API call exceeded the {timeout}s deadline. {e}") from e
+        except httpx.HTTPError as e:
+            raise LLMConnectionError(f"Google AI API call failed: {e}") from e
+        return self._parse_response(response.status_code, response.headers, response.text, response.json)
+
+    async def aclose(self):
+        if self._async_client is not None and not self._async_client.is_closed:
+            await self._async_client.aclose()
+        self._async_client = None
+        self._async_client_loop = None
+
+# --- 로컬 대체 백엔드 (부하 테스트/벤치마크용) ---
+_NAME_LIST_RE = re.compile(r'Software Names \(JSON array\): (\[.*\])')
+_NAME_RE = re.compile(r'Software Name: "([^"\n]+)"')
+_TEXT_BLOCK_RE = re.compile(r'--- Text Start ---(.*?)--- Text End ---', re.DOTALL)
+_PHRASE_RE = re.compile(r"\b[A-Z][A-Za-z0-9]+(?: [A-Z][A-Za-z0-9]+){0,3}\b")
+
+class LocalStandInBackend(LLMBackend):
+    """
+    실제 API 없이 파이프라인의 처리량과 동시성을 측정하기 위한 결정적(deterministic) 로컬 백엔드.
+    - 요청의 responseSchema를 따라 스키마에 맞는 응답을 규칙 기반으로 생성 (같은 프롬프트는 항상 같은 응답)
+    - 프롬프트의 'Software Name(s)'를 읽어 program_name/input_name을 채우므로 배치 평가의 입력명 매핑도 그대로 동작
+    - 지연 시간(기본 + jitter)과 오류율(5xx, 429)을 설정할 수 있음. 오류 발생 여부는 seed로 재현 가능
+    """
+    name = "standin"
+    model_name = STANDIN_MODEL_NAME
+    supports_json_mode = True
+
+    def __init__(self, latency_ms: float = 800, jitter_ms: float = 400, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency_ms (float): 호출당 기본 지연 시간 (ms)
+            jitter_ms (float): 기본 지연 시간에 더해지는 0~jitter_ms 사이의 무작위 지연 (ms)
+            error_rate (float): 서버 오류(503)를 반환할 확률 (0~1)
+            rate_limit_rate (float): 요청 한도 초과(429)를 반환할 확률 (0~1)
+            seed (Optional[int]): 지연/오류 발생 난수의 seed
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self) -> tuple[float, Optional[LLMError]]:
+        """이번 호출의 지연 시간(초)과 발생시킬 오류를 결정"""
+        with self._lock:
+            self.calls += 1
+            delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return delay, _error_for_status(503, None, "stand-in simulated server error")
+        if roll < self.error_rate + self.rate_limit_rate:
+            return delay, _error_for_status(429, "1", "stand-in simulated rate limit")
+        return delay, None
+
+    def generate(self, json_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        delay, error = self._draw()
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError(f"Stand-in call exceeded the {timeout}s deadline.")
+        time.sleep(delay)
+        if error:
+            raise error
+        return self._respond(json_data)
+
+    async def agenerate(self, json_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        delay, error = self._draw()
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise LLMTimeoutError(f"Stand-in call exceeded the {timeout}s deadline.")
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return self._respond(json_data)
+
+    def _respond(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """generateContent 형식의 응답 생성 (usageMetadata는 문자 수 기반 추정값)"""
+        prompt = json_data['contents'][0]['parts'][0]['text']
+        schema = json_data.get('generationConfig', {}).get('responseSchema')
+        if schema:
+            text = json.dumps(self._from_schema(schema, prompt, self._subject_names(prompt), "$"), ensure_ascii=False)
+        else:
+            text = f"[Stand-in response] {len(prompt)} characters received. This text is generated locally for load testing."
+        return {
+            'candidates': [{'content': {'parts': [{'text': text}]}}],
+            'usageMetadata': {'promptTokenCount': estimate_tokens(prompt), 'candidatesTokenCount': estimate_tokens(text)},
+        }
+
+    def _subject_names(self, prompt: str) -> List[str]:
+        """프롬프트에서 평가 대상 프로그램명을 찾음 (배치 목록 → 단일 이름 순)"""
+        match = _NAME_LIST_RE.search(prompt)
+        if match:
+            try:
+                names = json.loads(match.group(1))
+                if isinstance(names, list):
+                    return [name for name in names if isinstance(name, str)]
+            except json.JSONDecodeError:
+                pass
+        match = _NAME_RE.search(prompt)
+        return [match.group(1)] if match else []
+
+    def _score(self, *parts: str) -> int:
+        """이름별로 고정된 0~1023 사이의 값 (응답을 결정적으로 만들기 위해 사용)"""
+        return int(hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:8], 16) % 1024
+
+    def _from_schema(self, schema: Dict[str, Any], prompt: str, names: List[str], path: str) -> Any:
+        """responseSchema(OpenAPI 부분집합)에 맞는 값을 규칙 기반으로 생성"""
+        kind = schema.get('type', 'STRING').upper()
+        subject = names[0] if names else "Stand-in Program"
+
+        if kind == 'OBJECT':
+            return {field: self._from_schema(sub, prompt, names, field) for field, sub in schema.get('properties', {}).items()}
+        if kind == 'ARRAY':
+            item_schema = schema.get('items', {'type': 'STRING'})
+            if item_schema.get('type', '').upper() == 'OBJECT' and 'input_name' in item_schema.get('properties', {}):
+                return [self._from_schema(item_schema, prompt, [name], path) for name in names]
+            if item_schema.get('type', '').upper() == 'STRING':
+                return self._string_list(prompt, subject, path)
+            return [self._from_schema(item_schema, prompt, names, path) for _ in range(2)]
+        if kind == 'INTEGER':
+            low, high = int(schema.get('minimum', 0)), int(schema.get('maximum', 10))
+            return low + self._score(subject, path) % (high - low + 1)
+        if kind == 'NUMBER':
+            low, high = float(schema.get('minimum', 0)), float(schema.get('maximum', 1))
+            return round(low + (high - low) * self._score(subject, path) / 1023, 3)
+        if kind == 'BOOLEAN':
+            return self._score(subject, path) % 2 == 0
+        if 'enum' in schema:
+            return schema['enum'][self._score(subject, path) % len(schema['enum'])]
+        return self._string_value(subject, path)
+
+    def _string_value(self, subject: str, field: str) -> str:
+        if field in ('program_name', 'input_name'):
+            return subject
+        if field == 'generic_name':
+            return re.sub(r'[^a-z0-9]+', ' ', subject.lower()).strip() or "standin"
+        if field == 'reason':
+            return "[This program] is evaluated by the local stand-in backend for load testing."
+        if field == 'publisher':
+            return "Stand-in Publisher"
+        if field == 'process_names':
+            stem = re.sub(r'[^a-z0-9]+', '', subject.lower()) or "standin"
+            return f"{stem}.exe,{stem}service.exe"
+        return f"stand-in {field}"
+
+    def _string_list(self, prompt: str, subject: str, field: str) -> List[str]:
+        if field == 'brand_keywords':
+            return [word for word in re.findall(r'[a-z0-9]{4,}', subject.lower())[:2]] or ["standin"]
+        if field == 'alternative_names':
+            return [f"{subject} Helper"]
+        if field in ('known_bloatware_queries', 'general_search_queries'):
+            return [f"stand-in query {field.split('_')[0]} {i}" for i in range(1, 5)]
+        # 후보 추출: 수집된 텍스트의 대문자 구절을 프로그램명 후보로 반환
+        block = _TEXT_BLOCK_RE.search(prompt)
+        phrases = _PHRASE_RE.findall(block.group(1) if block else prompt)
+        return list(dict.fromkeys(phrases))[:20]
+
+def create_backend(config: configparser.ConfigParser) -> LLMBackend:
+    """
+    config.ini의 [LLM_BACKEND] backend = google | standin 설정으로 백엔드를 생성
+    (환경 변수 GRAYHOUND_LLM_BACKEND가 있으면 우선 적용)
+    """
+    backend_name = os.environ.get('GRAYHOUND_LLM_BACKEND') or config.get('LLM_BACKEND', 'backend', fallback='google')
+    backend_name = backend_name.strip().lower()
+
+    if backend_name == 'standin':
+        backend = LocalStandInBackend(
+            latency_ms=config.getfloat('LLM_BACKEND', 'standin_latency_ms', fallback=800),
+            jitter_ms=config.getfloat('LLM_BACKEND', 'standin_jitter_ms', fallback=400),
+            error_rate=config.getfloat('LLM_BACKEND', 'standin_error_rate', fallback=0.0),
+            rate_limit_rate=config.getfloat('LLM_BACKEND', 'standin_rate_limit_rate', fallback=0.0),
+            seed=config.getint('LLM_BACKEND', 'standin_seed', fallback=None),
+        )
+        logging.warning(f"Using the local stand-in LLM backend (latency {backend.latency_ms:.0f}+{backend.jitter_ms:.0f}ms, error rate {backend.error_rate}). Responses are synthetic.")
+        return backend
+
+    if backend_name != 'google':
+        logging.error(f"Unknown LLM backend '{backend_name}'. Falling back to the Google AI backend.")
+    api_key = config.get('GOOGLE_AI', 'API_KEY', fallback=None)
+    if not api_key:
+        logging.error("Google AI API key is not set in the config.ini file.")
+    return GoogleAIBackend(
+        api_key=api_key,
+        max_connections=config.getint('GOOGLE_AI', 'max_connections', fallback=10),
+        json_mode=config.get('GOOGLE_AI', 'json_mode', fallback='auto').strip().lower(),
+    )
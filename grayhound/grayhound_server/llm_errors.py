@@ -0,0 +1,42 @@
+# llm_errors.py
+# Grayhound's typed LLM call exceptions (shared by google_ai_client and the LLM backends)
+
+class LLMError(Exception):
+    """LLM 호출 실패의 기본 예외"""
+    retryable = False
+
+class LLMConfigError(LLMError):
+    """API 키 미설정 등 설정 오류"""
+
+class LLMRequestError(LLMError):
+    """재시도해도 성공할 수 없는 요청 오류 (4xx)"""
+
+class LLMResponseError(LLMError):
+    """응답 본문을 해석할 수 없음"""
+
+class LLMRateLimitError(LLMError):
+    """요청 한도 초과 (429)"""
+    retryable = True
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMServerError(LLMError):
+    """엔드포인트 서버 오류 (5xx)"""
+    retryable = True
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMTimeoutError(LLMError):
+    """호출 제한 시간 초과"""
+    retryable = True
+
+class LLMConnectionError(LLMError):
+    """네트워크 연결 실패"""
+    retryable = True
+
+class LLMCircuitOpenError(LLMError):
+    """서킷 브레이커가 열려 있어 호출하지 않고 즉시 실패"""
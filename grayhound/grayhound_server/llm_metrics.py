@@ -0,0 +1,141 @@
+# llm_metrics.py
+# Grayhound's LLM token/latency accounting (process totals + per-workflow run totals)
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# --- 호출 태그 (어느 프롬프트 단계에서 발생한 호출인지) ---
+TAG_QUERY_GENERATION = "query_generation"  # 검색 쿼리 생성
+TAG_EXTRACTION = "extraction"              # 수집된 텍스트에서 후보 추출
+TAG_PHASE1 = "phase1"                      # 1차 기본 평가 (단일/배치)
+TAG_PHASE2 = "phase2"                      # 2차 메타데이터 보강
+TAG_FEEDBACK = "feedback"                  # 정리 결과 리포트/피드백
+TAG_UNTAGGED = "untagged"
+
+RECENT_RUNS_LIMIT = 20  # get_llm_metrics()로 조회할 수 있는 최근 실행 수
+
+def estimate_tokens(text: str) -> int:
+    """API가 토큰 수를 알려주지 않을 때 사용하는 대략적인 추정값 (약 4자당 1토큰)"""
+    return (len(text) + 3) // 4 if text else 0
+
+class LLMUsage:
+    """태그별 LLM 호출 수, 토큰 수, 지연 시간, 재시도 횟수 집계"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._by_tag: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tag: str, prompt_tokens: int = 0, response_tokens: int = 0, latency: float = 0.0,
+               retries: int = 0, estimated: bool = False, cached: bool = False, failed: bool = False):
+        """호출 한 건을 집계 (캐시 적중은 토큰을 소비하지 않으므로 cached로만 집계)"""
+        with self._lock:
+            entry = self._by_tag.setdefault(tag, {
+                "calls": 0, "cached": 0, "failures": 0, "retries": 0,
+                "prompt_tokens": 0, "response_tokens": 0, "estimated_calls": 0, "latency_seconds": 0.0,
+            })
+            entry["calls"] += 1
+            entry["retries"] += retries
+            entry["latency_seconds"] += latency
+            if cached:
+                entry["cached"] += 1
+            if failed:
+                entry["failures"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["response_tokens"] += response_tokens
+            if estimated:
+                entry["estimated_calls"] += 1
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return sum(entry["calls"] for entry in self._by_tag.values())
+
+    def summary(self) -> Dict[str, Any]:
+        """태그별 집계와 전체 합계를 반환"""
+        with self._lock:
+            by_tag = {tag: {**entry, "latency_seconds": round(entry["latency_seconds"], 2)} for tag, entry in self._by_tag.items()}
+        totals = {key: 0 for key in ("calls", "cached", "failures", "retries", "prompt_tokens", "response_tokens", "estimated_calls")}
+        latency = 0.0
+        for entry in by_tag.values():
+            for key in totals:
+                totals[key] += entry[key]
+            latency += entry["latency_seconds"]
+        totals["latency_seconds"] = round(latency, 2)
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["response_tokens"]
+        end = self.finished_at or time.time()
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "elapsed_seconds": round(end - self.started_at, 2),
+            "totals": totals,
+            "by_tag": by_tag,
+        }
+
+    def format_summary(self) -> str:
+        """진행 메시지용 한 줄 요약 (토큰을 가장 많이 쓴 단계 포함)"""
+        summary = self.summary()
+        totals = summary["totals"]
+        line = (f"LLM usage: {totals['calls']} calls ({totals['cached']} cached, {totals['retries']} retries), "
+                f"{totals['total_tokens']:,} tokens (prompt {totals['prompt_tokens']:,} / response {totals['response_tokens']:,}), "
+                f"{totals['latency_seconds']:.1f}s in LLM calls")
+        if totals["total_tokens"]:
+            top_tag, top = max(summary["by_tag"].items(), key=lambda item: item[1]["prompt_tokens"] + item[1]["response_tokens"])
+            share = (top["prompt_tokens"] + top["response_tokens"]) * 100 / totals["total_tokens"]
+            line += f"; top stage: {top_tag} ({share:.0f}% of tokens)"
+        if totals["estimated_calls"]:
+            line += " (token counts partly estimated)"
+        return line
+
+# 프로세스 시작 후 전체 누적값
+process_usage = LLMUsage("process")
+
+# 현재 실행 중인 워크플로우의 집계 (asyncio Task/to_thread로 전파됨)
+_current_run: contextvars.ContextVar[Optional[LLMUsage]] = contextvars.ContextVar("llm_current_run", default=None)
+_active_runs: Dict[int, LLMUsage] = {}
+_recent_runs: deque = deque(maxlen=RECENT_RUNS_LIMIT)
+_runs_lock = threading.Lock()
+
+@contextmanager
+def track_run(name: str) -> Iterator[LLMUsage]:
+    """with 블록 안에서 발생한 LLM 호출을 하나의 실행(run)으로 집계. 호출이 있었던 실행만 최근 실행 목록에 남김"""
+    run = LLMUsage(name)
+    token = _current_run.set(run)
+    with _runs_lock:
+        _active_runs[id(run)] = run
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        run.finished_at = time.time()
+        with _runs_lock:
+            _active_runs.pop(id(run), None)
+            if run.calls:
+                _recent_runs.append(run.summary())
+        if run.calls:
+            logging.info(f"[{name}] {run.format_summary()}")
+
+def current_run() -> Optional[LLMUsage]:
+    """현재 컨텍스트의 실행 집계 (track_run 밖이면 None)"""
+    return _current_run.get()
+
+def record_call(tag: str, **kwargs):
+    """LLM 호출 한 건을 프로세스 누적값과 현재 실행에 기록 (인자는 LLMUsage.record와 동일)"""
+    process_usage.record(tag, **kwargs)
+    run = _current_run.get()
+    if run is not None:
+        run.record(tag, **kwargs)
+
+def get_llm_metrics() -> Dict[str, Any]:
+    """프로세스 누적값, 진행 중인 실행, 최근 완료된 실행의 집계를 반환"""
+    with _runs_lock:
+        active = [run.summary() for run in _active_runs.values() if run.calls]
+        recent = list(_recent_runs)
+    return {"process": process_usage.summary(), "active_runs": active, "recent_runs": recent}
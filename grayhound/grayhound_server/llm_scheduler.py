@@ -0,0 +1,162 @@
+# llm_scheduler.py
+# Grayhound's process-wide, priority-aware LLM request scheduler
+
+import asyncio
+import collections
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+# --- 우선순위 클래스 (숫자가 작을수록 먼저 처리) ---
+PRIORITY_INTERACTIVE = 0  # 사용자가 화면 앞에서 기다리는 요청 (DB 항목 추가, 쿼리 생성)
+PRIORITY_REPORT = 1       # 정리 결과 리포트 생성
+PRIORITY_BACKGROUND = 2   # DB 업데이트 등 대량 백그라운드 수집
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_REPORT: "report",
+    PRIORITY_BACKGROUND: "background",
+}
+
+class LLMScheduler:
+    """
+    모든 LLM 호출 앞에 위치하는 프로세스 전역 스케줄러.
+    - 우선순위 클래스별 FIFO 큐 (interactive > report > background)
+    - 동시 실행 수 제한과 분당 요청 수 제한(token bucket)을 모든 클래스가 공유
+    - 오래 기다린 요청은 aging_seconds마다 한 단계씩 우선순위가 올라가 기아 상태를 방지 (단, interactive 요청보다 앞설 수는 없음)
+    """
+
+    def __init__(self, max_concurrency: int = 4, requests_per_minute: float = 30, aging_seconds: float = 30):
+        """
+        Args:
+            max_concurrency (int): 동시에 진행할 수 있는 최대 LLM 호출 수
+            requests_per_minute (float): 모든 클래스가 공유하는 분당 최대 요청 수 (0 이하이면 제한 없음)
+            aging_seconds (float): 대기 중인 요청의 우선순위를 한 단계 올리는 간격 (초)
+        """
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.aging_seconds = aging_seconds
+        self._reset()
+
+    def _reset(self):
+        """대기열과 token bucket 상태를 초기화"""
+        self._queues: Dict[int, collections.deque] = {p: collections.deque() for p in PRIORITY_NAMES}
+        self._running = 0
+        self._tokens = float(self._bucket_capacity())
+        self._last_refill = time.monotonic()
+        self._wakeup_handle = None
+        self._loop = None
+        self._granted = {p: 0 for p in PRIORITY_NAMES}
+        self._total_wait = {p: 0.0 for p in PRIORITY_NAMES}
+
+    def _bucket_capacity(self) -> float:
+        # 순간적인 폭주를 막기 위해 버스트는 동시 실행 수만큼만 허용
+        return max(1, self.max_concurrency)
+
+    def _refill(self):
+        if self.requests_per_minute <= 0:
+            self._tokens = self._bucket_capacity()
+            return
+        now = time.monotonic()
+        self._tokens = min(self._bucket_capacity(), self._tokens + (now - self._last_refill) * self.requests_per_minute / 60)
+        self._last_refill = now
+
+    def _bind_loop(self):
+        """현재 이벤트 루프에 바인딩 (루프가 바뀌었으면 상태 초기화)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                logging.info("LLM scheduler re-bound to a new event loop.")
+            self._reset()
+            self._loop = loop
+        return loop
+
+    def _pick_next(self):
+        """aging을 반영한 유효 우선순위가 가장 높은(숫자가 작은) 대기열의 맨 앞 요청을 선택
+        aging으로 올라가는 우선순위는 interactive 바로 아래까지로 제한 (대량 수집 중에도 사용자 요청이 먼저 처리되도록)"""
+        now = time.monotonic()
+        best = None
+        for priority, queue in self._queues.items():
+            if not queue:
+                continue
+            enqueued_at = queue[0][1]
+            boost = int((now - enqueued_at) / self.aging_seconds) if self.aging_seconds > 0 else 0
+            effective = priority if priority <= PRIORITY_INTERACTIVE else max(priority - boost, PRIORITY_INTERACTIVE + 1)
+            key = (effective, enqueued_at)
+            if best is None or key < best[0]:
+                best = (key, priority)
+        return best[1] if best else None
+
+    def _dispatch(self):
+        """실행 슬롯과 토큰이 허락하는 만큼 대기 중인 요청을 깨움"""
+        self._wakeup_handle = None
+        while self._running < self.max_concurrency:
+            # 취소된 요청은 대기열에서 제거
+            for queue in self._queues.values():
+                while queue and queue[0][0].done():
+                    queue.popleft()
+
+            priority = self._pick_next()
+            if priority is None:
+                return
+
+            self._refill()
+            if self._tokens < 1:
+                # 다음 토큰이 생기는 시점에 다시 분배
+                delay = (1 - self._tokens) * 60 / self.requests_per_minute
+                self._wakeup_handle = self._loop.call_later(delay, self._dispatch)
+                return
+
+            future, enqueued_at = self._queues[priority].popleft()
+            self._tokens -= 1
+            self._running += 1
+            self._granted[priority] += 1
+            self._total_wait[priority] += time.monotonic() - enqueued_at
+            future.set_result(None)
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND):
+        """실행 슬롯을 얻을 때까지 대기"""
+        loop = self._bind_loop()
+        future = loop.create_future()
+        self._queues.setdefault(priority, collections.deque()).append((future, time.monotonic()))
+        if self._wakeup_handle is None:
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 슬롯을 받은 직후 취소되었다면 반납
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """실행 슬롯을 반납하고 다음 요청을 분배"""
+        self._running = max(0, self._running - 1)
+        if self._wakeup_handle is None:
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_BACKGROUND):
+        """async with scheduler.slot(priority): 블록 동안 실행 슬롯을 점유"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """클래스별 대기열 길이, 처리 건수, 평균 대기 시간을 반환"""
+        return {
+            "running": self._running,
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "classes": {
+                name: {
+                    "queued": len(self._queues.get(priority, ())),
+                    "granted": self._granted.get(priority, 0),
+                    "avg_wait_seconds": round(self._total_wait[priority] / self._granted[priority], 3) if self._granted.get(priority) else 0.0,
+                }
+                for priority, name in PRIORITY_NAMES.items()
+            },
+        }
@@ -0,0 +1,47 @@
+# page_parse_worker.py
+# Grayhound's HTML parse process pool (parse_mode = process)
+# 작업 프로세스는 이 모듈과 html_extractor만 import하므로, 두 모듈은 import 시 설정 파일 읽기/DB 연결 같은 부작용이 없어야 함
+
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import html_extractor
+
+def parse_page(content: bytes, content_type: str | None) -> str:
+    """작업 프로세스에서 실행: 받은 본문(bytes)을 텍스트로 변환"""
+    return html_extractor.extract_text(content, content_type)
+
+class ParsePool:
+    """
+    파싱용 프로세스 풀.
+    - 처음 acquire()할 때 생성
+    - 작업 프로세스가 비정상 종료되어 풀이 깨지면(BrokenProcessPool) discard()로 버리고 다음 acquire()에서 새로 생성
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def acquire(self) -> ProcessPoolExecutor:
+        """현재 풀을 반환 (없으면 생성)"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                logging.info(f"Started HTML parse process pool with {self.max_workers} workers.")
+            return self._pool
+
+    def discard(self, pool: ProcessPoolExecutor):
+        """깨진 풀을 버림. 다른 호출자가 이미 새 풀로 교체했으면 새 풀은 그대로 둠"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """풀 종료 (서버 종료 시 호출). 대기 중인 작업은 취소"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
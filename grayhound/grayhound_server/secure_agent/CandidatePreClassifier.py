@@ -0,0 +1,97 @@
+# secure_agent/CandidatePreClassifier.py
+# Grayhound's similarity-based local pre-classifier for bloatware candidates
+
+import difflib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import normalize_program_name, extract_brand_keywords, is_protected_program, starts_with_protected_vendor
+
+# 분류 결과
+DECISION_PROTECTED = "protected"  # 필수/보호 프로그램: LLM 평가 없이 제외
+DECISION_INHERIT = "inherit"      # 기존 DB 항목의 변형: 해당 항목의 점수를 물려받음
+DECISION_NEW = "new"              # 새로운 후보: LLM 평가 필요
+
+# DB 항목의 브랜드 키워드가 후보명에 포함될 때 더해주는 가산점
+BRAND_KEYWORD_BONUS = 0.1
+
+# 브랜드 키워드 매칭에서 제외할 보호 브랜드 (SecurityAgentManager의 매칭 규칙과 동일)
+PROTECTED_BRANDS = {'microsoft', 'nvidia', 'intel', 'amd', 'google', 'apple', 'adobe', 'windows'}
+
+class CandidatePreClassifier:
+    """
+    LLM 평가 전에 후보를 로컬에서 분류.
+    - 보호 프로그램(is_protected_program)은 바로 제외
+    - 정규화된 이름의 문자열 유사도/단어 포함 관계 + 브랜드 키워드 일치로 DB 항목과의 신뢰도를 계산하고,
+      threshold 이상이면 해당 DB 항목의 변형으로 판단 (보호된 제조사 이름으로 시작하는 후보는 제외)
+    - 나머지만 새로운 후보로 LLM에 전달
+    """
+
+    def __init__(self, threats: Iterable[Dict[str, Any]], threshold: float = 0.85):
+        """
+        Args:
+            threats (Iterable[Dict[str, Any]]): threat_intelligence 컬렉션의 문서 목록
+            threshold (float): 기존 항목의 변형으로 판단할 최소 신뢰도 (0~1)
+        """
+        self.threshold = threshold
+        self._entries: List[Tuple[Dict[str, Any], List[str], set]] = []
+        for threat in threats:
+            if not isinstance(threat.get("program_name"), str):
+                continue
+            names = [threat.get("program_name"), threat.get("generic_name")] + list(threat.get("alternative_names") or [])
+            # 정규화된 이름과 함께 소문자로만 바꾼 원래 이름도 비교 (정규화로 "Norton Security"가 "norton"이 되면 변형을 찾지 못하므로)
+            names = [name for name in names if isinstance(name, str)]
+            variants = [normalize_program_name(name) for name in names] + [" ".join(name.lower().split()) for name in names]
+            normalized = list(dict.fromkeys(n for n in variants if n))
+            brands = {k.lower() for k in threat.get("brand_keywords") or [] if isinstance(k, str) and len(k) >= 4} - PROTECTED_BRANDS
+            if normalized:
+                self._entries.append((threat, normalized, brands))
+
+    def _name_similarity(self, candidate: str, db_name: str) -> float:
+        """
+        정규화된 두 이름의 유사도. 2단어 이상인 DB 이름의 모든 단어가 후보에 포함되면(예: "delfino g3" ⊂ "delfino g3 client") 높은 점수.
+        1단어 DB 이름(주로 브랜드명인 generic명)은 포함만으로는 같은 제품이라 볼 수 없으므로 문자열 유사도만 사용
+        (예: "norton" ⊂ "norton utilities"는 다른 제품)
+        """
+        candidate_tokens, db_tokens = set(candidate.split()), set(db_name.split())
+        containment = 0.0
+        if len(db_tokens) >= 2 and db_tokens <= candidate_tokens:
+            containment = 0.6 + 0.4 * len(db_tokens) / len(candidate_tokens)
+
+        matcher = difflib.SequenceMatcher(None, candidate, db_name)
+        # 빠른 상한값으로 가망 없는 쌍은 정밀 비교를 생략
+        if matcher.real_quick_ratio() < self.threshold - BRAND_KEYWORD_BONUS or matcher.quick_ratio() < self.threshold - BRAND_KEYWORD_BONUS:
+            return containment
+        return max(containment, matcher.ratio())
+
+    def classify(self, program_name: str) -> Tuple[str, float, Optional[Dict[str, Any]]]:
+        """
+        후보 하나를 분류.
+        Returns:
+            (분류 결과, 신뢰도, 가장 유사한 DB 항목 또는 None)
+        """
+        if is_protected_program(program_name):
+            return DECISION_PROTECTED, 1.0, None
+
+        normalized = normalize_program_name(program_name)
+        if not normalized:
+            return DECISION_NEW, 0.0, None
+        candidate_keywords = set(extract_brand_keywords(program_name))
+
+        best_score, best_threat = 0.0, None
+        for threat, db_names, brands in self._entries:
+            score = max(self._name_similarity(normalized, db_name) for db_name in db_names)
+            if score and brands & candidate_keywords:
+                score += BRAND_KEYWORD_BONUS
+            if score > best_score:
+                best_score, best_threat = score, threat
+
+        best_score = min(1.0, best_score)
+        if best_threat is not None and best_score >= self.threshold:
+            # "Google Toolbar"와 "Google Chrome"처럼 같은 제조사 제품은 이름이 비슷해도 평가가 다를 수 있으므로 LLM이 판단
+            if starts_with_protected_vendor(program_name):
+                return DECISION_NEW, best_score, best_threat
+            return DECISION_INHERIT, best_score, best_threat
+        return DECISION_NEW, best_score, best_threat
@@ -0,0 +1,221 @@
+# secure_agent/CandidatePreExtractor.py
+# Grayhound's local (LLM-free) candidate pre-extractor for scraped community text
+
+import logging
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import verdict_cache_key
+
+# 제품명 뒤에 자주 붙는 단어 (대문자로 시작하는 구절이 이 단어로 끝나면 프로그램명으로 간주)
+PRODUCT_SUFFIXES = {
+    "toolbar", "updater", "update", "helper", "assistant", "manager", "cleaner", "optimizer",
+    "booster", "agent", "launcher", "utility", "utilities", "security", "antivirus", "protect",
+    "protection", "guard", "shield", "safe", "companion", "search", "player", "downloader",
+    "installer", "driver", "service", "center", "centre", "tools", "suite", "monitor", "defender",
+}
+
+# 구절 맨 앞에 오면 잘라낼 일반 단어 (문장 시작, 안내 문구 등)
+LEADING_STOPWORDS = {
+    "the", "a", "an", "how", "to", "remove", "uninstall", "delete", "disable", "install", "best",
+    "top", "free", "new", "my", "your", "this", "that", "why", "what", "is", "use", "using", "get",
+    "download", "and", "or", "if", "when", "after", "before", "also", "with", "for", "in", "on",
+}
+
+# 대소문자가 섞여 있지만 프로그램명이 아닌 흔한 단어
+CAMELCASE_STOPWORDS = {
+    "youtube", "javascript", "github", "wordpress", "linkedin", "paypal", "iphone", "ipad", "macos",
+    "ios", "powershell", "facebook", "tiktok", "onedrive", "typescript", "chatgpt", "openai",
+}
+
+# 대문자로 시작하는 단어 또는 CamelCase 단어가 1~5개 이어진 구절
+_WORD = r"(?:[A-Z][A-Za-z0-9&+']*|[a-z]{1,3}[A-Z][A-Za-z0-9]*)"
+CAPITALIZED_PHRASE_RE = re.compile(rf"(?<![\w.]){_WORD}(?:[ \-](?:{_WORD}|\d[\w.]*))*")
+CAMELCASE_RE = re.compile(r"^(?:[a-z]{1,3}[A-Z][A-Za-z0-9]{2,}|[A-Z][a-z]+[A-Z][A-Za-z0-9]+|[A-Z]{2,}[a-z]{3,}[A-Za-z0-9]*)$")
+
+class AhoCorasick:
+    """여러 패턴을 텍스트 한 번 순회로 동시에 찾는 Aho-Corasick 오토마톤 (대소문자 무시, 단어 경계 일치만 반환)"""
+
+    def __init__(self, patterns: Dict[str, Any]):
+        """
+        Args:
+            patterns (Dict[str, Any]): 패턴 문자열 → 일치 시 함께 반환할 값
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, payload in patterns.items():
+            pattern = pattern.lower()
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = nxt
+            self._output[node].append((len(pattern), payload))
+
+        # BFS로 실패 링크를 구성하고, 실패 링크 쪽의 출력을 합침
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """(시작 위치, 끝 위치, payload)를 반환. 앞뒤가 영숫자로 이어지는 부분 일치는 제외"""
+        lowered = text.lower()
+        node = 0
+        for i, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, payload in self._output[node]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not lowered[start - 1].isalnum()) and (end == len(lowered) or not lowered[end].isalnum()):
+                    yield start, end, payload
+
+class CandidatePreExtractor:
+    """
+    LLM 호출 없이 수집된 텍스트에서 프로그램명 후보를 찾는 로컬 추출기.
+    - DB의 프로그램명/generic명/대체명과 정확히 일치하면 DB의 program_name을 후보로 사용
+    - brand_keywords가 포함된 대문자 구절(예: "Delfino G3 Security")은 새 변형 후보로 사용
+    - 제품명 형태의 구절(…Toolbar, …Updater 등)과 CamelCase 단어(예: "nProtect")는 여러 번 언급된 경우에만 후보로 사용
+    """
+
+    def __init__(self, threats: Iterable[Dict[str, Any]], min_heuristic_mentions: int = 2):
+        """
+        Args:
+            threats (Iterable[Dict[str, Any]]): threat_intelligence 컬렉션의 문서 목록
+            min_heuristic_mentions (int): DB와 무관한 휴리스틱 후보가 채택되기 위한 최소 언급 횟수
+        """
+        self.min_heuristic_mentions = min_heuristic_mentions
+        vocabulary: Dict[str, Tuple[str, str]] = {}
+        # DB에 이미 있는 이름의 정규화 키 (수집기가 DB 중복 확인에 사용하는 키와 같음)
+        self._known_keys: Set[str] = set()
+        for threat in threats:
+            program_name = threat.get("program_name")
+            if not isinstance(program_name, str) or not program_name.strip():
+                continue
+            names = [program_name, threat.get("generic_name")] + list(threat.get("alternative_names") or [])
+            for name in names:
+                if isinstance(name, str) and name.strip():
+                    self._known_keys.add(self._candidate_key(name))
+                if isinstance(name, str) and len(name.strip()) >= 3:
+                    vocabulary.setdefault(name.strip().lower(), ("name", program_name))
+            for keyword in threat.get("brand_keywords") or []:
+                if isinstance(keyword, str) and len(keyword.strip()) >= 4:
+                    vocabulary.setdefault(keyword.strip().lower(), ("brand", program_name))
+
+        self.vocabulary_size = len(vocabulary)
+        self._automaton = AhoCorasick(vocabulary) if vocabulary else None
+
+    @staticmethod
+    def _candidate_key(name: str) -> str:
+        """후보 중복 확인에 사용하는 이름 키 (ThreatIntelligenceCollector의 verdict 키와 동일)"""
+        return verdict_cache_key(name)
+
+    def _clean_phrase(self, phrase: str) -> Optional[str]:
+        """구절 앞쪽의 일반 단어를 잘라내고, 남은 구절이 너무 짧으면 None"""
+        words = phrase.split()
+        while words and words[0].lower() in LEADING_STOPWORDS:
+            words.pop(0)
+        cleaned = " ".join(words).strip(" -'")
+        return cleaned if len(cleaned) >= 3 else None
+
+    def _heuristic_phrases(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """제품명 형태의 대문자 구절과 CamelCase 단어를 (시작, 끝, 구절)로 반환"""
+        for match in CAPITALIZED_PHRASE_RE.finditer(text):
+            phrase = self._clean_phrase(match.group(0))
+            if phrase:
+                yield match.start(), match.end(), phrase
+
+    def extract_page(self, text: str) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        페이지 하나에서 후보를 찾음.
+        Returns:
+            (DB 어휘로 확인된 후보 → 언급 수, 휴리스틱 후보 → 언급 수)
+        """
+        known: Dict[str, int] = {}
+        heuristic: Dict[str, int] = {}
+        phrases = list(self._heuristic_phrases(text))
+
+        brand_hits = []
+        if self._automaton:
+            for start, end, (kind, program_name) in self._automaton.iter_matches(text):
+                if kind == "name":
+                    known[program_name] = known.get(program_name, 0) + 1
+                else:
+                    brand_hits.append((start, end))
+
+        # 브랜드 키워드를 포함하는 2단어 이상의 구절은 DB 항목의 변형일 가능성이 높으므로 바로 채택
+        for start, end, phrase in phrases:
+            if len(phrase.split()) >= 2 and any(start <= b_start and b_end <= end for b_start, b_end in brand_hits):
+                known[phrase] = known.get(phrase, 0) + 1
+                continue
+
+            words = phrase.split()
+            if len(words) >= 2 and words[-1].lower() in PRODUCT_SUFFIXES:
+                heuristic[phrase] = heuristic.get(phrase, 0) + 1
+            for word in words:
+                if CAMELCASE_RE.match(word) and word.lower() not in CAMELCASE_STOPWORDS:
+                    heuristic[word] = heuristic.get(word, 0) + 1
+        return known, heuristic
+
+    def extract(self, pages: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        모든 페이지에서 후보를 추출.
+        Returns:
+            (언급 수 순으로 정렬된 후보 목록, 로컬 추출기가 DB에 없는 새 후보를 하나도 찾지 못한 페이지 목록)
+        """
+        mentions: Dict[str, int] = {}
+        display_names: Dict[str, str] = {}
+        heuristic_mentions: Dict[str, int] = {}
+        page_results = []
+
+        for page in pages:
+            known, heuristic = self.extract_page(page)
+            page_results.append((page, known, heuristic))
+            for name, count in known.items():
+                key = self._candidate_key(name)
+                display_names.setdefault(key, name)
+                mentions[key] = mentions.get(key, 0) + count
+            for name, count in heuristic.items():
+                heuristic_mentions[name] = heuristic_mentions.get(name, 0) + count
+
+        # 휴리스틱 후보는 전체 코퍼스에서 여러 번 언급된 것만 채택 (일회성 대문자 구절 노이즈 제거)
+        for name, count in heuristic_mentions.items():
+            if count < self.min_heuristic_mentions:
+                continue
+            key = self._candidate_key(name)
+            display_names.setdefault(key, name)
+            mentions[key] = mentions.get(key, 0) + count
+
+        # DB에 없는 새 후보가 채택된 페이지만 처리된 것으로 보고, 나머지는 잔여 페이지로 분류.
+        # DB 항목만 언급한 페이지는 그 후보들이 이후 DB 중복 확인에서 모두 제외되므로, 한 번만 언급된 새 프로그램을 LLM이 찾도록 잔여로 보냄
+        def has_new_candidate(known: Dict[str, int], heuristic: Dict[str, int]) -> bool:
+            if any(self._candidate_key(name) not in self._known_keys for name in known):
+                return True
+            return any(heuristic_mentions[name] >= self.min_heuristic_mentions and self._candidate_key(name) not in self._known_keys
+                       for name in heuristic)
+
+        residual_pages = [page for page, known, heuristic in page_results if not has_new_candidate(known, heuristic)]
+
+        candidates = [display_names[key] for key in sorted(display_names, key=lambda k: -mentions[k])]
+        logging.info(f"Local pre-extraction: {len(candidates)} candidates from {len(pages)} pages ({len(residual_pages)} residual pages, vocabulary {self.vocabulary_size}).")
+        return candidates, residual_pages
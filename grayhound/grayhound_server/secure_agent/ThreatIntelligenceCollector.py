@@ -6,18 +6,46 @@ import logging
 import time
 import re
 import asyncio
+import configparser
 import copy # 딕셔너리 복사를 위해 임포트
+import hashlib
 from typing import List, Dict, Any, Callable, Optional
 
 # 프로젝트에 필요한 모듈 임포트
-from google_ai_client import generate_text
-from GoogleSearch_Grayhound import search_and_extract_text
+from google_ai_client import agenerate_text, get_client_stats, MODEL_NAME, LLMError, LLMCircuitOpenError, LLMConfigError
+from GoogleSearch_Grayhound import asearch_and_extract_pages, get_page_cache_stats, get_search_cache_stats
 import database # 중앙 DB 관리 모듈 임포트
+from llm_scheduler import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+import llm_metrics
+from llm_metrics import TAG_QUERY_GENERATION, TAG_EXTRACTION, TAG_PHASE1, TAG_PHASE2
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import mask_name
+from utils import mask_name, normalize_program_name, verdict_cache_key, extract_brand_keywords
+from json_utils import extract_json, extract_json_array
+from snippet_selector import build_terms, select_snippets
+from secure_agent.CandidatePreExtractor import CandidatePreExtractor
+from secure_agent.CandidatePreClassifier import CandidatePreClassifier, DECISION_PROTECTED, DECISION_INHERIT
+
+# --- 설정 로드 ---
+config = configparser.ConfigParser()
+config.read(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini'))
+
+# LLM 후보 추출 범위: residual(로컬 추출기가 후보를 찾지 못한 페이지만), full(모든 페이지), off(로컬 추출만 사용)
+LLM_EXTRACTION_MODE = config.get('COLLECTOR', 'llm_extraction', fallback='residual').strip().lower()
+# 로컬 분류기가 후보를 기존 DB 항목의 변형으로 판단하는 최소 신뢰도 (1.0 초과로 설정하면 비활성화)
+SIMILARITY_THRESHOLD = config.getfloat('COLLECTOR', 'similarity_threshold', fallback=0.85)
+# 지연 보강 모드: DB 업데이트 시 Phase 2를 건너뛰고, 스캔에서 자주 탐지된 항목부터 백그라운드에서 보강
+LAZY_ENRICHMENT = config.getboolean('COLLECTOR', 'lazy_enrichment', fallback=False)
+ENRICHMENT_INTERVAL_SECONDS = config.getfloat('COLLECTOR', 'enrichment_interval_seconds', fallback=60)
+ENRICHMENT_BATCH_SIZE = config.getint('COLLECTOR', 'enrichment_batch_size', fallback=5)
+ENRICHMENT_MAX_ATTEMPTS = 3  # 보강에 연속으로 실패하면 보류 상태를 해제하고 기본 정보만 유지
+
+# 수집 작업 체크포인트: 같은 쿼리로 다시 실행하면 이 기간 안에 시작되어 중단된 작업을 이어서 진행
+JOB_RESUME_MAX_AGE = 7 * 24 * 3600
+JOB_MAX_RESUMES = 5         # 이 횟수만큼 재개해도 끝나지 않은 작업은 포기하고 새로 수집
+JOB_LEASE_SECONDS = 30 * 60 # running 작업이 이 시간 동안 체크포인트를 남기지 않으면 비정상 종료된 것으로 보고 재개
 
 # --- 로깅 설정 ---
 logging.basicConfig(
@@ -26,40 +54,148 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# 검색 쿼리 생성 캐시: (국가, OS, 프롬프트 버전)별로 생성 결과를 재사용
+QUERY_PROMPT_VERSION = "queries-v1"
+QUERY_CACHE_TTL = config.getfloat('COLLECTOR', 'query_cache_ttl_hours', fallback=7 * 24) * 3600
+
+# 웹 수집 문자 예산: 예산만큼 텍스트가 모이면 남은 검색/페이지 요청을 취소
+SINGLE_EVAL_COLLECT_CHAR_BUDGET = 40000  # 단일 프로그램 평가에서 발췌 대상으로 수집하는 최대 문자 수
+# 단일 프로그램 평가 프롬프트에 포함하는 최대 문자 수 (수집한 페이지에서 프로그램명/브랜드 키워드 주변을 골라 채움)
+SINGLE_EVAL_CHAR_BUDGET = config.getint('COLLECTOR', 'single_eval_char_budget', fallback=4000)
+# DB 업데이트 수집량 상한 (0이면 제한 없음: 로컬 추출기는 LLM 청크 상한과 무관하게 모든 페이지를 사용)
+CRAWL_CHAR_BUDGET = config.getint('COLLECTOR', 'crawl_char_budget', fallback=0) or None
+
+# Phase 1 배치 평가 시 한 번의 요청에 포함할 후보 수
+PHASE1_BATCH_SIZE = 8
+
+# 후보 추출(map-reduce) 설정: 수집된 페이지를 청크로 나눠 병렬로 추출한 뒤 병합
+EXTRACTION_CHUNK_SIZE = 12000  # 한 번의 추출 요청에 포함할 최대 문자 수
+EXTRACTION_MAX_CHUNKS = 24     # 한 번의 수집에서 LLM으로 보낼 최대 청크 수 (비용 상한)
+
+# verdict 캐시 설정: 프롬프트 버전을 올리면 이전 버전으로 생성된 verdict는 무시됨
+PHASE1_PROMPT_VERSION = "phase1-v1"
+SINGLE_EVAL_PROMPT_VERSION = "single-eval-v1"
+VERDICT_PROMPT_VERSIONS = [PHASE1_PROMPT_VERSION, SINGLE_EVAL_PROMPT_VERSION]
+POSITIVE_VERDICT_TTL = 30 * 24 * 3600  # 블로트웨어로 판단된 후보 (30일)
+NEGATIVE_VERDICT_TTL = 14 * 24 * 3600  # 안전하다고 판단된 후보 (14일)
+
+# LLM 응답 스키마: JSON mode를 지원하는 모델에는 responseSchema로 전달되고, 응답 파싱 시 검증에도 사용
+QUERY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "known_bloatware_queries": {"type": "array", "items": {"type": "string"}},
+        "general_search_queries": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["known_bloatware_queries", "general_search_queries"],
+}
+PHASE1_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "program_name": {"type": "string"},
+        "risk_score": {"type": "integer", "minimum": 0, "maximum": 10},
+        "reason": {"type": "string"},
+        "generic_name": {"type": "string"},
+    },
+    "required": ["program_name", "risk_score", "reason", "generic_name"],
+}
+PHASE1_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"input_name": {"type": "string"}, **PHASE1_SCHEMA["properties"]},
+        "required": ["input_name"] + PHASE1_SCHEMA["required"],
+    },
+}
+ENHANCED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **PHASE1_SCHEMA["properties"],
+        "publisher": {"type": "string"},
+        "brand_keywords": {"type": "array", "items": {"type": "string"}},
+        "alternative_names": {"type": "array", "items": {"type": "string"}},
+        "process_names": {"type": "string"},
+    },
+    "required": ["program_name", "risk_score"],
+}
+CANDIDATE_LIST_SCHEMA = {"type": "array", "items": {"type": "string"}}
+# 배열/객체 형태만 확인하는 느슨한 스키마 (요소별 검증은 _validate_basic_evaluation이 담당)
+ANY_OBJECT_SCHEMA = {"type": "object"}
+
+# Phase 1 평가 루브릭 (단일/배치 프롬프트 공통)
+PHASE1_RUBRIC = """- `program_name`: The official name of the program.
+        - `risk_score`: An integer score from 0 to 10.
+          - 10: Malicious (Malware, Spyware, Trojan). Demands immediate removal.
+          - 8-9: High-Risk Bloatware (Aggressive adware, browser hijackers, keyloggers). Strongly recommend removal.
+          - 6-7: Common Bloatware/PUP (Pre-installed software with high resource usage, unwanted toolbars, security software known to cause performance issues). Recommended for removal for system optimization.
+          - 4-5: Low-Risk Bloatware (OEM utilities with minor impact, rarely used but safe). User's discretion.
+          - 1-3: Legitimate Software (Well-known applications like office suites, browsers, drivers from major vendors). Do not recommend removal.
+          - 0: Essential System Component (e.g., from Microsoft for Windows, critical drivers). MUST NOT be removed.
+        - `reason`: A brief, specific reason for the risk score.
+        - `generic_name`: A generic name for the program.
+
+        **REASON FIELD RULE**: In the 'reason' field, DO NOT repeat the program's name. Instead, use placeholders like '[This program]' or '[The software]'.
+
+        **CRITICAL**: If the program is a vital system component, assign `risk_score` = 0.
+"""
+
+def _is_endpoint_failure(error: LLMError) -> bool:
+    """항목과 무관한 엔드포인트/설정 문제(장애, 서킷 열림, API 키 누락)인지 확인. 이런 실패는 나중에 다시 시도하면 성공할 수 있음"""
+    return error.retryable or isinstance(error, (LLMCircuitOpenError, LLMConfigError))
+
 class ThreatIntelligenceCollector:
     """외부 정보원으로부터 위협 인텔리전스를 수집, 분석하고 DB에 저장"""
     """Two-Phase 위협 인텔리전스 수집기: 1차 기본정보 수집 → 2차 상세정보 보강"""
 
     def _extract_brand_keywords(self, program_name: str, publisher: str = "") -> List[str]:
         """프로그램명과 게시자명에서 브랜드 키워드를 추출"""
-        keywords = set()
-        
-        # 프로그램명에서 키워드 추출
-        if program_name:
-            # 공백, 하이픈, 언더스코어로 분리
-            words = re.split(r'[\s\-_]+', program_name.lower())
-            for word in words:
-                # 버전 번호, 비트 정보 제거
-                clean_word = re.sub(r'(x86|x64|32bit|64bit|32비트|64비트|v?\d+\.?\d*)', '', word)
-                if len(clean_word) >= 3:  # 3글자 이상만 키워드로 사용
-                    keywords.add(clean_word)
-        
-        # 게시자명에서 키워드 추출
-        if publisher:
-            pub_words = re.split(r'[\s\-_\.]+', publisher.lower())
-            for word in pub_words:
-                clean_word = re.sub(r'(inc|corp|corporation|ltd|limited|co|company)', '', word)
-                if len(clean_word) >= 3:
-                    keywords.add(clean_word)
-        
-        # 불용어 제거
-        stopwords = {'the', 'and', 'for', 'with', 'software', 'program', 'application', 'app', 'tool', 'suite', 'service', 'system', 'windows', 'microsoft'}
-        keywords = keywords - stopwords
-        
-        return list(keywords)
+        return extract_brand_keywords(program_name, publisher)
+
+    def _verdict_key(self, program_name: str) -> str:
+        """verdict 캐시 및 DB 중복 확인에 사용하는 후보명 키 (에디션이 다르면 다른 키)"""
+        return verdict_cache_key(program_name)
+
+    def _make_verdict(self, program_name: str, evaluation: Dict[str, Any], prompt_version: str) -> Dict[str, Any]:
+        """평가 결과로부터 verdict 캐시 문서를 생성 (위험도 4점 이상: positive, 미만: negative)"""
+        is_positive = evaluation.get("risk_score", 0) >= 4
+        verdict = {
+            "key": self._verdict_key(program_name),
+            "program_name": program_name,
+            "verdict": "positive" if is_positive else "negative",
+            "risk_score": evaluation.get("risk_score", 0),
+            "model": MODEL_NAME,
+            "prompt_version": prompt_version,
+            "ttl_seconds": POSITIVE_VERDICT_TTL if is_positive else NEGATIVE_VERDICT_TTL,
+        }
+        if is_positive:
+            verdict["result"] = evaluation
+        return verdict
+
+    async def _load_known_threat_index(self, threats: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """threat_intelligence에 이미 저장된 항목을 정규화된 이름(프로그램명, generic명, 대체명) 기준으로 색인"""
+        if threats is None:
+            threats = await database.async_get_all_threats()
+        index = {}
+        for threat in threats:
+            names = [threat.get("program_name"), threat.get("generic_name")] + list(threat.get("alternative_names") or [])
+            for name in names:
+                if isinstance(name, str) and name.strip():
+                    index.setdefault(self._verdict_key(name), threat)
+        return index
+
+    def _query_cache_key(self, country: str, os_type: str) -> str:
+        """쿼리 캐시 키 (대소문자/공백 차이는 같은 환경으로 취급)"""
+        normalize = lambda value: re.sub(r'\s+', ' ', value).strip().lower()
+        return f"{normalize(country)}|{normalize(os_type)}|{QUERY_PROMPT_VERSION}"
+
+    async def generate_dynamic_queries(self, country: str, os_type: str, force_refresh: bool = False) -> Dict[str, List[str]]:
+        """1단계: 사용자 입력을 기반으로 LLM을 사용하여 동적 쿼리를 생성 (캐시에 유효한 결과가 있으면 재사용)"""
+        cache_key = self._query_cache_key(country, os_type)
+        if not force_refresh:
+            cached_queries = await database.async_get_cached_queries(cache_key)
+            if cached_queries:
+                logging.info(f"Using cached search queries for '{country}' / '{os_type}'.")
+                return cached_queries
 
-    async def generate_dynamic_queries(self, country: str, os_type: str) -> Dict[str, List[str]]:
-        """1단계: 사용자 입력을 기반으로 LLM을 사용하여 동적 쿼리를 생성"""
         logging.info(f"'{country}'의 '{os_type}' 환경에 맞는 동적 쿼리 생성을 시작합니다.")
         
         prompt = f"""
@@ -149,16 +285,18 @@ class ThreatIntelligenceCollector:
         }}
         """
         
-        response_text = generate_text(prompt, temperature=0.2)
-        logging.info("Google AI Studio API response received.")
+        try:
+            # 사용자가 쿼리 생성을 기다리고 있으므로 interactive 우선순위로 호출
+            response_text = await agenerate_text(prompt, temperature=0.2, priority=PRIORITY_INTERACTIVE, response_schema=QUERY_SCHEMA, tag=TAG_QUERY_GENERATION)
+        except LLMError as e:
+            logging.error(f"LLM call failed during query generation: {type(e).__name__}: {e}")
+            return {}
         
         try:
             # --- ✅ 안정적인 JSON 추출 로직 ---
-            # 정규식을 사용하여 응답에서 JSON 객체 부분만 정확히 추출.
-            match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-                queries = json.loads(json_str)
+            # 괄호 깊이를 추적하는 추출기로 응답에서 스키마를 만족하는 JSON 객체만 추출.
+            queries = extract_json(response_text, QUERY_SCHEMA)
+            if queries is not None:
                 # 로그 출력을 위해 마스킹된 쿼리 사본 생성
                 queries_for_log = copy.deepcopy(queries)
                 if "known_bloatware_queries" in queries_for_log:
@@ -168,6 +306,10 @@ class ThreatIntelligenceCollector:
                 
                 # 마스킹된 버전으로 로그 출력
                 logging.info(f"Successfully parsed and generated dynamic queries: {queries_for_log}")
+
+                # 두 쿼리 목록이 모두 정상적으로 생성된 경우에만 캐시에 저장
+                if all(isinstance(queries.get(field), list) and queries.get(field) for field in ("known_bloatware_queries", "general_search_queries")):
+                    await database.async_save_cached_queries(cache_key, country, os_type, QUERY_PROMPT_VERSION, queries, QUERY_CACHE_TTL)
                 
                 # 실제 로직에서는 원본 쿼리 반환
                 return queries
@@ -175,15 +317,12 @@ class ThreatIntelligenceCollector:
                 logging.error(f"Could not find a valid JSON object in the response. Full Response: {response_text}")
                 return {}
                 
-        except json.JSONDecodeError as e:
-            logging.error(f"Failed to parse the extracted JSON string: {e} - Extracted String: '{json_str}' - Full Response: {response_text}")
-            return {}
         except Exception as e:
             logging.error(f"An unexpected error occurred during query generation: {e}")
             return {}
         
-    async def _enhance_threat_metadata(self, basic_threat_data: Dict[str, Any]) -> Dict[str, Any]:
-        """2단계: 기본 정보를 보강하여 위협 메타데이터 생성"""
+    async def _enhance_threat_metadata(self, basic_threat_data: Dict[str, Any], priority: int = PRIORITY_BACKGROUND, raise_llm_errors: bool = False) -> Dict[str, Any]:
+        """2단계: 기본 정보를 보강하여 위협 메타데이터 생성 (raise_llm_errors=True이면 LLM 호출 실패 시 기본 정보 대신 LLMError를 그대로 발생)"""
         program_name = basic_threat_data['program_name']
         
         if not program_name:
@@ -231,13 +370,17 @@ class ThreatIntelligenceCollector:
         }}
         """
         
-        response_text = generate_text(enhancement_prompt, temperature=0.1)
+        try:
+            response_text = await agenerate_text(enhancement_prompt, temperature=0.1, priority=priority, response_schema=ENHANCED_SCHEMA, tag=TAG_PHASE2)
+        except LLMError as e:
+            if raise_llm_errors:
+                raise
+            logging.error(f"LLM call failed while enhancing '{program_name}'. Using basic data: {type(e).__name__}: {e}")
+            return basic_threat_data
         
         try:
-            match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if match:
-                enhanced_data = json.loads(match.group(0))
-                
+            enhanced_data = extract_json(response_text, ENHANCED_SCHEMA)
+            if enhanced_data is not None:
                 # 브랜드 키워드가 없거나 비어있으면 자동 생성
                 if not enhanced_data.get("brand_keywords"):
                     enhanced_data["brand_keywords"] = self._extract_brand_keywords(
@@ -251,23 +394,87 @@ class ThreatIntelligenceCollector:
                 logging.warning(f"Could not enhance metadata for '{program_name}'. Using basic data.")
                 return basic_threat_data
                 
-        except (json.JSONDecodeError, AttributeError) as e:
+        except AttributeError as e:
             logging.error(f"Failed to parse enhanced metadata for '{program_name}': {e}")
             return basic_threat_data        
+
+    def _make_pending_entry(self, basic_threat_data: Dict[str, Any]) -> Dict[str, Any]:
+        """지연 보강 모드: Phase 2 없이 저장할 항목 생성 (보강 전까지는 프로그램명/generic명으로만 스캔 매칭)"""
+        entry = dict(basic_threat_data)
+        entry["pending_enrichment"] = True
+        entry["enrichment_hits"] = 0
+        return entry
+
+    async def enrich_pending_threats(self, limit: int = ENRICHMENT_BATCH_SIZE) -> int:
+        """보강이 보류된 항목을 스캔 탐지 횟수가 많은 순으로 Phase 2 보강. 보강에 성공한 항목 수를 반환"""
+        pending = await database.async_get_pending_enrichment(limit)
+        enriched = 0
+        for entry in pending:
+            program_name = entry["program_name"]
+            basic_data = {k: v for k, v in entry.items() if k not in ("pending_enrichment", "enrichment_hits", "enrichment_attempts", "masked_name")}
+            try:
+                enhanced_data = await self._enhance_threat_metadata(basic_data, raise_llm_errors=True)
+            except LLMError as e:
+                if _is_endpoint_failure(e):
+                    # 엔드포인트 장애(서킷 열림, 재시도 후에도 5xx/429/타임아웃)는 항목의 문제가 아니므로 시도 횟수에 넣지 않고 남은 항목은 다음 주기에 처리
+                    logging.warning(f"Lazy enrichment paused, the LLM endpoint is unavailable: {type(e).__name__}: {e}")
+                    break
+                logging.error(f"LLM call failed while enriching '{program_name}': {type(e).__name__}: {e}")
+                enhanced_data = basic_data
+
+            if enhanced_data is basic_data:
+                # 요청 거절이나 응답 파싱 실패는 항목별 시도 횟수로 집계 (_enhance_threat_metadata는 파싱 실패 시 입력을 그대로 반환)
+                attempts = entry.get("enrichment_attempts", 0) + 1
+                await database.async_update_threats([{
+                    "program_name": program_name,
+                    "enrichment_attempts": attempts,
+                    "pending_enrichment": attempts < ENRICHMENT_MAX_ATTEMPTS,
+                }])
+                continue
+
+            # 같은 문서를 갱신하도록 프로그램명은 유지
+            enhanced_data["program_name"] = program_name
+            enhanced_data["masked_name"] = mask_name(program_name)
+            enhanced_data["pending_enrichment"] = False
+            await database.async_update_threats([enhanced_data])
+            enriched += 1
+            logging.info(f"Lazy enrichment completed for '{program_name}' (scan hits: {entry.get('enrichment_hits', 0)})")
+        return enriched
         
-    async def evaluate_single_program(self, program_name: str, progress_emitter: Optional[Callable[[str, Any], None]] = None) -> Optional[Dict[str, Any]]:
-        """(DB Viewer 상에서) 단일 프로그램명에 대한 구글 검색 및 LLM 평가를 수행하여 블로트웨어 여부를 판단"""
+    async def evaluate_single_program(self, program_name: str, progress_emitter: Optional[Callable[[str, Any], None]] = None, use_verdict_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """(DB Viewer 상에서) 단일 프로그램명에 대한 구글 검색 및 LLM 평가를 수행하여 블로트웨어 여부를 판단
+        - DB에 이미 있거나 verdict 캐시에 유효한 판단이 남아있으면 LLM을 호출하지 않음"""
         if not program_name:
             return None
         
+        if use_verdict_cache:
+            key = self._verdict_key(program_name)
+            known_threat = (await self._load_known_threat_index()).get(key)
+            if known_threat:
+                logging.info(f"-> '{program_name}' is already stored in the threat DB. Skipping evaluation.")
+                return known_threat
+
+            cached = (await database.async_get_verdicts([key], MODEL_NAME, VERDICT_PROMPT_VERSIONS)).get(key)
+            if cached and cached.get("verdict") == "negative":
+                logging.info(f"-> Verdict cache hit for '{program_name}': safe (Risk Score: {cached.get('risk_score')}).")
+                if progress_emitter:
+                    progress_emitter(f"ℹ️ '{mask_name(program_name)}' was previously evaluated as safe.", "detail")
+                return None
+            if cached and cached.get("result"):
+                logging.info(f"-> Verdict cache hit for '{program_name}': bloatware (Risk Score: {cached.get('risk_score')}).")
+                if progress_emitter:
+                    progress_emitter(f"✅ '{mask_name(program_name)}' was previously evaluated as bloatware (Risk Score: {cached.get('risk_score')}).", "detail")
+                return cached["result"]
+        
         if progress_emitter:
             progress_emitter(f"Searching and evaluating '{mask_name(program_name)}'...", None)
         
-        # 1. 구글 검색으로 정보 수집
+        # 1. 구글 검색으로 정보 수집 후, 프로그램명/브랜드 키워드가 등장하는 부분을 관련도 순으로 발췌
         search_query = f'"{program_name}"'
-        extracted_text = await asyncio.to_thread(
-            search_and_extract_text, [search_query], num_results_per_query=3
-        )
+        extracted_pages = await asearch_and_extract_pages([search_query], num_results_per_query=3, char_budget=SINGLE_EVAL_COLLECT_CHAR_BUDGET, dedup=True)
+        terms = build_terms(program_name, normalize_program_name(program_name), self._extract_brand_keywords(program_name))
+        extracted_text = await asyncio.to_thread(select_snippets, extracted_pages, terms, SINGLE_EVAL_CHAR_BUDGET)
+        logging.info(f"Selected {len(extracted_text)} of {sum(len(page) for page in extracted_pages)} collected chars for '{mask_name(program_name)}'.")
         
         if not extracted_text:
             if progress_emitter:
@@ -282,7 +489,7 @@ class ThreatIntelligenceCollector:
         Software Name: "{program_name}"
         The following text was collected from web searches about this software:
         ---
-        {extracted_text[:8000]}
+        {extracted_text}
         ---
         Please evaluate this software based on the text and provide a risk score and reason in a JSON object.
         - `program_name`: The official name of the program.
@@ -300,46 +507,255 @@ class ThreatIntelligenceCollector:
         Return only the raw JSON object.
         """
         
-        eval_response_text = generate_text(basic_evaluation_prompt, temperature=0.2)
-
         try:
-            match = re.search(r'\{.*\}', eval_response_text, re.DOTALL)
-            if match:
-                basic_evaluation_data = json.loads(match.group(0))
+            eval_response_text = await agenerate_text(basic_evaluation_prompt, temperature=0.2, priority=PRIORITY_INTERACTIVE, response_schema=PHASE1_SCHEMA, tag=TAG_PHASE1)
+        except LLMError as e:
+            logging.error(f"LLM call failed while evaluating '{program_name}': {type(e).__name__}: {e}")
+            if progress_emitter:
+                progress_emitter(f"❌ AI service is currently unavailable. Please try again later. ({type(e).__name__})", "error")
+            return None
+
+        basic_evaluation_data = self._validate_basic_evaluation(extract_json(eval_response_text, ANY_OBJECT_SCHEMA))
+        if basic_evaluation_data:
+            # 위험도 4점 이상인 경우에만 진행
+            if basic_evaluation_data.get("risk_score", 0) >= 4:
+                # 3. 2차 메타데이터 보강
+                if progress_emitter:
+                    progress_emitter(f"🔍 Enhancing metadata for '{mask_name(program_name)}'...", None)
                 
-                # 위험도 4점 이상인 경우에만 진행
-                if basic_evaluation_data.get("risk_score", 0) >= 4:
-                    # 3. 2차 메타데이터 보강
-                    if progress_emitter:
-                        progress_emitter(f"🔍 Enhancing metadata for '{mask_name(program_name)}'...", None)
-                    
-                    enhanced_data = await self._enhance_threat_metadata(basic_evaluation_data)
-                    enhanced_data["masked_name"] = mask_name(enhanced_data["program_name"])
-                    
-                    logging.info(f"-> Enhanced evaluation completed for '{mask_name(program_name)}': Risk Score {enhanced_data['risk_score']}")
-                    if progress_emitter:
-                        progress_emitter(f"✅ '{mask_name(program_name)}' is considered as bloatware (Risk Score: {enhanced_data['risk_score']}).", "detail")
-                    return enhanced_data
-                else:
-                    logging.info(f"-> Program '{program_name}' is considered safe (Risk Score: {basic_evaluation_data.get('risk_score', 0)}).")
-                    if progress_emitter:
-                        progress_emitter(f"ℹ️ '{mask_name(program_name)}' is considered as safe.", "detail")
-                    return None
-        except (json.JSONDecodeError, AttributeError):
+                enhanced_data = await self._enhance_threat_metadata(basic_evaluation_data, priority=PRIORITY_INTERACTIVE)
+                enhanced_data["masked_name"] = mask_name(enhanced_data["program_name"])
+                await database.async_save_verdicts([self._make_verdict(program_name, enhanced_data, SINGLE_EVAL_PROMPT_VERSION)])
+                
+                logging.info(f"-> Enhanced evaluation completed for '{mask_name(program_name)}': Risk Score {enhanced_data['risk_score']}")
+                if progress_emitter:
+                    progress_emitter(f"✅ '{mask_name(program_name)}' is considered as bloatware (Risk Score: {enhanced_data['risk_score']}).", "detail")
+                return enhanced_data
+            else:
+                await database.async_save_verdicts([self._make_verdict(program_name, basic_evaluation_data, SINGLE_EVAL_PROMPT_VERSION)])
+                logging.info(f"-> Program '{program_name}' is considered safe (Risk Score: {basic_evaluation_data.get('risk_score', 0)}).")
+                if progress_emitter:
+                    progress_emitter(f"ℹ️ '{mask_name(program_name)}' is considered as safe.", "detail")
+                return None
+        else:
             logging.error(f"Failed to parse evaluation for '{program_name}': {eval_response_text}")
             if progress_emitter:
                 progress_emitter(f"❌ AI analysis failed for '{mask_name(program_name)}'", "error")
         return None
     
-    async def scrape_community_info(self, search_queries: Dict[str, List[str]], progress_emitter: Optional[Callable[[str, Any], None]] = None):
-        """커뮤니티와 포럼을 검색하여 블로트웨어 정보를 수집하고 AI로 평가 (콜백 추가)
-        - Known bloatware 중심으로 정보를 수집하고 AI로 평가"""
-        if not search_queries:
-            logging.warning("Because the search queries are empty, the scraping process is terminated.")
-            if progress_emitter:
-                progress_emitter("No search queries provided. Aborting.", "error")
-            return
-        
+    def _build_phase1_prompt(self, program_name: str) -> str:
+        """Phase 1 단일 프로그램 평가 프롬프트 생성"""
+        return f"""
+        Software Name: "{program_name}"
+
+        Please evaluate this software and provide a risk score and reason in a JSON object.
+        {PHASE1_RUBRIC}
+        Return only the JSON object.
+        """
+
+    def _build_phase1_batch_prompt(self, program_names: List[str]) -> str:
+        """Phase 1 배치 평가 프롬프트 생성 (공통 루브릭은 한 번만 포함)"""
+        return f"""
+        Software Names (JSON array): {json.dumps(program_names, ensure_ascii=False)}
+
+        Please evaluate EACH software in the list above and provide a risk score and reason for each one.
+        For every software, return a JSON object with the following fields:
+        - `input_name`: The software name EXACTLY as it appears in the input list (copy it verbatim).
+        {PHASE1_RUBRIC}
+        Evaluate every software independently. Do not skip any item and do not merge items.
+
+        Return only a single JSON array containing exactly {len(program_names)} objects, one per input name, in the same order.
+        """
+
+    def _validate_basic_evaluation(self, data: Any) -> Optional[Dict[str, Any]]:
+        """Phase 1 평가 결과 요소를 개별적으로 검증하여 정상 요소만 반환"""
+        if not isinstance(data, dict):
+            return None
+
+        program_name = data.get("program_name")
+        if not isinstance(program_name, str) or not program_name.strip():
+            return None
+
+        try:
+            risk_score = int(data.get("risk_score"))
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= risk_score <= 10:
+            return None
+
+        validated = {k: v for k, v in data.items() if k != "input_name"}
+        validated["program_name"] = program_name.strip()
+        validated["risk_score"] = risk_score
+        validated.setdefault("reason", "")
+        validated.setdefault("generic_name", program_name.strip().lower())
+        return validated
+
+    async def _evaluate_phase1_single(self, program_name: str) -> Optional[Dict[str, Any]]:
+        """Phase 1: 단일 프로그램 기본 평가 (배치 파싱 실패 시 폴백용)
+        - 응답 파싱 실패 시 None, LLM 호출 실패 시 LLMError 발생"""
+        response_text = await agenerate_text(self._build_phase1_prompt(program_name), temperature=0.3, response_schema=PHASE1_SCHEMA, tag=TAG_PHASE1)
+
+        evaluation = self._validate_basic_evaluation(extract_json(response_text, ANY_OBJECT_SCHEMA))
+        if evaluation is None:
+            logging.warning(f"'{program_name}' Evaluation response did not contain a valid JSON object.")
+        return evaluation
+
+    async def _evaluate_phase1_batch(self, program_names: List[str]) -> tuple[Dict[str, Optional[Dict[str, Any]]], List[str]]:
+        """Phase 1: N개 프로그램을 한 번의 요청으로 평가하고 입력명 기준으로 결과를 매핑
+        - 배열의 각 요소는 개별적으로 검증되며, 파싱/검증에 실패한 요소만 단일 프롬프트로 재평가
+        - (결과, 엔드포인트 장애로 평가하지 못한 이름 목록)을 반환. 서킷 브레이커가 열리면 LLMCircuitOpenError 발생
+        - 다시 호출해도 같은 결과가 나올 실패(요청 거절, 안전 차단, 응답 형식 오류)는 결과를 None으로 두어 건너뛰도록 함"""
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        llm_failed: List[str] = []
+
+        response_text = ""
+        if len(program_names) > 1:
+            try:
+                response_text = await agenerate_text(self._build_phase1_batch_prompt(program_names), temperature=0.3, response_schema=PHASE1_BATCH_SCHEMA, tag=TAG_PHASE1)
+            except LLMCircuitOpenError:
+                raise
+            except LLMError as e:
+                logging.error(f"LLM call failed for batch evaluation of {len(program_names)} items: {type(e).__name__}: {e}")
+                if _is_endpoint_failure(e):
+                    return results, list(program_names)
+                # 배치 요청 자체가 거절되면 항목별 단일 프롬프트로 평가
+
+        elements = []
+        if response_text:
+            # 출력이 잘린 경우에도 완성된 요소는 살릴 수 있도록 배열에서 완성된 요소만 꺼내 개별 검증
+            elements = extract_json_array(response_text)
+
+        # 입력명 기준으로 결과 매핑 (대소문자 무시 보조 매칭)
+        lookup = {name.lower(): name for name in program_names}
+        for element in elements:
+            if not isinstance(element, dict):
+                continue
+            input_name = element.get("input_name")
+            if not isinstance(input_name, str):
+                continue
+            original_name = lookup.get(input_name.strip().lower())
+            if not original_name or results.get(original_name):
+                continue
+            results[original_name] = self._validate_basic_evaluation(element)
+
+        # 누락되었거나 검증에 실패한 요소만 단일 프롬프트로 폴백
+        failed_names = [name for name in program_names if not results.get(name)]
+        if failed_names and len(program_names) > 1:
+            logging.info(f"Batch evaluation: {len(program_names) - len(failed_names)}/{len(program_names)} parsed, falling back to single prompts for {len(failed_names)} items.")
+        for name in failed_names:
+            try:
+                results[name] = await self._evaluate_phase1_single(name)
+            except LLMCircuitOpenError:
+                raise
+            except LLMError as e:
+                logging.error(f"LLM call failed for '{name}': {type(e).__name__}: {e}")
+                if _is_endpoint_failure(e):
+                    llm_failed.append(name)
+                else:
+                    results[name] = None
+
+        return results, llm_failed
+
+    def _chunk_corpus(self, pages: List[str], chunk_size: int = EXTRACTION_CHUNK_SIZE) -> List[str]:
+        """페이지 목록을 중복 제거된 chunk_size 이하의 청크로 분할 (작은 페이지는 하나의 청크로 묶음)"""
+        seen = set()
+        pieces = []
+        for page in pages:
+            text = page.strip()
+            fingerprint = hashlib.sha1(re.sub(r'\s+', ' ', text.lower()).encode('utf-8')).hexdigest()
+            if not text or fingerprint in seen:
+                continue  # 같은 내용의 페이지(미러, 중복 URL)는 한 번만 사용
+            seen.add(fingerprint)
+
+            # 긴 페이지는 단어 경계에서 chunk_size 단위로 자름
+            while len(text) > chunk_size:
+                cut = text.rfind(' ', 0, chunk_size)
+                if cut <= chunk_size // 2:
+                    cut = chunk_size
+                pieces.append(text[:cut].strip())
+                text = text[cut:].strip()
+            if text:
+                pieces.append(text)
+
+        chunks = []
+        current = ""
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > chunk_size:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _extract_candidates_from_chunk(self, chunk: str) -> List[str]:
+        """청크 하나에서 프로그램 이름 후보를 추출 (map 단계)"""
+        extraction_prompt = f"""
+        Analyze the following text which is collected from various websites about 'programs that can be deleted' or 'bloatware'.
+        Extract all potential software or program names.
+        Return the result as a single JSON array formatted like this: ["Program Name 1", "Program Name 2", ...].
+        Provide only the JSON array in your response.
+
+        --- Text Start ---
+        {chunk}
+        --- Text End ---
+        """
+        response_text = await agenerate_text(extraction_prompt, temperature=0.1, response_schema=CANDIDATE_LIST_SCHEMA, tag=TAG_EXTRACTION)
+        # 문자열이 아닌 요소는 병합 단계에서 걸러지므로 배열 형태만 확인 (잘린 배열은 완성된 요소만 사용)
+        return extract_json_array(response_text)
+
+    def _merge_candidate_names(self, candidate_lists: List[List[Any]]) -> List[str]:
+        """청크별 후보 목록을 정규화된 이름 기준으로 병합 (reduce 단계). 여러 청크에서 언급된 후보가 앞에 옴"""
+        display_names: Dict[str, str] = {}
+        mentions: Dict[str, int] = {}
+        for candidates in candidate_lists:
+            for name in candidates:
+                if not isinstance(name, str):
+                    continue
+                name = re.sub(r'\s+', ' ', name).strip(' \'"`*-•')
+                if not 2 <= len(name) <= 100:
+                    continue
+                key = self._verdict_key(name)
+                display_names.setdefault(key, name)
+                mentions[key] = mentions.get(key, 0) + 1
+        return [display_names[key] for key in sorted(display_names, key=lambda k: -mentions[k])]
+
+    async def _extract_program_candidates(self, pages: List[str], progress_emitter: Optional[Callable[[str, Any], None]] = None) -> List[str]:
+        """수집된 모든 페이지를 청크로 나눠 병렬로 후보를 추출하고 병합 (동시 실행 수는 LLM 스케줄러가 제한)"""
+        chunks = self._chunk_corpus(pages)
+        if len(chunks) > EXTRACTION_MAX_CHUNKS:
+            logging.warning(f"Corpus produced {len(chunks)} chunks; only the first {EXTRACTION_MAX_CHUNKS} will be analyzed.")
+            chunks = chunks[:EXTRACTION_MAX_CHUNKS]
+        logging.info(f"Extracting candidates from {len(pages)} pages in {len(chunks)} chunks ({sum(len(c) for c in chunks)} chars).")
+        if progress_emitter:
+            progress_emitter(f"Analyzing {len(pages)} pages in {len(chunks)} chunks...", None)
+
+        results = await asyncio.gather(*(self._extract_candidates_from_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        candidate_lists = []
+        failed = 0
+        for result in results:
+            if isinstance(result, LLMError):
+                logging.error(f"LLM call failed during candidate extraction: {type(result).__name__}: {result}")
+                failed += 1
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                candidate_lists.append(result)
+
+        if failed and progress_emitter:
+            progress_emitter(f"⚠️ AI candidate extraction failed for {failed}/{len(chunks)} chunks. Continuing with the rest.", None)
+        return self._merge_candidate_names(candidate_lists)
+
+    def _job_fingerprint(self, search_queries: Dict[str, List[str]]) -> str:
+        """쿼리 목록, 모델, 프롬프트 버전으로 수집 작업을 식별하는 fingerprint 생성"""
+        payload = json.dumps([sorted(search_queries.get("known_bloatware_queries", [])),
+                              sorted(search_queries.get("general_search_queries", [])),
+                              MODEL_NAME, PHASE1_PROMPT_VERSION], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def _collect_candidates(self, search_queries: Dict[str, List[str]], progress_emitter: Optional[Callable[[str, Any], None]] = None) -> Optional[List[str]]:
+        """검색 → 후보 추출 → DB/verdict/로컬 분류 필터링을 거쳐 LLM 평가가 필요한 후보 목록을 반환 (실패 시 None)"""
         # 1. 텍스트 추출: 커뮤니티 검색 쿼리를 사용하여 텍스트 추출
         logging.info("Start extracting text from community websites...")
         known_bloatware_queries = search_queries.get("known_bloatware_queries", [])
@@ -349,127 +765,222 @@ class ThreatIntelligenceCollector:
         if progress_emitter:
             progress_emitter(f"Starting info collection with {len(all_queries)} queries...", None)
         
-        # GoogleSearch_Grayhound 모듈의 함수를 사용하여 텍스트 추출
-        extracted_text_blob = await asyncio.to_thread(
-            search_and_extract_text, all_queries, num_results_per_query=2
-        )
+        # GoogleSearch_Grayhound 모듈의 함수를 사용하여 페이지별 텍스트 추출
+        extracted_pages = await asearch_and_extract_pages(all_queries, num_results_per_query=2, char_budget=CRAWL_CHAR_BUDGET)
 
-        if not extracted_text_blob:
+        if not extracted_pages:
             if progress_emitter:
                 progress_emitter("Could not find any information from the web.", "error")
-            return
+            return None
         if progress_emitter:
-            progress_emitter("Text extraction from web complete. Now asking AI to identify candidates...", None)
+            progress_emitter("Text extraction from web complete. Now identifying candidates...", None)
 
 
-        # 2. 정보 추출: LLM을 사용해 텍스트에서 프로그램 이름 후보군 추출
-        logging.info("Start extracting program names from the collected text using LLM...")
-        extraction_prompt = f"""
-        Analyze the following text which is collected from various websites about 'programs that can be deleted' or 'bloatware'.
-        Extract all potential software or program names.
-        Return the result as a single JSON array formatted like this: ["Program Name 1", "Program Name 2", ...].
-        Provide only the JSON array in your response.
+        # 2. 정보 추출: DB 어휘 기반 로컬 추출기로 후보를 먼저 찾고, 설정에 따라 나머지 텍스트만 LLM으로 추출
+        known_threats = await database.async_get_all_threats()
+        pre_extractor = CandidatePreExtractor(known_threats)
+        local_candidates, residual_pages = await asyncio.to_thread(pre_extractor.extract, extracted_pages)
+        if progress_emitter:
+            progress_emitter(f"Local extractor found {len(local_candidates)} candidates ({len(residual_pages)}/{len(extracted_pages)} pages left for AI).", None)
 
-        --- Text Start ---
-        {extracted_text_blob[:15000]}
-        --- Text End ---
-        """
-        response_text = generate_text(extraction_prompt, temperature=0.1)
+        if LLM_EXTRACTION_MODE == "off":
+            llm_pages = []
+        elif LLM_EXTRACTION_MODE == "full":
+            llm_pages = extracted_pages
+        else:
+            llm_pages = residual_pages
 
-        try:
-            match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            program_candidates = json.loads(match.group(0)) if match else []
-        except (json.JSONDecodeError, AttributeError):
-            logging.error(f"Failed to parse the program name list received from LLM: {response_text}")
-            program_candidates = []
+        llm_candidates = []
+        if llm_pages:
+            logging.info(f"Start extracting program names from {len(llm_pages)} pages using LLM (mode: {LLM_EXTRACTION_MODE})...")
+            llm_candidates = await self._extract_program_candidates(llm_pages, progress_emitter)
+        program_candidates = self._merge_candidate_names([local_candidates, llm_candidates])
 
         if not program_candidates and not known_bloatware_queries:
             if progress_emitter:
                 progress_emitter("AI could not identify any bloatware candidates.", "error")
-            return
+            return None
 
         # 중복 제거 및 하드코딩된 리스트 추가
-        unique_candidates = list(set([p.strip() for p in program_candidates] + known_bloatware_queries))
+        unique_candidates = self._merge_candidate_names([program_candidates, known_bloatware_queries])
         logging.info(f"Extracted and combined bloatware candidates ({len(unique_candidates)} items): {unique_candidates[:10]}...")
 
         if progress_emitter:
             progress_emitter(f"Found {len(unique_candidates)} unique candidates. Starting evaluation...", None)
 
-        # 3. Two-Phase 평가: 1차 기본평가 → 2차 메타데이터 보강
+        # 3. 이미 DB에 있거나 verdict 캐시에 유효한 판단이 남아있는 후보는 LLM 평가에서 제외
+        known_threat_index = await self._load_known_threat_index(known_threats)
+        candidate_keys = {p: self._verdict_key(p) for p in unique_candidates if p and len(p) <= 80}
+        cached_verdicts = await database.async_get_verdicts(list(candidate_keys.values()), MODEL_NAME, VERDICT_PROMPT_VERSIONS)
+
+        valid_candidates = []
+        seen_keys = set()
+        skipped_known, skipped_cached = 0, 0
+        for program_name, key in candidate_keys.items():
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            if key in known_threat_index:
+                skipped_known += 1
+            elif key in cached_verdicts:
+                skipped_cached += 1
+            else:
+                valid_candidates.append(program_name)
+
+        logging.info(f"Skipped {skipped_known} candidates already in the DB and {skipped_cached} candidates with cached verdicts.")
+        if progress_emitter and (skipped_known or skipped_cached):
+            progress_emitter(f"Skipping {skipped_known} known and {skipped_cached} previously evaluated candidates. {len(valid_candidates)} left to evaluate.", None)
+
+        # 로컬 분류: 보호 프로그램은 제외하고, 기존 항목의 변형은 해당 항목의 점수를 물려받아 대체명으로 등록
+        classifier = CandidatePreClassifier(known_threats, SIMILARITY_THRESHOLD)
+        decisions = await asyncio.to_thread(lambda: [(name, classifier.classify(name)) for name in valid_candidates])
+
+        valid_candidates = []
+        inherited_names: Dict[str, List[str]] = {}
+        skipped_protected = 0
+        for program_name, (decision, confidence, matched_threat) in decisions:
+            if decision == DECISION_PROTECTED:
+                skipped_protected += 1
+            elif decision == DECISION_INHERIT:
+                logging.info(f"'{program_name}' inherits the evaluation of '{matched_threat['program_name']}' (confidence {confidence:.2f}).")
+                inherited_names.setdefault(matched_threat["program_name"], []).append(program_name)
+            else:
+                valid_candidates.append(program_name)
+
+        if inherited_names:
+            await database.async_add_alternative_names(inherited_names)
+        inherited_count = sum(len(names) for names in inherited_names.values())
+        logging.info(f"Local classifier: {skipped_protected} protected, {inherited_count} near-duplicates of DB entries, {len(valid_candidates)} new.")
+        if progress_emitter and (skipped_protected or inherited_count):
+            progress_emitter(f"Local classifier: {skipped_protected} protected, {inherited_count} variants of known entries. {len(valid_candidates)} new candidates left for AI.", None)
+
+        return valid_candidates
+
+    async def scrape_community_info(self, search_queries: Dict[str, List[str]], progress_emitter: Optional[Callable[[str, Any], None]] = None, batch_size: int = PHASE1_BATCH_SIZE):
+        """커뮤니티와 포럼을 검색하여 블로트웨어 정보를 수집하고 AI로 평가 (콜백 추가)
+        - Known bloatware 중심으로 정보를 수집하고 AI로 평가
+        - Phase 1은 batch_size개 후보를 한 번의 요청으로 평가
+        - 후보 큐와 항목별 진행 상태를 작업(job)으로 저장하여, 중단되면 같은 쿼리로 다시 실행할 때 이어서 진행"""
+        if not search_queries:
+            logging.warning("Because the search queries are empty, the scraping process is terminated.")
+            if progress_emitter:
+                progress_emitter("No search queries provided. Aborting.", "error")
+            return
+
+        fingerprint = self._job_fingerprint(search_queries)
+        job = await database.async_claim_resumable_job(fingerprint, JOB_RESUME_MAX_AGE, JOB_LEASE_SECONDS, JOB_MAX_RESUMES)
+        if job:
+            # 중단된 작업이 있으면 검색/추출을 건너뛰고 남은 후보부터 평가
+            job_id = job["job_id"]
+            valid_candidates = await database.async_get_job_items(job_id, ["pending"])
+            logging.info(f"Resuming collector job {job_id}: {len(valid_candidates)}/{job.get('total', 0)} candidates left.")
+            if progress_emitter:
+                progress_emitter(f"Resuming the previous update: {job.get('total', 0) - len(valid_candidates)}/{job.get('total', 0)} candidates already processed.", None)
+        else:
+            valid_candidates = await self._collect_candidates(search_queries, progress_emitter)
+            if valid_candidates is None:
+                return
+            job_id = await database.async_create_job(fingerprint, valid_candidates)
+
+        # 4. Two-Phase 평가: 1차 기본평가(배치) → 2차 메타데이터 보강
+        total = len(valid_candidates)
         evaluated_programs = []
-        for i, program_name in enumerate(unique_candidates):
-            if not program_name or len(program_name) > 80: continue
+        for batch_start in range(0, total, batch_size):
+            batch = valid_candidates[batch_start:batch_start + batch_size]
 
             if progress_emitter:
-                masked_display_name = mask_name(program_name)
-                progress_emitter(f"({i+1}/{len(unique_candidates)}) Phase 1: Evaluating '{masked_display_name}'...", None)
-
-            logging.info(f"Phase 1: Basic evaluation for '{program_name}'")
-            
-            # Phase 1: 기본 평가
-            basic_evaluation_prompt = f"""
-            Software Name: "{program_name}"
-
-            Please evaluate this software and provide a risk score and reason in a JSON object.
-            - `program_name`: The official name of the program.
-            - `risk_score`: An integer score from 0 to 10.
-              - 10: Malicious (Malware, Spyware, Trojan). Demands immediate removal.
-              - 8-9: High-Risk Bloatware (Aggressive adware, browser hijackers, keyloggers). Strongly recommend removal.
-              - 6-7: Common Bloatware/PUP (Pre-installed software with high resource usage, unwanted toolbars, security software known to cause performance issues). Recommended for removal for system optimization.
-              - 4-5: Low-Risk Bloatware (OEM utilities with minor impact, rarely used but safe). User's discretion.
-              - 1-3: Legitimate Software (Well-known applications like office suites, browsers, drivers from major vendors). Do not recommend removal.
-              - 0: Essential System Component (e.g., from Microsoft for Windows, critical drivers). MUST NOT be removed.
-            - `reason`: A brief, specific reason for the risk score.
-            - `generic_name`: A generic name for the program.
-          
-            **REASON FIELD RULE**: In the 'reason' field, DO NOT repeat the program's name. Instead, use placeholders like '[This program]' or '[The software]'.
-          
-            **CRITICAL**: If the program is a vital system component, assign `risk_score` = 0.
-
-            Return only the JSON object.
-            """
-            
-            basic_response_text = generate_text(basic_evaluation_prompt, temperature=0.3)
+                progress_emitter(f"({batch_start+1}-{batch_start+len(batch)}/{total}) Phase 1: Evaluating {len(batch)} candidates...", None)
+            logging.info(f"Phase 1: Batch evaluation for {len(batch)} candidates ({batch_start+1}-{batch_start+len(batch)}/{total})")
 
+            # Phase 1: 기본 평가 (N개 후보를 한 번에 평가)
             try:
-                match = re.search(r'\{.*\}', basic_response_text, re.DOTALL)
-                if match:
-                    basic_data = json.loads(match.group(0))
-                    
-                    # 위험도 4점 이상인 경우에만 Phase 2 진행
-                    if basic_data.get("risk_score", 0) >= 4:
+                batch_results, llm_failed = await self._evaluate_phase1_batch(batch)
+            except LLMCircuitOpenError as e:
+                # 엔드포인트가 비정상이면 남은 후보를 헛되이 호출하지 않고 중단 (다음 실행에서 재평가)
+                remaining = total - batch_start
+                logging.error(f"Stopping Phase 1 evaluation: {e} ({remaining} candidates left unevaluated)")
+                if progress_emitter:
+                    progress_emitter(f"⚠️ AI service is unavailable. Stopping evaluation; {remaining} candidates will be evaluated on the next update.", "error")
+                break
+            batch_verdicts = []
+            batch_item_status = {}
+
+            for offset, program_name in enumerate(batch):
+                i = batch_start + offset
+                masked_display_name = mask_name(program_name)
+                basic_data = batch_results.get(program_name)
+
+                if program_name in llm_failed:
+                    # 엔드포인트 장애로 실패한 항목만 pending 상태로 남겨 다음 실행에서 재평가
+                    if progress_emitter:
+                        progress_emitter(f" -> ⚠️ AI call failed for '{masked_display_name}'. It will be retried on the next update.", "detail")
+                    continue
+
+                if not basic_data:
+                    batch_item_status[program_name] = "skipped"
+                    if progress_emitter:
+                        progress_emitter(f" -> ⚠️ Could not evaluate '{masked_display_name}'. Skipping.", "detail")
+                    continue
+
+                # 위험도 4점 이상인 경우에만 Phase 2 진행 (안전 판정도 verdict 캐시에 기록)
+                if basic_data.get("risk_score", 0) < 4:
+                    batch_verdicts.append(self._make_verdict(program_name, basic_data, PHASE1_PROMPT_VERSION))
+                    batch_item_status[program_name] = "done"
+                else:
+                    if LAZY_ENRICHMENT:
+                        # Phase 2는 보류하고 기본 정보만 저장 (백그라운드 작업자가 나중에 보강)
+                        enhanced_data = self._make_pending_entry(basic_data)
+                    else:
                         if progress_emitter:
-                            progress_emitter(f"({i+1}/{len(unique_candidates)}) Phase 2: Enhancing '{masked_display_name}'...", None)
-                        
+                            progress_emitter(f"({i+1}/{total}) Phase 2: Enhancing '{masked_display_name}'...", None)
+
                         # Phase 2: 메타데이터 보강
                         enhanced_data = await self._enhance_threat_metadata(basic_data)
-                        enhanced_data["masked_name"] = mask_name(enhanced_data["program_name"])
-                        
-                        evaluated_programs.append(enhanced_data)
-                        
-                        if progress_emitter:
-                            progress_emitter(f" -> ✅ Added '{masked_display_name}' to list (Score: {enhanced_data['risk_score']})", "detail")
-                        logging.info(f"-> Two-phase evaluation completed: '{program_name}', Risk Score: {enhanced_data['risk_score']}")
-                else:
+                    enhanced_data["masked_name"] = mask_name(enhanced_data["program_name"])
+
+                    # 결과가 나오는 즉시 DB에 저장 (중단되어도 이미 평가한 항목은 유지)
+                    await database.async_update_threats([enhanced_data])
+                    evaluated_programs.append(enhanced_data)
+                    batch_verdicts.append(self._make_verdict(program_name, enhanced_data, PHASE1_PROMPT_VERSION))
+                    batch_item_status[program_name] = "done"
+
                     if progress_emitter:
-                        progress_emitter(f" -> ⚠️ Could not evaluate '{masked_display_name}'. Skipping.", "detail")
-                    logging.warning(f"'{program_name}' Evaluation response did not contain a JSON object.")
-            except (json.JSONDecodeError, AttributeError):
-                if progress_emitter:
-                    progress_emitter(f" -> ❌ Failed to parse evaluation for '{masked_display_name}'. Skipping.", "detail")    
-                logging.error(f"'{program_name}' Evaluation result parsing failed: {basic_response_text}")
+                        progress_emitter(f" -> ✅ Added '{masked_display_name}' to list (Score: {enhanced_data['risk_score']})", "detail")
+                    logging.info(f"-> Two-phase evaluation completed: '{program_name}', Risk Score: {enhanced_data['risk_score']}")
 
+            await database.async_save_verdicts(batch_verdicts)
+            await database.async_update_job_items(job_id, batch_item_status)
             await asyncio.sleep(1)
 
-        # 4. 평가 완료된 목록을 DB에 저장
-        if evaluated_programs:
-            if progress_emitter:
-                progress_emitter(f"Saving {len(evaluated_programs)} enhanced threats to the database...", None)
-            logging.info(f"Saving {len(evaluated_programs)} enhanced bloatware information to the DB...")
-            await database.async_update_threats(evaluated_programs)
+        # 5. 작업 상태 기록: 남은 후보가 있으면 다음 실행에서 이어서 진행
+        remaining = await database.async_get_job_items(job_id, ["pending"]) if job_id else []
+        await database.async_set_job_status(job_id, "interrupted" if remaining else "completed")
+        if remaining and progress_emitter:
+            progress_emitter(f"{len(remaining)} candidates were not evaluated. Run the same update again to resume.", "detail")
+        if progress_emitter and evaluated_programs:
+            progress_emitter(f"Saved {len(evaluated_programs)} {'threats (metadata enrichment deferred)' if LAZY_ENRICHMENT else 'enhanced threats'} to the database.", None)
 
     async def run_all_collectors(self, queries: Dict[str, List[str]], progress_emitter: Optional[Callable[[str, Any], None]] = None):
         """모든 정보 수집기를 실행"""
         logging.info("===== Start Two-Phase Threat Intelligence Collection =====")
         await self.scrape_community_info(queries, progress_emitter)
+        llm_stats = get_client_stats()
+        logging.info(f"LLM client stats: {llm_stats}")
+        if progress_emitter and (llm_stats["retries"] or llm_stats["failures"]):
+            progress_emitter(f"LLM calls: {llm_stats['calls']}, retries: {llm_stats['retries']}, failures: {llm_stats['failures']}, circuit: {llm_stats['circuit_state']}", "detail")
+        page_stats = get_page_cache_stats()
+        if page_stats["enabled"]:
+            logging.info(f"Page cache stats: {page_stats}")
+            if progress_emitter and page_stats["fresh_hits"] + page_stats["revalidated"]:
+                progress_emitter(f"Page cache: {page_stats['fresh_hits']} fresh, {page_stats['revalidated']} revalidated (304), "
+                                 f"{page_stats['refetched']} changed, {page_stats['misses']} new ({page_stats['page_hit_rate']:.0%} reused)", "detail")
+        search_stats = get_search_cache_stats()
+        if search_stats["enabled"]:
+            logging.info(f"Search cache stats: {search_stats}")
+            if progress_emitter and search_stats["hits"]:
+                progress_emitter(f"Search cache: {search_stats['hits']} of {search_stats['hits'] + search_stats['misses']} searches reused", "detail")
+        # 이번 실행에서 사용한 토큰/시간을 단계별로 요약 (track_run 안에서 실행된 경우)
+        run_usage = llm_metrics.current_run()
+        if progress_emitter and run_usage and run_usage.calls:
+            progress_emitter(run_usage.format_summary(), {"llm_usage": run_usage.summary()})
         logging.info("===== End Two-Phase Threat Intelligence Collection =====")
\ No newline at end of file
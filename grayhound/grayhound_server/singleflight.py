@@ -0,0 +1,97 @@
+# singleflight.py
+# Grayhound's single-flight request coalescing (concurrent duplicates share one upstream call)
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    동일한 키(요청 fingerprint)의 요청이 이미 진행 중이면 새로 호출하지 않고
+    진행 중인 호출의 결과(또는 예외)를 함께 기다림.
+    - do(): asyncio 코루틴용. 호출은 별도 Task로 실행되므로 먼저 요청한 쪽이 취소되어도 나머지는 결과를 받음.
+      기다리는 호출자가 모두 취소되면 공유 Task도 취소
+    - do_sync(): 스레드(ThreadPoolExecutor, asyncio.to_thread)에서 호출되는 동기 함수용
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executed = 0  # 실제 upstream 호출 수
+        self.shared = 0    # 진행 중인 호출에 합류하여 생략된 호출 수
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """key에 해당하는 코루틴을 한 번만 실행하고 결과를 모든 동시 호출자와 공유"""
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is loop and not task.done():
+            self.shared += 1
+            logging.debug(f"[{self.name}] Joined an in-flight request: {key[:16]}...")
+        else:
+            self.executed += 1
+            task = loop.create_task(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_task_done(k, t))
+        # 한 호출자의 취소가 공유 Task를 취소하지 않도록 shield 사용
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 결과를 기다리는 호출자가 더 이상 없으면 upstream 호출도 중단
+            if self._waiters.get(task) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            remaining = self._waiters.get(task, 1) - 1
+            if remaining > 0:
+                self._waiters[task] = remaining
+            else:
+                self._waiters.pop(task, None)
+
+    def _on_task_done(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # 모든 호출자가 취소된 경우에도 'exception was never retrieved' 경고가 나지 않도록 확인
+        if not task.cancelled():
+            task.exception()
+
+    def do_sync(self, key: str, fn: Callable[[], Any]) -> Any:
+        """key에 해당하는 동기 함수를 한 번만 실행하고 결과를 모든 동시 호출 스레드와 공유"""
+        with self._lock:
+            future = self._futures.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = concurrent.futures.Future()
+                self._futures[key] = future
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not is_leader:
+            logging.debug(f"[{self.name}] Joined an in-flight request: {key[:16]}...")
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    def stats(self) -> dict:
+        """실제 호출 수와 합류(생략)된 호출 수를 반환"""
+        return {
+            "name": self.name,
+            "executed": self.executed,
+            "shared": self.shared,
+            "in_flight": len(self._tasks) + len(self._futures),
+        }
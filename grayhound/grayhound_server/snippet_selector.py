@@ -0,0 +1,97 @@
+# snippet_selector.py
+# Grayhound's keyword-centered snippet selection (builds LLM prompt context from ranked windows around program name hits)
+
+import re
+from typing import Dict, List, Tuple
+
+WINDOW_CHARS = 600          # 검색어 적중 위치 주변으로 잘라낼 최대 창 크기
+SNIPPET_SEPARATOR = "\n...\n"
+
+# 검색어 종류별 가중치: 전체 프로그램명 > 정규화된 이름 > 브랜드 키워드
+WEIGHT_FULL_NAME = 3.0
+WEIGHT_NORMALIZED_NAME = 2.0
+WEIGHT_KEYWORD = 1.0
+
+def _term_pattern(term: str) -> re.Pattern:
+    """대소문자를 무시하고, 영문/숫자 사이에 끼어 있지 않은 위치에서만 찾는 패턴 (한국어 조사가 붙은 경우는 허용)
+    이름 안의 공백/하이픈/밑줄은 서로 바꿔 써도 일치하도록 함 (Delfino-x64 / Delfino x64)"""
+    parts = [re.escape(part) for part in re.split(r'[\s\-_]+', term.strip()) if part]
+    return re.compile(r'(?<![a-z0-9])' + r'[\s\-_]*'.join(parts) + r'(?![a-z0-9])', re.IGNORECASE)
+
+def build_terms(program_name: str, normalized_name: str, keywords: List[str]) -> Dict[str, float]:
+    """검색어 → 가중치. 같은 검색어가 여러 종류에 해당하면 가장 높은 가중치를 사용"""
+    terms: Dict[str, float] = {}
+    for term, weight in [(program_name, WEIGHT_FULL_NAME), (normalized_name, WEIGHT_NORMALIZED_NAME)] + [(keyword, WEIGHT_KEYWORD) for keyword in keywords]:
+        term = (term or "").strip().lower()
+        if len(term) >= 3 and weight > terms.get(term, 0):
+            terms[term] = weight
+    return terms
+
+def _find_windows(page: str, patterns: List[Tuple[re.Pattern, float]], window_chars: int) -> List[Tuple[int, int, float]]:
+    """
+    페이지에서 검색어 적중 위치마다 창을 만들고, 겹치는 창을 합쳐 (시작, 끝, 점수) 목록으로 반환.
+    창은 적중 위치가 속한 줄(html_extractor가 나눈 문단)이며, 줄이 window_chars보다 길면 적중 위치를 중심으로 자름
+    """
+    hits = sorted((match.start(), match.end(), weight) for pattern, weight in patterns for match in pattern.finditer(page))
+    windows: List[List[float]] = []
+    for start, end, weight in hits:
+        window_start = page.rfind('\n', 0, start) + 1
+        window_end = page.find('\n', end)
+        window_end = len(page) if window_end == -1 else window_end
+        if window_end - window_start > window_chars:
+            center = (start + end) // 2
+            window_start = max(window_start, center - window_chars // 2)
+            window_end = min(window_end, window_start + window_chars)
+        if windows and window_start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], window_end)
+            windows[-1][2] += weight
+        else:
+            windows.append([window_start, window_end, weight])
+    return [(int(start), int(end), score) for start, end, score in windows]
+
+def _snap_to_words(page: str, start: int, end: int) -> str:
+    """줄 중간에서 잘린 창의 양 끝을 단어 경계로 맞춰 단어가 잘리지 않도록 함"""
+    if start > 0 and page[start - 1] != '\n':
+        cut = page.find(' ', start, start + 40)
+        start = cut + 1 if cut != -1 else start
+    if end < len(page) and page[end] != '\n':
+        cut = page.rfind(' ', end - 40, end)
+        end = cut if cut > start else end
+    return page[start:end].strip()
+
+def select_snippets(pages: List[str], terms: Dict[str, float], char_budget: int, window_chars: int = WINDOW_CHARS) -> str:
+    """
+    모든 페이지에서 검색어 적중 위치를 중심으로 한 창을 만들고, 점수가 높은 창부터 char_budget까지 이어 붙임.
+    - 창 점수는 창 안의 적중 가중치 합이며, 같은 페이지에서 이미 선택된 창 수만큼 낮춰 여러 출처가 고르게 포함되도록 함
+    - 적중이 하나도 없으면 기존 방식대로 페이지를 이어 붙인 앞부분을 반환
+    """
+    patterns = [(_term_pattern(term), weight) for term, weight in terms.items()]
+    candidates = []  # (점수, 페이지 순서, 시작 위치, 텍스트)
+    for page_index, page in enumerate(pages):
+        for start, end, score in _find_windows(page, patterns, window_chars):
+            snippet = _snap_to_words(page, start, end)
+            if snippet:
+                candidates.append((score, page_index, start, snippet))
+
+    if not candidates:
+        return "\n\n".join(pages)[:char_budget]
+
+    selected: List[str] = []
+    used = 0
+    picked_per_page: Dict[int, int] = {}
+    while candidates:
+        best = max(candidates, key=lambda item: (item[0] / (1 + picked_per_page.get(item[1], 0)), -item[1], -item[2]))
+        candidates.remove(best)
+        snippet = best[3]
+        cost = len(snippet) + (len(SNIPPET_SEPARATOR) if selected else 0)
+        if used + cost > char_budget:
+            # 남은 공간이 충분하면 잘라서 넣고 끝내고, 부족하면 더 짧은 창을 찾아 계속
+            remaining = char_budget - used - (len(SNIPPET_SEPARATOR) if selected else 0)
+            if remaining >= window_chars // 2:
+                selected.append(snippet[:remaining].rsplit(' ', 1)[0])
+                break
+            continue
+        selected.append(snippet)
+        used += cost
+        picked_per_page[best[1]] = picked_per_page.get(best[1], 0) + 1
+    return SNIPPET_SEPARATOR.join(selected)
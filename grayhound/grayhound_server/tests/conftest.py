@@ -0,0 +1,7 @@
+# tests/conftest.py
+# 테스트에서 grayhound_server의 모듈을 바로 import할 수 있도록 경로 추가
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+# tests/test_cache_store.py
+
+import pytest
+
+import cache_store
+from cache_store import DiskCache, make_cache_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_store.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        cache = DiskCache("test", cache_dir=str(tmp_path), **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache._conn.close()
+
+def test_make_cache_key_is_stable_and_order_sensitive():
+    assert make_cache_key("search", "delfino", 10) == make_cache_key("search", "delfino", 10)
+    assert make_cache_key("search", "delfino", 10) != make_cache_key("search", 10, "delfino")
+    assert make_cache_key({"b": 1, "a": 2}) == make_cache_key({"a": 2, "b": 1})
+
+def test_entries_expire_after_their_ttl(make_cache, clock):
+    cache = make_cache(default_ttl=60)
+    cache.set("default", ["a"])
+    cache.set("short", ["b"], ttl=10)
+
+    clock.now += 30
+    assert cache.get("default") == ["a"]
+    assert cache.get("short") is None
+
+    clock.now += 31
+    assert cache.get("default") is None
+    assert cache.stats()["entries"] == 0
+
+def test_values_survive_reopening(make_cache):
+    make_cache().set("key", {"text": "다시 사용"})
+    assert make_cache().get("key") == {"text": "다시 사용"}
+
+def test_least_recently_used_entries_are_evicted_first(make_cache, clock):
+    cache = make_cache(max_bytes=25)  # JSON 직렬화된 값 하나가 10바이트이므로 두 개까지 저장
+    cache.set("a", "x" * 8)
+    clock.now += 1
+    cache.set("b", "y" * 8)
+    clock.now += 1
+    assert cache.get("a") == "x" * 8   # a를 최근에 사용
+    clock.now += 1
+    cache.set("c", "z" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8 and cache.get("c") == "z" * 8
+    assert cache.stats()["evictions"] == 1
+
+def test_oversized_values_are_not_cached(make_cache):
+    cache = make_cache(max_bytes=10)
+    cache.set("big", "x" * 100)
+    assert cache.get("big") is None
+
+def test_stats_count_hits_and_misses(make_cache):
+    cache = make_cache()
+    cache.set("key", 1)
+    cache.get("key")
+    cache.get("missing")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
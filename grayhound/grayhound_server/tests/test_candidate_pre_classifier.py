@@ -0,0 +1,43 @@
+# tests/test_candidate_pre_classifier.py
+
+import pytest
+
+from secure_agent.CandidatePreClassifier import CandidatePreClassifier, DECISION_INHERIT, DECISION_NEW, DECISION_PROTECTED
+from utils import starts_with_protected_vendor
+
+KNOWN_THREATS = [
+    {"program_name": "Norton Security", "generic_name": "Norton", "brand_keywords": ["norton"]},
+    {"program_name": "McAfee WebAdvisor", "generic_name": "McAfee", "brand_keywords": ["mcafee"]},
+    {"program_name": "Delfino G3", "generic_name": "Delfino", "brand_keywords": ["delfino"]},
+    {"program_name": "AhnLab Safe Transaction", "generic_name": "AhnLab", "brand_keywords": ["ahnlab"]},
+    {"program_name": "Google Toolbar", "generic_name": "Google Toolbar", "brand_keywords": ["toolbar"]},
+]
+
+@pytest.fixture
+def classifier():
+    return CandidatePreClassifier(KNOWN_THREATS, threshold=0.85)
+
+@pytest.mark.parametrize("name, expected", [
+    ("Delfino G3 (x64)", "Delfino G3"),
+    ("Delfino G3 Client", "Delfino G3"),
+    ("McAfee WebAdvisor 4.1", "McAfee WebAdvisor"),
+    ("AhnLab Safe Transaction x64", "AhnLab Safe Transaction"),
+    ("Norton Security Suite", "Norton Security"),
+])
+def test_variants_inherit_the_known_entry(classifier, name, expected):
+    decision, confidence, threat = classifier.classify(name)
+    assert decision == DECISION_INHERIT
+    assert confidence >= 0.85 and threat["program_name"] == expected
+
+@pytest.mark.parametrize("name", ["Norton Utilities", "McAfee Total Protection"])
+def test_brand_alone_does_not_inherit(classifier, name):
+    assert classifier.classify(name)[0] == DECISION_NEW
+
+@pytest.mark.parametrize("name", ["Microsoft Visual C++ 2015 Redistributable", "NVIDIA GeForce Experience", "Intel HD Graphics Driver"])
+def test_protected_patterns_are_excluded(classifier, name):
+    assert classifier.classify(name)[0] == DECISION_PROTECTED
+
+@pytest.mark.parametrize("name", ["Google Toolbar", "Google Toolbar 7.5", "Apple Software Update", "Intel Driver & Support Assistant"])
+def test_vendor_named_grayware_goes_to_the_llm(classifier, name):
+    assert starts_with_protected_vendor(name)
+    assert classifier.classify(name)[0] == DECISION_NEW
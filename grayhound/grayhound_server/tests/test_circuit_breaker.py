@@ -0,0 +1,117 @@
+# tests/test_circuit_breaker.py
+# google_ai_client의 서킷 브레이커: 열림/시험 호출(half-open)/시험 호출 취소 시 해제
+
+import asyncio
+import time
+
+import pytest
+
+import google_ai_client
+from llm_backends import LLMBackend
+from llm_errors import LLMCircuitOpenError, LLMServerError
+
+def _response(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+class ScriptedBackend(LLMBackend):
+    """호출마다 behaviors의 다음 항목을 실행하는 테스트용 백엔드 ("ok", 예외 인스턴스, "hang")"""
+    name = "scripted"
+    model_name = "scripted-model"
+
+    def __init__(self, behaviors):
+        self.behaviors = list(behaviors)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        return self.behaviors.pop(0) if self.behaviors else "ok"
+
+    def generate(self, json_data, timeout):
+        behavior = self._next()
+        if isinstance(behavior, BaseException):
+            raise behavior
+        return _response("sync ok")
+
+    async def agenerate(self, json_data, timeout):
+        behavior = self._next()
+        if behavior == "hang":
+            await asyncio.sleep(3600)
+        if isinstance(behavior, BaseException):
+            raise behavior
+        return _response("async ok")
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """테스트마다 새 브레이커와 재시도 없는 설정을 사용"""
+    breaker = google_ai_client.CircuitBreaker(failure_threshold=2, cooldown=60)
+    monkeypatch.setattr(google_ai_client, "circuit_breaker", breaker)
+    monkeypatch.setattr(google_ai_client, "MAX_RETRIES", 0)
+    return breaker
+
+@pytest.fixture
+def use_backend(monkeypatch):
+    def install(backend):
+        monkeypatch.setattr(google_ai_client, "backend", backend)
+        return backend
+    return install
+
+def _expire_cooldown(breaker):
+    breaker.opened_at = time.monotonic() - breaker.cooldown - 1
+
+def test_opens_after_threshold_and_fails_fast(breaker, use_backend):
+    backend = use_backend(ScriptedBackend([LLMServerError("503"), LLMServerError("503")]))
+    for _ in range(2):
+        with pytest.raises(LLMServerError):
+            google_ai_client.generate_text("prompt", use_cache=False)
+    assert breaker.state == "open"
+
+    with pytest.raises(LLMCircuitOpenError):
+        google_ai_client.generate_text("prompt", use_cache=False)
+    assert backend.calls == 2
+
+def test_successful_probe_closes_breaker(breaker, use_backend):
+    use_backend(ScriptedBackend(["ok"]))
+    breaker.state = "open"
+    _expire_cooldown(breaker)
+
+    assert google_ai_client.generate_text("prompt", use_cache=False) == "sync ok"
+    assert breaker.state == "closed"
+
+def test_failed_probe_reopens_breaker(breaker, use_backend):
+    use_backend(ScriptedBackend([LLMServerError("503")]))
+    breaker.state = "open"
+    _expire_cooldown(breaker)
+
+    with pytest.raises(LLMServerError):
+        google_ai_client.generate_text("prompt", use_cache=False)
+    assert breaker.state == "open"
+    with pytest.raises(LLMCircuitOpenError):
+        google_ai_client.generate_text("prompt", use_cache=False)
+
+def test_cancelled_probe_releases_breaker(breaker, use_backend):
+    backend = use_backend(ScriptedBackend(["hang", "ok"]))
+    breaker.state = "open"
+    _expire_cooldown(breaker)
+
+    async def scenario():
+        probe = asyncio.create_task(google_ai_client.agenerate_text("probe", use_cache=False))
+        while backend.calls == 0:
+            await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # 취소된 시험 호출 뒤에도 새 시험 호출이 허용되어야 함
+        return await google_ai_client.agenerate_text("next", use_cache=False)
+
+    assert asyncio.run(scenario()) == "async ok"
+    assert breaker.state == "closed"
+
+def test_unexpected_exception_in_probe_releases_breaker(breaker, use_backend):
+    use_backend(ScriptedBackend([RuntimeError("backend bug"), "ok"]))
+    breaker.state = "open"
+    _expire_cooldown(breaker)
+
+    with pytest.raises(RuntimeError):
+        google_ai_client.generate_text("prompt", use_cache=False)
+    assert google_ai_client.generate_text("prompt", use_cache=False) == "sync ok"
+    assert breaker.state == "closed"
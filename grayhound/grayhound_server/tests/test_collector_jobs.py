@@ -0,0 +1,137 @@
+# tests/test_collector_jobs.py
+# 수집 작업(job) 진행 상태: 엔드포인트 장애만 pending으로 남기고, 재시도해도 같은 실패는 건너뜀
+
+import asyncio
+
+import pytest
+
+import secure_agent.ThreatIntelligenceCollector as collector_module
+from llm_errors import LLMConfigError, LLMRequestError, LLMResponseError, LLMServerError
+
+GOOD = {"program_name": "Good App", "risk_score": 2, "reason": "[This program] is fine.", "generic_name": "good"}
+
+class FakeJobStore:
+    """scrape_community_info가 사용하는 database 함수의 메모리 구현"""
+
+    def __init__(self, resumable=None, items=None):
+        self.resumable = resumable
+        self.items = dict(items or {})
+        self.status = {}
+        self.claims = []
+        self.created = []
+
+    async def async_claim_resumable_job(self, fingerprint, max_age_seconds, lease_seconds, max_resumes):
+        self.claims.append((max_age_seconds, lease_seconds, max_resumes))
+        return self.resumable
+
+    async def async_create_job(self, fingerprint, program_names):
+        self.created.append(list(program_names))
+        self.items = {name: "pending" for name in program_names}
+        return "job-1"
+
+    async def async_get_job_items(self, job_id, statuses):
+        return [name for name, status in self.items.items() if status in statuses]
+
+    async def async_update_job_items(self, job_id, statuses):
+        self.items.update(statuses)
+
+    async def async_set_job_status(self, job_id, status):
+        self.status[job_id] = status
+
+    async def async_save_verdicts(self, verdicts):
+        pass
+
+    async def async_update_threats(self, threats):
+        pass
+
+@pytest.fixture
+def collector(monkeypatch):
+    monkeypatch.setattr(collector_module, "LAZY_ENRICHMENT", False)
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(collector_module.asyncio, "sleep", lambda delay, *args: real_sleep(0, *args))
+    return collector_module.ThreatIntelligenceCollector()
+
+def _install_store(monkeypatch, store):
+    for name in ("async_claim_resumable_job", "async_create_job", "async_get_job_items", "async_update_job_items",
+                 "async_set_job_status", "async_save_verdicts", "async_update_threats"):
+        monkeypatch.setattr(collector_module.database, name, getattr(store, name))
+
+def _script_single(monkeypatch, collector, outcomes):
+    """배치 요청은 응답 형식 오류로 실패시키고, 단일 평가는 outcomes(이름 → 결과 또는 예외)를 따름"""
+    async def fake_batch_call(*args, **kwargs):
+        raise LLMResponseError("batch reply was not JSON")
+
+    async def fake_single(program_name):
+        outcome = outcomes[program_name]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {**outcome, "program_name": program_name}
+
+    monkeypatch.setattr(collector_module, "agenerate_text", fake_batch_call)
+    monkeypatch.setattr(collector, "_evaluate_phase1_single", fake_single)
+
+def test_batch_separates_endpoint_failures_from_deterministic_ones(monkeypatch, collector):
+    _script_single(monkeypatch, collector, {
+        "Good App": GOOD,
+        "Rejected App": LLMRequestError("400 safety block"),
+        "Flaky App": LLMServerError("503"),
+        "No Key App": LLMConfigError("missing API key"),
+    })
+    results, llm_failed = asyncio.run(collector._evaluate_phase1_batch(["Good App", "Rejected App", "Flaky App", "No Key App"]))
+
+    assert results["Good App"]["risk_score"] == 2
+    assert results["Rejected App"] is None
+    assert llm_failed == ["Flaky App", "No Key App"]
+
+def test_retryable_batch_failure_leaves_every_item_pending(monkeypatch, collector):
+    async def fake_batch_call(*args, **kwargs):
+        raise LLMServerError("503")
+    monkeypatch.setattr(collector_module, "agenerate_text", fake_batch_call)
+
+    results, llm_failed = asyncio.run(collector._evaluate_phase1_batch(["A", "B"]))
+    assert results == {} and llm_failed == ["A", "B"]
+
+def test_job_completes_when_only_deterministic_failures_remain(monkeypatch, collector):
+    store = FakeJobStore()
+    _install_store(monkeypatch, store)
+    _script_single(monkeypatch, collector, {"Good App": GOOD, "Rejected App": LLMRequestError("400")})
+
+    async def fake_collect(search_queries, progress_emitter=None):
+        return ["Good App", "Rejected App"]
+    monkeypatch.setattr(collector, "_collect_candidates", fake_collect)
+
+    asyncio.run(collector.scrape_community_info({"general_search_queries": ["q"]}))
+
+    assert store.items == {"Good App": "done", "Rejected App": "skipped"}
+    assert store.status == {"job-1": "completed"}
+
+def test_job_is_interrupted_when_endpoint_fails(monkeypatch, collector):
+    store = FakeJobStore()
+    _install_store(monkeypatch, store)
+    _script_single(monkeypatch, collector, {"Good App": GOOD, "Flaky App": LLMServerError("503")})
+
+    async def fake_collect(search_queries, progress_emitter=None):
+        return ["Good App", "Flaky App"]
+    monkeypatch.setattr(collector, "_collect_candidates", fake_collect)
+
+    asyncio.run(collector.scrape_community_info({"general_search_queries": ["q"]}))
+
+    assert store.items == {"Good App": "done", "Flaky App": "pending"}
+    assert store.status == {"job-1": "interrupted"}
+
+def test_claimed_job_resumes_pending_items_without_crawling(monkeypatch, collector):
+    store = FakeJobStore(resumable={"job_id": "job-0", "total": 2, "resume_count": 1},
+                         items={"Done App": "done", "Good App": "pending"})
+    _install_store(monkeypatch, store)
+    _script_single(monkeypatch, collector, {"Good App": GOOD})
+
+    async def fail_collect(*args, **kwargs):
+        raise AssertionError("a resumed job must not crawl again")
+    monkeypatch.setattr(collector, "_collect_candidates", fail_collect)
+
+    asyncio.run(collector.scrape_community_info({"general_search_queries": ["q"]}))
+
+    assert store.claims == [(collector_module.JOB_RESUME_MAX_AGE, collector_module.JOB_LEASE_SECONDS, collector_module.JOB_MAX_RESUMES)]
+    assert store.created == []
+    assert store.items == {"Done App": "done", "Good App": "done"}
+    assert store.status == {"job-0": "completed"}
@@ -0,0 +1,36 @@
+# tests/test_json_utils.py
+
+from json_utils import JSONStreamExtractor, extract_json, extract_json_array
+
+PHASE1_SCHEMA = {"type": "object", "required": ["program_name", "risk_score"]}
+
+def test_array_is_found_inside_prose_and_fences():
+    reply = 'Here you go:\n```json\n[{"program_name": "A", "risk_score": 3}, {"program_name": "B", "risk_score": 7}]\n```'
+    assert extract_json_array(reply) == [{"program_name": "A", "risk_score": 3}, {"program_name": "B", "risk_score": 7}]
+
+def test_truncated_array_keeps_only_complete_elements():
+    reply = '[{"program_name": "A", "risk_score": 3}, {"program_name": "B", "risk_score": 7}, {"program_name": "C", "risk_'
+    assert extract_json_array(reply) == [{"program_name": "A", "risk_score": 3}, {"program_name": "B", "risk_score": 7}]
+
+def test_truncated_string_array():
+    assert extract_json_array('["delfino", "nprotect", "ahnl') == ["delfino", "nprotect"]
+
+def test_bracket_in_prose_does_not_hide_the_real_array():
+    assert extract_json_array('See [note] below. [{"program_name": "A"}]') == [{"program_name": "A"}]
+
+def test_no_array_returns_empty_list():
+    assert extract_json_array("I could not evaluate these programs.") == []
+    assert extract_json_array(None) == []
+
+def test_extract_json_skips_values_that_do_not_match_the_schema():
+    reply = 'Example: {"foo": 1}\nAnswer: {"program_name": "A", "risk_score": 4}'
+    assert extract_json(reply, PHASE1_SCHEMA) == {"program_name": "A", "risk_score": 4}
+    assert extract_json('{"foo": 1}', PHASE1_SCHEMA) is None
+
+def test_stream_extractor_yields_values_across_chunks():
+    extractor = JSONStreamExtractor()
+    values = []
+    for chunk in ['[{"program_name": "A", ', '"risk_score": 3}, {"program', '_name": "B", "risk_score": 5}]']:
+        values.extend(extractor.feed(chunk))
+    values.extend(extractor.finish())
+    assert values == [[{"program_name": "A", "risk_score": 3}, {"program_name": "B", "risk_score": 5}]]
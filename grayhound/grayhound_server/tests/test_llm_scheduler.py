@@ -0,0 +1,80 @@
+# tests/test_llm_scheduler.py
+
+import asyncio
+
+import pytest
+
+import llm_scheduler
+from llm_scheduler import LLMScheduler, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_REPORT
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_scheduler.time, "monotonic", clock)
+    return clock
+
+def _enqueue(scheduler, priority, enqueued_at):
+    scheduler._queues[priority].append((object(), enqueued_at))
+
+def test_higher_class_goes_first_without_aging(clock):
+    scheduler = LLMScheduler(aging_seconds=30)
+    _enqueue(scheduler, PRIORITY_BACKGROUND, clock.now - 10)
+    _enqueue(scheduler, PRIORITY_REPORT, clock.now)
+    assert scheduler._pick_next() == PRIORITY_REPORT
+
+def test_aged_background_request_overtakes_newer_report(clock):
+    scheduler = LLMScheduler(aging_seconds=30)
+    _enqueue(scheduler, PRIORITY_BACKGROUND, clock.now - 31)
+    _enqueue(scheduler, PRIORITY_REPORT, clock.now)
+    assert scheduler._pick_next() == PRIORITY_BACKGROUND
+
+def test_aging_never_overtakes_interactive(clock):
+    scheduler = LLMScheduler(aging_seconds=30)
+    _enqueue(scheduler, PRIORITY_BACKGROUND, clock.now - 3600)
+    _enqueue(scheduler, PRIORITY_INTERACTIVE, clock.now)
+    assert scheduler._pick_next() == PRIORITY_INTERACTIVE
+
+def test_interactive_slot_is_granted_before_queued_background_work():
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=1, requests_per_minute=0, aging_seconds=30)
+        order = []
+        all_queued = asyncio.Event()
+
+        async def job(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await all_queued.wait()
+
+        tasks = [asyncio.create_task(job(f"background-{i}", PRIORITY_BACKGROUND)) for i in range(5)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("interactive", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        all_queued.set()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(run())
+    assert order[:2] == ["background-0", "interactive"]
+    assert stats["running"] == 0
+    assert stats["classes"]["interactive"]["granted"] == 1
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        scheduler = LLMScheduler(max_concurrency=1, requests_per_minute=0)
+        await scheduler.acquire(PRIORITY_BACKGROUND)
+        waiter = asyncio.create_task(scheduler.acquire(PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release()
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=1)
+        return scheduler.stats()["running"]
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,39 @@
+# tests/test_parse_pool.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from page_parse_worker import ParsePool, parse_page
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def parse_pool():
+    pool = ParsePool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+def test_worker_module_imports_no_server_modules():
+    code = ("import sys, page_parse_worker; "
+            "print(sorted(m for m in ('database', 'google_ai_client', 'GoogleSearch_Grayhound', 'Grayhound_Websocket') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=SERVER_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_pool_parses_in_a_worker_process(parse_pool):
+    html = b"<html><body><p>Delfino G3 bloatware</p></body></html>"
+    future = parse_pool.acquire().submit(parse_page, html, "text/html; charset=utf-8")
+    assert future.result(timeout=60) == parse_page(html, "text/html; charset=utf-8")
+    assert "Delfino G3 bloatware" in future.result()
+
+def test_discard_replaces_only_the_broken_pool(parse_pool):
+    broken = parse_pool.acquire()
+    parse_pool.discard(broken)
+    replacement = parse_pool.acquire()
+    assert replacement is not broken
+
+    # 늦게 도착한 discard(이전 풀)는 새 풀을 버리지 않음
+    parse_pool.discard(broken)
+    assert parse_pool.acquire() is replacement
@@ -0,0 +1,60 @@
+# tests/test_program_name_keys.py
+# 스캔 매칭용 정규화(SecurityAgentManager)와 판정 캐시 키(verdict_cache_key)는 서로 다른 규칙을 사용
+
+import pytest
+
+from utils import normalize_program_name, verdict_cache_key
+
+@pytest.mark.parametrize("name, expected", [
+    ("AhnLab Safe Transaction (x64) v1.2", "ahnlab safe transaction"),
+    ("AhnLab Safe Transaction", "ahnlab safe transaction"),
+    ("Foo-Bar Toolbar 2024", "foo bar toolbar"),
+    ("  Some   App 64bit ", "some app"),
+])
+def test_verdict_key_ignores_case_version_arch_and_punctuation(name, expected):
+    assert verdict_cache_key(name) == expected
+
+@pytest.mark.parametrize("first, second", [
+    ("Norton Security", "Norton"),
+    ("Avast Free Antivirus", "Avast Antivirus"),
+    ("Foo Cleaner Pro", "Foo Cleaner"),
+    ("Proton VPN", "Proton"),
+])
+def test_verdict_key_keeps_editions_apart(first, second):
+    assert verdict_cache_key(first) != verdict_cache_key(second)
+
+def test_verdict_key_falls_back_to_lowercase_name():
+    assert verdict_cache_key("2024") == "2024"
+    assert verdict_cache_key("") == ""
+
+def test_normalize_program_name_strips_trailing_edition():
+    assert normalize_program_name("Foo Cleaner Pro") == "foo cleaner"
+    assert normalize_program_name("Proton VPN") == "proton vpn"
+
+def test_collector_and_extractor_share_the_verdict_key():
+    from secure_agent.CandidatePreExtractor import CandidatePreExtractor
+    from secure_agent.ThreatIntelligenceCollector import ThreatIntelligenceCollector
+
+    collector = ThreatIntelligenceCollector()
+    for name in ("Norton Security", "AhnLab Safe Transaction (x64) v1.2"):
+        assert collector._verdict_key(name) == CandidatePreExtractor._candidate_key(name) == verdict_cache_key(name)
+
+class TestSecurityAgentManagerMatching:
+    """스캔 시 위협 매칭은 기존 정규화 규칙(에디션 단어를 어디서든 제거)을 그대로 사용"""
+
+    @pytest.fixture
+    def manager(self):
+        module = pytest.importorskip("SecurityAgentManager")
+        return module.SecurityAgentManager.__new__(module.SecurityAgentManager)
+
+    @pytest.mark.parametrize("name, expected", [
+        ("Norton Internet Security", "norton"),
+        ("Avast Free Antivirus", "avast"),
+        ("Foo Suite Updater (x64) v2.1", "foo updater"),
+    ])
+    def test_normalizer_is_unchanged(self, manager, name, expected):
+        assert manager._normalize_program_name(name) == expected
+
+    def test_normalized_match_ignores_edition_words(self, manager):
+        matched, reason = manager._enhanced_threat_matching("Avast Free Antivirus", {"program_name": "Avast Antivirus"})
+        assert matched and reason.startswith("normalized exact match")
@@ -0,0 +1,38 @@
+# tests/test_search_cache.py
+# 검색 결과 캐시 키: 대소문자/공백 차이만 합치고, 아키텍처·버전 토큰이 다른 쿼리는 따로 저장
+
+import pytest
+
+import GoogleSearch_Grayhound as search
+from cache_store import DiskCache
+
+@pytest.fixture
+def search_cache(monkeypatch, tmp_path):
+    cache = DiskCache("search_results", cache_dir=str(tmp_path))
+    monkeypatch.setattr(search, "search_cache", cache)
+    return cache
+
+def test_normalization_only_folds_case_and_whitespace():
+    assert search.normalize_search_query("  Delfino   G3\tBloatware ") == "delfino g3 bloatware"
+    assert search.normalize_search_query("Delfino-x64 64bit 2024") == "delfino-x64 64bit 2024"
+    assert search.normalize_search_query(None) == ""
+
+@pytest.mark.parametrize("first, second", [
+    ("Delfino x64", "Delfino x86"),
+    ("Delfino 64bit", "Delfino"),
+    ("nProtect 2023", "nProtect 2024"),
+])
+def test_queries_with_different_tokens_do_not_share_results(search_cache, first, second):
+    first_key, _ = search._lookup_search(search.normalize_search_query(first), 10)
+    search._store_search(first_key, ["https://example.com/first"])
+
+    second_key, cached = search._lookup_search(search.normalize_search_query(second), 10)
+    assert second_key != first_key
+    assert cached is None
+
+def test_case_and_spacing_variants_share_results(search_cache):
+    key, _ = search._lookup_search(search.normalize_search_query("Delfino  G3"), 10)
+    search._store_search(key, ["https://example.com/delfino"])
+
+    _, cached = search._lookup_search(search.normalize_search_query(" delfino g3 "), 10)
+    assert cached == ["https://example.com/delfino"]
@@ -0,0 +1,118 @@
+# tests/test_singleflight.py
+
+import asyncio
+import threading
+
+import pytest
+
+import google_ai_client
+from llm_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from singleflight import SingleFlight
+
+def test_concurrent_calls_with_the_same_key_share_one_call():
+    async def run():
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("same", fetch) for _ in range(5)), flights.do("other", fetch))
+        return results, calls, flights.stats()
+
+    results, calls, stats = asyncio.run(run())
+    assert results == ["result"] * 6
+    assert calls == 2
+    assert stats["executed"] == 2 and stats["shared"] == 4 and stats["in_flight"] == 0
+
+def test_cancelling_one_caller_does_not_cancel_the_shared_call():
+    async def run():
+        flights = SingleFlight("test")
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return "result"
+
+        first = asyncio.create_task(flights.do("key", fetch))
+        second = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(run()) == ("result", True)
+
+def test_exceptions_are_shared_and_the_key_is_released():
+    async def run():
+        flights = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+        retried = await flights.do("key", lambda: asyncio.sleep(0, result="recovered"))
+        return results, retried
+
+    results, retried = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retried == "recovered"
+
+def test_do_sync_shares_one_call_between_threads():
+    flights = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    leader = threading.Thread(target=lambda: results.append(flights.do_sync("key", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do_sync("key", fetch))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flights.shared < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ["result"] * 4 and len(calls) == 1
+
+@pytest.fixture
+def counted_llm_calls(monkeypatch):
+    """google_ai_client의 실제 호출(_agenerate_text)을 세는 가짜 구현으로 교체"""
+    calls = []
+
+    async def fake_agenerate_text(prompt, temperature, top_p, max_tokens, use_cache, timeout, priority, response_schema=None, tag=None):
+        calls.append((prompt, priority))
+        await asyncio.sleep(0.01)
+        return f"{prompt} @ {priority}"
+
+    monkeypatch.setattr(google_ai_client, "_agenerate_text", fake_agenerate_text)
+    monkeypatch.setattr(google_ai_client, "llm_flights", SingleFlight("llm_requests"))
+    return calls
+
+def test_llm_flight_key_merges_identical_requests(counted_llm_calls):
+    async def run():
+        return await asyncio.gather(*(google_ai_client.agenerate_text("prompt", priority=PRIORITY_BACKGROUND) for _ in range(3)))
+
+    assert asyncio.run(run()) == [f"prompt @ {PRIORITY_BACKGROUND}"] * 3
+    assert counted_llm_calls == [("prompt", PRIORITY_BACKGROUND)]
+
+def test_llm_flight_key_keeps_priorities_and_configs_apart(counted_llm_calls):
+    async def run():
+        return await asyncio.gather(
+            google_ai_client.agenerate_text("prompt", priority=PRIORITY_BACKGROUND),
+            google_ai_client.agenerate_text("prompt", priority=PRIORITY_INTERACTIVE),
+            google_ai_client.agenerate_text("prompt", temperature=0.1, priority=PRIORITY_BACKGROUND),
+        )
+
+    asyncio.run(run())
+    assert len(counted_llm_calls) == 3
@@ -0,0 +1,35 @@
+# tests/test_snippet_selector.py
+
+from snippet_selector import SNIPPET_SEPARATOR, WEIGHT_FULL_NAME, WEIGHT_KEYWORD, WEIGHT_NORMALIZED_NAME, build_terms, select_snippets
+
+FILLER = "Unrelated sidebar text about weather and sports scores. " * 20
+
+def test_build_terms_keeps_highest_weight_and_drops_short_terms():
+    terms = build_terms("Delfino G3 (x64)", "delfino g3", ["delfino", "g3", "Delfino G3 (x64)"])
+    assert terms == {"delfino g3 (x64)": WEIGHT_FULL_NAME, "delfino g3": WEIGHT_NORMALIZED_NAME, "delfino": WEIGHT_KEYWORD}
+
+def test_snippets_come_from_matching_paragraphs():
+    page = f"{FILLER}\nDelfino G3 keeps running after banking and slows the browser.\n{FILLER}"
+    result = select_snippets([page], build_terms("Delfino G3", "delfino g3", ["delfino"]), char_budget=500)
+    assert result == "Delfino G3 keeps running after banking and slows the browser."
+
+def test_separator_spacing_and_hyphen_variants_match():
+    page = f"{FILLER}\nUsers report Delfino-G3 installs itself again after removal.\n{FILLER}"
+    result = select_snippets([page], build_terms("Delfino G3", "delfino g3", []), char_budget=500)
+    assert result == "Users report Delfino-G3 installs itself again after removal."
+
+def test_name_inside_a_longer_word_is_not_a_hit():
+    page = "The superdelfino g3x package is a different product."
+    assert select_snippets([page], {"delfino g3": 1.0}, char_budget=20) == page[:20]
+
+def test_snippets_from_several_pages_share_the_budget():
+    pages = [
+        "Delfino G3 first page mention one.\nDelfino G3 first page mention two.\nDelfino G3 first page mention three.",
+        "Delfino G3 second page mention.",
+    ]
+    result = select_snippets(pages, {"delfino g3": 1.0}, char_budget=80, window_chars=40)
+    assert result.split(SNIPPET_SEPARATOR) == ["Delfino G3 first page mention one.", "Delfino G3 second page mention."]
+
+def test_without_hits_falls_back_to_leading_text():
+    pages = ["first page", "second page"]
+    assert select_snippets(pages, {"delfino": 1.0}, char_budget=15) == "first page\n\nsec"
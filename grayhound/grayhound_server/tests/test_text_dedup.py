@@ -0,0 +1,47 @@
+# tests/test_text_dedup.py
+
+from text_dedup import MinHashIndex, PageDeduplicator
+
+ARTICLE = ("Delfino G3 is a security plugin that many Korean banking sites install automatically. "
+           "It keeps running in the background after the banking session ends and slows down the browser. "
+           "Most users can remove it safely from the control panel when they no longer use online banking.")
+
+def _words(text):
+    return text.lower().split()
+
+def test_minhash_index_rejects_near_duplicates():
+    index = MinHashIndex(threshold=0.8)
+    assert index.add_if_new(_words(ARTICLE))
+    assert not index.add_if_new(_words(ARTICLE + " Updated today."))
+
+def test_minhash_index_accepts_different_text():
+    index = MinHashIndex(threshold=0.8)
+    assert index.add_if_new(_words(ARTICLE))
+    other = ("nProtect Online Security is a keyboard protection module bundled with payment pages. "
+             "It hooks keyboard input system wide and is often reported as causing input lag in games.")
+    assert index.add_if_new(_words(other))
+
+def test_duplicate_page_is_dropped():
+    dedup = PageDeduplicator(threshold=0.8)
+    assert dedup.filter(ARTICLE) == ARTICLE
+    assert dedup.filter(ARTICLE) == ""
+    assert dedup.stats["duplicate_pages"] == 1
+
+def test_repeated_paragraphs_and_boilerplate_are_removed_from_new_pages():
+    dedup = PageDeduplicator(threshold=0.8)
+    first = f"Home | Login\n{ARTICLE}"
+    second = ("Home | Login\n"
+              f"{ARTICLE}\n"
+              "A second forum thread says AhnLab Safe Transaction also stays resident and asks for admin rights every boot, "
+              "which several users found annoying enough to uninstall it.")
+    assert dedup.filter(first) == first
+    kept = dedup.filter(second)
+    assert kept.startswith("A second forum thread")
+    assert ARTICLE not in kept and "Home | Login" not in kept
+    assert dedup.stats["duplicate_paragraphs"] == 2
+
+def test_summary_reports_removed_share():
+    dedup = PageDeduplicator()
+    dedup.filter(ARTICLE)
+    dedup.filter(ARTICLE)
+    assert dedup.summary().startswith("Dedup removed 1/2 pages")
@@ -0,0 +1,116 @@
+# text_dedup.py
+# Grayhound's near-duplicate text filter (word shingles + MinHash + LSH banding) for scraped pages before they reach LLM prompts
+
+import hashlib
+import random
+import re
+from typing import Dict, List, Set, Tuple
+
+DEFAULT_THRESHOLD = 0.8    # 추정 Jaccard 유사도가 이 값 이상이면 중복으로 판단
+NUM_PERM = 64              # MinHash 서명 길이
+NUM_BANDS = 16             # LSH 밴드 수 (밴드당 NUM_PERM / NUM_BANDS 행). 유사도 0.8인 쌍을 후보로 찾을 확률 약 99.9%
+PAGE_SHINGLE_SIZE = 5      # 페이지 비교용 단어 shingle 크기
+PARAGRAPH_SHINGLE_SIZE = 3 # 문단 비교용 단어 shingle 크기 (문단은 짧으므로 작게)
+MIN_PARAGRAPH_WORDS = 8    # 이보다 짧은 줄(버튼, 메뉴 문구 등)은 완전히 같은 경우에만 중복으로 판단
+
+_WORD_RE = re.compile(r'\w+')
+# 순열 대신 사용하는 범용 해시 (a * h + b) mod p. 고정 시드로 생성하여 프로세스/실행 간에 같은 서명
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)
+_PERMUTATIONS = tuple((_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM))
+
+def _shingle_hashes(words: List[str], size: int) -> Set[int]:
+    """단어 목록의 size-단어 shingle을 64비트 해시 집합으로 변환"""
+    if len(words) <= size:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return {int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little') for shingle in shingles}
+
+def minhash_signature(words: List[str], shingle_size: int) -> Tuple[int, ...]:
+    """단어 목록의 MinHash 서명"""
+    hashes = _shingle_hashes(words, shingle_size)
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+class MinHashIndex:
+    """
+    지금까지 추가된 텍스트 중 유사도가 threshold 이상인 것이 있는지 찾는 LSH 인덱스.
+    - 서명을 밴드로 나눠 같은 밴드 값을 가진 항목만 후보로 비교하므로 항목 수가 늘어도 비교 횟수가 거의 늘지 않음
+    - 후보는 서명 일치 비율(추정 Jaccard 유사도)로 다시 확인
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, shingle_size: int = PAGE_SHINGLE_SIZE):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._rows = NUM_PERM // NUM_BANDS
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._signatures: List[Tuple[int, ...]] = []
+
+    def add_if_new(self, words: List[str]) -> bool:
+        """유사한 항목이 없으면 추가하고 True, 있으면 추가하지 않고 False"""
+        signature = minhash_signature(words, self.shingle_size)
+        bands = [(band, signature[band * self._rows:(band + 1) * self._rows]) for band in range(NUM_BANDS)]
+        candidates = {index for key in bands for index in self._buckets.get(key, ())}
+        for index in candidates:
+            other = self._signatures[index]
+            if sum(a == b for a, b in zip(signature, other)) / NUM_PERM >= self.threshold:
+                return False
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for key in bands:
+            self._buckets.setdefault(key, []).append(index)
+        return True
+
+class PageDeduplicator:
+    """
+    페이지를 하나씩 받아 앞서 받은 내용과 거의 같은 페이지/문단을 제거 (스트리밍 수집 중 사용하는 상태 유지형 필터).
+    페이지는 줄(블록) 단위 문단으로 구성되어 있다고 가정 (html_extractor가 블록 요소마다 줄을 나눔)
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self._pages = MinHashIndex(threshold, PAGE_SHINGLE_SIZE)
+        self._paragraphs = MinHashIndex(threshold, PARAGRAPH_SHINGLE_SIZE)
+        self._short_lines: Set[str] = set()
+        self.stats = {"pages": 0, "duplicate_pages": 0, "paragraphs": 0, "duplicate_paragraphs": 0, "chars_in": 0, "chars_out": 0}
+
+    def filter(self, page: str) -> str:
+        """중복 문단을 제거한 페이지 텍스트를 반환. 페이지 전체가 중복이면 빈 문자열"""
+        self.stats["pages"] += 1
+        self.stats["chars_in"] += len(page)
+        words = _WORD_RE.findall(page.lower())
+        if not words:
+            return ""
+        if not self._pages.add_if_new(words):
+            self.stats["duplicate_pages"] += 1
+            return ""
+
+        kept = []
+        for line in page.split('\n'):
+            line = line.strip()
+            line_words = _WORD_RE.findall(line.lower())
+            if not line_words:
+                continue
+            self.stats["paragraphs"] += 1
+            if len(line_words) < MIN_PARAGRAPH_WORDS:
+                key = ' '.join(line_words)
+                is_new = key not in self._short_lines
+                self._short_lines.add(key)
+            else:
+                is_new = self._paragraphs.add_if_new(line_words)
+            if is_new:
+                kept.append(line)
+            else:
+                self.stats["duplicate_paragraphs"] += 1
+
+        text = '\n'.join(kept)
+        self.stats["chars_out"] += len(text)
+        return text
+
+    def summary(self) -> str:
+        """로그용 한 줄 요약"""
+        stats = self.stats
+        saved = stats["chars_in"] - stats["chars_out"]
+        share = saved * 100 / stats["chars_in"] if stats["chars_in"] else 0
+        return (f"Dedup removed {stats['duplicate_pages']}/{stats['pages']} pages and {stats['duplicate_paragraphs']}/{stats['paragraphs']} paragraphs "
+                f"({saved:,} chars, {share:.0f}%)")
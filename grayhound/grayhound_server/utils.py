@@ -65,6 +65,136 @@ def mask_name(name: str) -> str:
             
     return "".join(masked_parts)
 
+def normalize_program_name(name: str) -> str:
+    """
+    프로그램명을 정규화하여 매칭 정확도 향상
+    버전/아키텍처 정보와 불필요한 문구를 제거하고 소문자로 변환
+    예: "AhnLab Safe Transaction (x64) v1.2" -> "ahnlab safe transaction"
+    """
+    if not name:
+        return ""
+          
+    # 소문자 변환
+    normalized = name.lower()
+    
+    # 버전 정보 제거 (v1.0, 2024, etc.)
+    normalized = re.sub(r'\s*v?\d+\.\d+.*$', '', normalized)
+    normalized = re.sub(r'\s*\d{4}.*$', '', normalized)
+    
+    # 아키텍처 정보 제거
+    normalized = re.sub(r'\s*\(?(x86|x64|32bit|64bit|32비트|64비트)\)?', '', normalized)
+    
+    # 특수 문자 및 괄호 내용 제거
+    normalized = re.sub(r'\([^)]*\)', '', normalized)
+    normalized = re.sub(r'[^\w\s가-힣]', ' ', normalized)
+    
+    # 중복 공백 제거
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    
+    # 불필요한 문구 제거 (이름 끝에 단어로 붙은 경우 하나만. "Proton VPN", "Process Explorer"처럼 단어 일부이거나
+    # "Norton Antivirus Free"처럼 여러 개가 붙은 경우까지 지우면 서로 다른 제품이 같은 이름으로 합쳐짐)
+    stripped = re.sub(r'\s*\b(internet\s+security|antivirus|security|suite|professional|pro|lite|free|trial)$', '', normalized)
+    
+    return stripped or normalized
+
+def verdict_cache_key(name: str) -> str:
+    """
+    판정 캐시 키: 대소문자, 버전/아키텍처 정보, 구두점 차이만 무시
+    에디션 단어는 지우지 않으므로 "Norton Security"와 "Norton"은 서로 다른 키가 됨
+    예: "AhnLab Safe Transaction (x64) v1.2" -> "ahnlab safe transaction"
+    """
+    if not name:
+        return ""
+    
+    key = name.lower()
+    key = re.sub(r'\s*v?\d+\.\d+.*$', '', key)
+    key = re.sub(r'\s*\d{4}.*$', '', key)
+    key = re.sub(r'\(?\b(x86|x64|32bit|64bit|32비트|64비트)\b\)?', ' ', key)
+    key = re.sub(r'[^\w\s가-힣]', ' ', key)
+    key = re.sub(r'\s+', ' ', key).strip()
+    
+    return key or name.strip().lower()
+
+def extract_brand_keywords(program_name: str, publisher: str = "") -> list[str]:
+    """프로그램명과 게시자명에서 브랜드 키워드를 추출"""
+    keywords = set()
+    
+    # 프로그램명에서 키워드 추출
+    if program_name:
+        # 공백, 하이픈, 언더스코어로 분리
+        words = re.split(r'[\s\-_]+', program_name.lower())
+        for word in words:
+            # 버전 번호, 비트 정보 제거
+            clean_word = re.sub(r'(x86|x64|32bit|64bit|32비트|64비트|v?\d+\.?\d*)', '', word)
+            if len(clean_word) >= 3:  # 3글자 이상만 키워드로 사용
+                keywords.add(clean_word)
+    
+    # 게시자명에서 키워드 추출
+    if publisher:
+        pub_words = re.split(r'[\s\-_\.]+', publisher.lower())
+        for word in pub_words:
+            clean_word = re.sub(r'(inc|corp|corporation|ltd|limited|co|company)', '', word)
+            if len(clean_word) >= 3:
+                keywords.add(clean_word)
+    
+    # 불용어 제거
+    stopwords = {'the', 'and', 'for', 'with', 'software', 'program', 'application', 'app', 'tool', 'suite', 'service', 'system', 'windows', 'microsoft'}
+    keywords = keywords - stopwords
+    
+    return list(keywords)
+
+# 보호된 게시자 목록 (확장)
+PROTECTED_PUBLISHERS = {
+    "microsoft corporation", "microsoft", "nvidia corporation", "nvidia", 
+    "intel corporation", "intel", "amd", "advanced micro devices, inc.", 
+    "google llc", "google inc.", "apple inc.", "apple",
+    "realtek semiconductor corp.", "realtek"
+}
+
+# 게시자명에서 회사 형태를 뺀 제조사 이름 (예: "google llc" -> "google")
+PROTECTED_VENDOR_NAMES = {
+    re.sub(r'[\s,]+(corporation|corp\.?|inc\.?|llc)$', '', pub) for pub in PROTECTED_PUBLISHERS
+}
+
+def starts_with_protected_vendor(program_name: str) -> bool:
+    """
+    프로그램명이 보호된 제조사 이름으로 시작하는지 확인 (예: "Google Chrome", "Google Toolbar")
+    같은 제조사의 그레이웨어도 해당되므로 보호 여부 판단이 아닌 참고용으로만 사용
+    """
+    program_lower = re.sub(r'\s+', ' ', program_name.lower()).strip()
+    return any(program_lower == vendor or re.match(rf'{re.escape(vendor)}\b', program_lower) for vendor in PROTECTED_VENDOR_NAMES)
+
+def is_protected_program(program_name: str, publisher: str = "") -> bool:
+    """필수/보호 프로그램인지 확인"""
+    program_lower = program_name.lower()
+    publisher_lower = publisher.lower() if publisher else ""
+    
+    # 보호된 프로그램 패턴
+    protected_patterns = [
+        r'microsoft visual c\+\+',
+        r'nvidia geforce',
+        r'nvidia control panel',
+        r'intel\s+(graphics|hd|uhd)',
+        r'amd radeon',
+        r'windows\s+(defender|security)',
+        r'directx',
+        r'\.net framework',
+        r'visual studio',
+        r'runtime',
+        r'redistributable'
+    ]
+    
+    # 게시자로 보호 여부 확인
+    if publisher_lower and any(pub in publisher_lower for pub in PROTECTED_PUBLISHERS):
+        return True
+    
+    # 프로그램명 패턴으로 보호 여부 확인
+    for pattern in protected_patterns:
+        if re.search(pattern, program_lower):
+            return True
+    
+    return False
+
 def mask_name_for_guide(name: str) -> str:
     """Manual Cleanup Guide를 위해 35% 비율로 마스킹합니다."""
     if not isinstance(name, str) or not name: